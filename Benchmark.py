@@ -0,0 +1,140 @@
+###IMPORT
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from Class_method import Battery, Experiment, Experiment_group, ENTROPY_COLUMNS
+from Instrumentation import Recorder
+import Synthetic_data
+
+###FUNCTIONS
+
+def measure(function,*args,trace_memory=True,**kwargs):
+    '''Run a function and measure its wall time and its peak of allocated memory
+
+       The memory is traced with tracemalloc, which slows down pure python code: with trace_memory=False only the time is
+       measured and the peak is NaN.
+
+       Return
+       -------
+       result :
+           Result of the function
+       seconds : float
+           Wall time (Unit: s)
+       peak : float
+           Peak of the memory allocated during the call (Unit: MB), numpy and pandas buffers included'''
+    if not trace_memory:
+        start=time.perf_counter()
+        result=function(*args,**kwargs)
+        return result,time.perf_counter()-start,np.nan
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start=time.perf_counter()
+    try:
+        result=function(*args,**kwargs)
+    finally:
+        seconds=time.perf_counter()-start
+        peak=tracemalloc.get_traced_memory()[1]/1e6
+        tracemalloc.stop()
+    return result,seconds,peak
+
+
+def accuracy(experiment,df_truth):
+    '''Compare the entropy profiles of an experiment with the embedded ground truth of its channel
+
+       Return
+       -------
+       df: dataFrame
+           One row per method (1-4, 5: bestfit, 6: raw data): RMSE and maximum absolute error (Unit: J.mol-1.K-1)'''
+    truth=df_truth[df_truth['Channel']==experiment.channel.name]['Entropy [J mol-1 K-1]'].values
+    rows=[]
+    for method,column in ENTROPY_COLUMNS.items():
+        error=experiment.df_entropy_data[column].values[:len(truth)]-truth[:len(experiment.df_entropy_data)]
+        rows.append((method,np.sqrt(np.nanmean(error**2)),np.nanmax(np.abs(error))))
+    return pd.DataFrame(rows,columns=['Method','RMSE','Max error'])
+
+
+def run_benchmark(sizes=((10,10),(20,10),(20,5)),n_channels=2,experiment_type=2,Tsteps=[28,28,25,22,28],time_step=20,noise=2e-5,workdir=None,trace_memory=True,lean=False):
+    '''Time and memory-profile the entropy pipeline on synthetic Basytec files of increasing size, and check its accuracy
+
+       For each size, a file is generated with n_channels cells, then the following stages are measured: generation of the file,
+       parsing of the file, construction of one Experiment per channel (segmentation, fitting, export) and the statistics of the
+       group of experiments. The time of each Experiment is also broken down by stage of the pipeline (reading, segmentation,
+       levels, method n°1-4, MSE, entropy, export), summed over the SOCs, with the number of fit evaluations.
+
+       Parameters
+       ----------
+       sizes : tuple of (int, float)
+           (number of SOC, sampling period in s) of each benchmark file
+       n_channels : int
+           Number of channels of each file (one Experiment per channel)
+       experiment_type, Tsteps, time_step, noise :
+           Parameters of the synthetic files (see Synthetic_data.generate_basytec_file)
+       workdir : string
+           Folder of the synthetic files and of the CSV exported by Experiment, otherwise None (temporary folder)
+       trace_memory : bool
+           True: the peak memory of each stage is measured (slower), False: only the time
+       lean : bool
+           True: the experiments are built in memory-lean mode (see Experiment)
+
+       Return
+       -------
+       df_timing : dataFrame
+           One row per size and stage: number of SOC, sampling period (s), number of rows, stage, time (s), fit evaluations, peak memory (MB)
+       df_accuracy : dataFrame
+           One row per size, channel and method: RMSE and maximum error against the ground truth (Unit: J.mol-1.K-1)'''
+    temporary=tempfile.TemporaryDirectory() if workdir is None else None
+    folder=temporary.name if temporary is not None else workdir
+    os.makedirs(folder,exist_ok=True)
+    battery=Battery('Synthetic',1500,0,0,'','')
+    number_temperature_level=len(Tsteps)-2
+    timing=[]
+    accuracies=[]
+    current_dir=os.getcwd()
+    os.chdir(folder)        #Experiment exports its CSV files in the working directory
+    try:
+        for n_SOC,sampling_period in sizes:
+            path=os.path.join(folder,'synthetic_'+str(n_SOC)+'SOC_'+str(sampling_period)+'s.txt')
+            df_truth,seconds,peak=measure(Synthetic_data.generate_basytec_file,path,trace_memory=trace_memory,n_SOC=n_SOC,experiment_type=experiment_type,Tsteps=Tsteps,
+                                          time_step=time_step,sampling_period=sampling_period,noise=noise,n_channels=n_channels)
+            stages=[('generation',seconds,np.nan,peak)]
+            df,seconds,peak=measure(pd.read_csv,path,header=32,encoding='latin-1',trace_memory=trace_memory)
+            n_rows=len(df)
+            del df
+            stages.append(('parsing',seconds,np.nan,peak))
+            experiments=[]
+            for channel in Synthetic_data.synthetic_channels(n_channels):
+                recorder=Recorder()       #time only: the memory is traced by measure
+                experiment,seconds,peak=measure(Experiment,'Synthetic',experiment_type,2,battery,channel,time_step,number_temperature_level,
+                                                Tsteps[0],Tsteps,path,trace_memory=trace_memory,instrumentation=recorder,lean=lean)
+                stages.append(('Experiment '+channel.name,seconds,np.nan,peak))
+                summary=recorder.summary().drop('SOC')
+                for stage,row in summary.iterrows():
+                    stages.append(('Experiment '+channel.name+' / '+stage,row['Total time (s)'],row['Evaluations'],np.nan))
+                experiments.append(experiment)
+                df_accuracy=accuracy(experiment,df_truth)
+                df_accuracy.insert(0,'Channel',channel.name)
+                df_accuracy.insert(0,'Sampling period (s)',sampling_period)
+                df_accuracy.insert(0,'Number of SOC',n_SOC)
+                accuracies.append(df_accuracy)
+            group=Experiment_group(experiment_type,experiments)
+            result,seconds,peak=measure(group.group_statistics,5,trace_memory=trace_memory)
+            stages.append(('group statistics',seconds,np.nan,peak))
+            for stage,seconds,evaluations,peak in stages:
+                timing.append((n_SOC,sampling_period,n_rows,stage,seconds,evaluations,peak))
+    finally:
+        os.chdir(current_dir)
+        if temporary is not None:
+            temporary.cleanup()
+    df_timing=pd.DataFrame(timing,columns=['Number of SOC','Sampling period (s)','Number of rows','Stage','Time (s)','Evaluations','Peak memory (MB)'])
+    return df_timing,pd.concat(accuracies,ignore_index=True)
+
+
+if __name__=='__main__':
+    df_timing,df_accuracy=run_benchmark()
+    print(df_timing.to_string())
+    print(df_accuracy.groupby(['Number of SOC','Sampling period (s)','Method'])[['RMSE','Max error']].mean().to_string())
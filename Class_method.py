@@ -7,9 +7,1160 @@ from scipy.optimize import curve_fit
 from scipy.optimize import minimize
 from scipy import stats
 import csv
+import hashlib
+import io
+import json
 import statistics
+import warnings
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import os
+import pickle
+import queue
+import shutil
+import threading
+import tempfile
+import uuid
+from time import monotonic
+import weakref
+from Instrumentation import Instrumentation, logger
+
+###CONSTANTS
+#Columns of df_entropy_data for each method number (same numbering as the plot methods: 1-4 fitting methods, 5 bestfit, 6 raw data)
+ENTROPY_COLUMNS={1:'Entropy method n°1 [J mol-1 K-1]',2:'Entropy method n°2 [J mol-1 K-1]',3:'Entropy method n°3 [J mol-1 K-1]',
+                 4:'Entropy method n°4 [J mol-1 K-1]',5:'Bestfit Entropy [J mol-1 K-1]',6:'Rawdata Entropy [J mol-1 K-1]'}
+
+#Columns of the Basytec file read in lean mode, with their stored type (the columns of the channel are added by Experiment.read_basytec).
+#The time and voltage are kept in float64 for the fitting, the markers are stored as integer codes
+LEAN_COLUMNS={'~Time[h]':'float64','Count':'int32','Cyc-Count':'int32','I[A]':'float32','State':'int8','Ah[Ah]':'float32'}
+
+#Extension of the sidecar file of the SOC index of a Basytec file (see build_SOC_index)
+SOC_INDEX_EXTENSION='.socindex.json'
+
+###FUNCTIONS
+
+def interpolate_rows(grid,x,y):
+    '''Linear interpolation of several curves on the same grid in one vectorized operation
+
+       Parameters
+       ----------
+       grid : array (number of grid points)
+           Common abscissa
+       x : array (number of curves x number of points)
+           Abscissa of each curve, in any order, padded with NaN
+       y : array (number of curves x number of points x number of quantities)
+           Values of each curve
+
+       Return
+       -------
+       y_grid : array (number of curves x number of grid points x number of quantities)
+           Values on the grid, NaN outside the range of each curve (no extrapolation)'''
+    n_curve,n_point=x.shape
+    order=np.argsort(x,axis=1)           #the NaN are sorted at the end of each row
+    x=np.take_along_axis(x,order,axis=1)
+    y=np.take_along_axis(y,order[:,:,None],axis=1)
+    n_valid=(~np.isnan(x)).sum(axis=1)
+    x_min=np.nanmin(x)
+    span=np.nanmax(x)-x_min+1
+    #each row is shifted by row*span so that all the rows form a single sorted array (the padding repeats the last value)
+    x_filled=np.where(np.isnan(x),np.nanmax(x,axis=1,keepdims=True),x)
+    shift=np.arange(n_curve)[:,None]*span-x_min
+    idx=np.searchsorted((x_filled+shift).ravel(),(grid[None,:]+shift).ravel(),side='right').reshape(n_curve,len(grid))-1
+    row_start=np.arange(n_curve)[:,None]*n_point
+    idx=np.clip(idx,row_start,row_start+np.maximum(n_valid[:,None]-2,0))
+    x_flat=x_filled.ravel()
+    y_flat=y.reshape(n_curve*n_point,-1)
+    x0=x_flat[idx]
+    x1=x_flat[np.minimum(idx+1,n_curve*n_point-1)]
+    with np.errstate(invalid='ignore',divide='ignore'):
+        weight=np.where(x1>x0,(grid[None,:]-x0)/(x1-x0),0.0)
+    y_grid=y_flat[idx]*(1-weight[:,:,None])+y_flat[np.minimum(idx+1,n_curve*n_point-1)]*weight[:,:,None]
+    outside=(grid[None,:]<np.nanmin(x,axis=1)[:,None]) | (grid[None,:]>np.nanmax(x,axis=1)[:,None]) | (n_valid[:,None]<2)
+    y_grid[outside]=np.nan
+    return y_grid
+
+def read_basytec_file(basytec_file,setup,channel=None,lean=False,chunksize=None):
+    '''Read a Basytec file, at once or by chunks of chunksize rows (iterator of dataFrames)
+
+       Parameters
+       ----------
+       basytec_file: string
+           path of the txt file from basytec software
+       setup : int
+           The setup of the experiment ( Work station: 1 / BatLab :2)
+       channel : Channel
+           Channel of the experiment, only used in lean mode
+       lean: bool
+           True: only the columns of LEAN_COLUMNS and of the channel are read, with smaller types'''
+    header=32 if setup==2 else 12
+    if not lean:
+        return pd.read_csv(basytec_file,header=header,encoding='latin-1',chunksize=chunksize)
+    dtype=dict(LEAN_COLUMNS)
+    dtype[channel.thermo]='float32'
+    dtype[channel.OCV]='float64'
+    return pd.read_csv(basytec_file,header=header,encoding='latin-1',usecols=list(dtype),dtype=dtype,chunksize=chunksize)
+
+
+def iter_experiments(definitions,queue_size=2,**options):
+    '''Build the experiments of a batch one after the other, while a background thread already reads the files of the next ones
+
+       The loader thread reads the Basytec files in the order of the definitions and puts them in a queue of queue_size
+       dataFrames: the file of the experiment N+1 is read (disk or network I/O) while the experiment N is fitted.
+
+       Parameters
+       ----------
+       definitions : list of tuple
+           Positional parameters of each Experiment (name,experiment_type,setup,battery,channel,time_step,number_temperature_level,
+           temp_ref,Tsteps,basytec_file)
+       queue_size : int
+           Maximum number of files read in advance
+       options :
+           Keyword parameters given to every Experiment (ex: lean=True, instrumentation=...)
+
+       Return
+       -------
+       experiments : generator of Experiment'''
+    loaded=queue.Queue(maxsize=queue_size)
+    stop=threading.Event()
+
+    def loader():
+        for definition in definitions:
+            if stop.is_set():
+                return
+            try:
+                if options.get('out_of_core') or (options.get('checkpoint_dir') is not None and
+                                                  Checkpoint(checkpoint_folder(*definition,**options)).completed()):
+                    item=None              #read by chunks by the experiment itself, or finished in a previous run
+                else:
+                    item=read_basytec_file(definition[9],definition[2],definition[4],options.get('lean',False))
+            except Exception as error:      #raised again in the main thread, when the experiment is built
+                item=error
+            while not stop.is_set():
+                try:
+                    loaded.put(item,timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+    thread=threading.Thread(target=loader,name='Basytec loader',daemon=True)
+    thread.start()
+    try:
+        for definition in definitions:
+            item=loaded.get()
+            if isinstance(item,Exception):
+                raise item
+            yield Experiment(*definition,df_basytec=item,**options)
+    finally:
+        stop.set()                     #the loader thread ends even if the batch is not finished
+        thread.join()
+
+
+def build_SOC_index(basytec_file,setup,chunksize=500000,block_size=1<<24):
+    '''Index the rows and the bytes of each SOC of a Basytec file, and save the index in a sidecar file (basytec_file+SOC_INDEX_EXTENSION)
+
+       The SOCs are found as in Experiment.entropy_coefficient (a new SOC starts on each row where 'Count' and 'Cyc-Count' are
+       different) and the temperature levels on the relaxation rows where State=0. Two streaming passes are made: the marker
+       columns are read by chunks of rows, then the newlines of the file are counted by blocks of bytes to find the byte offset
+       of the first row of each SOC. The file must not contain blank lines.
+
+       Parameters
+       ----------
+       basytec_file: string
+           path of the txt file from basytec software
+       setup : int
+           The setup of the experiment ( Work station: 1 / BatLab :2)
+       chunksize : int
+           Number of rows read at once
+       block_size : int
+           Number of bytes read at once
+
+       Return
+       -------
+       index : dict
+           file_size, mtime, setup, columns (names of the columns), rows (number of rows) and SOC: list of dict with the rows
+           [first, last excluded] and bytes [first, last excluded] of each SOC, and the rows where its temperature levels start'''
+    header=32 if setup==2 else 12
+    columns=list(pd.read_csv(basytec_file,header=header,encoding='latin-1',nrows=0).columns)
+    ##Pass 1: rows of the SOC boundaries and of the temperature levels
+    boundaries=[]
+    levels=[]
+    n_rows=0
+    SOC_total=0
+    for chunk in pd.read_csv(basytec_file,header=header,encoding='latin-1',usecols=['Count','Cyc-Count','State','I[A]'],chunksize=chunksize):
+        rows=np.arange(n_rows,n_rows+len(chunk))
+        boundaries.append(rows[(chunk['Count']!=chunk['Cyc-Count']).values])
+        levels.append(rows[((chunk['State']==0) & (chunk['I[A]']==0.0)).values])
+        SOC_total=int(chunk['Count'].iloc[-1])
+        n_rows+=len(chunk)
+    boundaries=np.concatenate(boundaries)
+    levels=np.concatenate(levels)
+    SOC_end=boundaries[:SOC_total]
+    SOC_start=np.concatenate(([0],SOC_end[:-1])).astype(int)
+    ##Pass 2: byte offset of the first row of each SOC and of the row after the last SOC (line header+1+row of the file)
+    targets=np.unique(header+1+np.concatenate((SOC_start,SOC_end)))
+    offsets=np.full(len(targets),os.path.getsize(basytec_file),dtype=np.int64)
+    line=0                #number of the line starting at position
+    position=0
+    with open(basytec_file,'rb') as file:
+        while True:
+            block=file.read(block_size)
+            if not block:
+                break
+            newlines=np.flatnonzero(np.frombuffer(block,dtype=np.uint8)==10)
+            #the line line+1+k starts after the k-th newline of the block
+            found=(targets>line) & (targets<=line+len(newlines))
+            offsets[found]=position+newlines[targets[found]-line-1]+1
+            line+=len(newlines)
+            position+=len(block)
+    if line not in (header+n_rows,header+1+n_rows):          #last line with or without a newline
+        raise ValueError(basytec_file+': the rows of the file do not match its lines (blank lines?)')
+    byte=dict(zip(targets.tolist(),offsets.tolist()))
+    level_start=np.searchsorted(levels,SOC_start)
+    level_end=np.searchsorted(levels,SOC_end)
+    index={'file_size':os.path.getsize(basytec_file),'mtime':os.path.getmtime(basytec_file),'setup':setup,'columns':columns,'rows':n_rows,
+           'SOC':[{'rows':[int(start),int(end)],'bytes':[byte[header+1+start],byte[header+1+end]],'levels':levels[a:b].tolist()}
+                  for start,end,a,b in zip(SOC_start,SOC_end,level_start,level_end)]}
+    with open(basytec_file+SOC_INDEX_EXTENSION,'w') as file:
+        json.dump(index,file)
+    return index
+
+
+def load_SOC_index(basytec_file,setup):
+    '''Return the SOC index of a Basytec file from its sidecar file, built again if it is missing or older than the Basytec file'''
+    try:
+        with open(basytec_file+SOC_INDEX_EXTENSION) as file:
+            index=json.load(file)
+        if (index['file_size']==os.path.getsize(basytec_file) and index['mtime']==os.path.getmtime(basytec_file)
+                and index['setup']==setup):
+            return index
+    except (OSError,ValueError,KeyError):
+        pass
+    return build_SOC_index(basytec_file,setup)
+
+
+def read_SOC(basytec_file,setup,SOC_number,index=None):
+    '''Read only the rows of one SOC of a Basytec file, with a seek to its byte offset (see build_SOC_index)
+
+       Return
+       -------
+       SOC: dataFrame
+           All the columns of the rows of the SOC, with the row numbers of the file as index (the same labels as df_basytec)'''
+    if index is None:
+        index=load_SOC_index(basytec_file,setup)
+    entry=index['SOC'][SOC_number]
+    start,end=entry['bytes']
+    with open(basytec_file,'rb') as file:
+        file.seek(start)
+        data=file.read(end-start)
+    SOC=pd.read_csv(io.BytesIO(data),header=None,names=index['columns'],encoding='latin-1')
+    SOC.index=pd.RangeIndex(*entry['rows'])
+    return SOC
+
+
+def fit_indexed_SOC(basytec_file,setup,channel,SOC_number,number_temperature_level,index=None,**options):
+    '''Read and fit one SOC of a Basytec file through its SOC index, without reading the rest of the file
+
+       Parameters
+       ----------
+       basytec_file, setup :
+           See build_SOC_index
+       channel : Channel
+           Channel of the experiment
+       SOC_number : int
+           Number of the SOC
+       number_temperature_level: int
+           number of temperature levels in a SOC
+       index : dict
+           SOC index of the file, otherwise None (see load_SOC_index)
+       options :
+           Keyword parameters of fit_SOC (ex: budget, decimation)
+
+       Return
+       -------
+       SOC_df : dataFrame
+           Relaxation part of the SOC with the estimated volt curves and delta_E of each method (as in Experiment.SOC_relax_list)
+       result : dict
+           Result of fit_SOC'''
+    if index is None:
+        index=load_SOC_index(basytec_file,setup)
+    SOC=read_SOC(basytec_file,setup,SOC_number,index)
+    SOC['Agilent(V)']=SOC[channel.OCV]/1000 if setup==1 else SOC[channel.OCV]      #conversion mV to V, °C to kelvin
+    SOC['Temperature(K)']=SOC[channel.thermo]+273
+    SOC_df=SOC[SOC['I[A]'] == 0.0 ].copy()   #keep the relaxation part when current=0 A
+    level_index=SOC_df.index.get_indexer(index['SOC'][SOC_number]['levels'])
+    result=fit_SOC(SOC_df['~Time[h]'].values,SOC_df['Agilent(V)'].values,SOC_df['Temperature(K)'].values,level_index,
+                   number_temperature_level,SOC_number,**options)
+    add_estimation_columns(SOC_df,result['coefficients'])
+    return SOC_df,result
+
+
+def plot_SOC(SOC,setup,channel,temp_ref,title):
+    '''Plot the potential and temperature of the rows of a SOC (see Experiment.SOC_plot)
+
+       Parameters
+       ----------
+       SOC : dataFrame
+           All the rows of the SOC, with the columns of the Basytec file
+       setup : int
+           The setup of the experiment ( Work station: 1 / BatLab :2)
+       channel : Channel
+           Channel of the experiment
+       temp_ref : float
+           Reference temperature (Unit: °C)
+       title : string
+           Title of the figure'''
+    fig, ax0 = plt.subplots()
+    ax1=ax0.twinx()
+    fig.subplots_adjust(right=0.65)
+    fig.suptitle(title)
+    ax1.set_frame_on(True)
+    ax1.patch.set_visible(False)
+    if setup==1:
+        ax0.plot(SOC['~Time[h]'],(SOC[channel.OCV])/1000,color='Blue')   #conversion from mV to V only for the setup=1 (work station)
+    else:
+        ax0.plot(SOC['~Time[h]'],SOC[channel.OCV],color='Blue')
+    ax0.set_ylabel('OCV (V)', color='Blue')
+    ax0.tick_params(axis='y', colors='Blue')
+    ax0.set_xlabel('Time (h)')
+
+    ax1.plot(SOC['~Time[h]'],SOC[channel.thermo],color='firebrick')
+    ax1.set_ylabel('Temperature (°C)', color='firebrick')
+    ax1.tick_params(axis='y', colors='firebrick')
+    ax1.set_ylim(temp_ref-10,temp_ref+2)
+    plt.legend(loc='best',prop={'size':12})
+    plt.show()
+
+
+def plot_SOC_relax_fit(SOC_df,channel,temp_ref,method,title):
+    '''Plot the OCV, fitted OCV and temperature of the relaxation part of a SOC (see Experiment.SOC_relax_fit_plot)
+
+       Parameters
+       ----------
+       SOC_df : dataFrame
+           Relaxation part of the SOC with the estimated volt curves of each method (see add_estimation_columns)
+       channel : Channel
+           Channel of the experiment
+       temp_ref : float
+           Reference temperature (Unit: °C)
+       method : int
+           All the methods 1-4: Method=0 /Method n° 1 : method=1 / Method n°2: method=2 /Method n°3: method=3 /Method n°4: method=4
+       title : string
+           Title of the figure'''
+    SOC=SOC_df.iloc[3:]
+    fig, ax0 = plt.subplots()
+    ax1=ax0.twinx()
+    fig.subplots_adjust(right=0.65)
+    fig.suptitle(title)
+    ax1.set_frame_on(True)
+    ax1.patch.set_visible(False)
+
+    ax0.plot(SOC['~Time[h]'],SOC['Agilent(V)'],color='Blue')
+    if method==0:
+        ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°1 (V)'], ls='--',color='grey',label='Method n°1')
+        ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°2 (V)'], ls='--',color='green',label='Method n°2')
+        ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°3 (V)'], ls='--',color='darkorange',label='Method n°3')
+        ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°4 (V)'], ls='--',color='darkviolet',label='Method n°4')
+    if method==1:
+        ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°1 (V)'], ls='--',color='grey',label='Method n°1')
+    if method==2:
+        ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°2 (V)'], ls='--',color='green',label='Method n°2')
+    if method==3:
+        ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°3 (V)'], ls='--',color='darkorange',label='Method n°3')
+    if method==4:
+        ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°4 (V)'], ls='--',color='darkviolet',label='Method n°4')
+    ax0.legend(loc='best',prop={'size':12})
+    ax0.set_ylabel('OCV (V)', color='Blue')
+    ax0.tick_params(axis='y', colors='Blue')
+    ax0.set_xlabel('Time (h)')
+
+    ax1.plot(SOC['~Time[h]'],SOC[channel.thermo],color='firebrick')
+    ax1.set_ylabel('Temperature (°C)', color='firebrick')
+    ax1.tick_params(axis='y', colors='firebrick')
+    ax1.set_ylim(temp_ref-10,temp_ref+2)
+    plt.show()
+
+
+def indexed_SOC_plot(basytec_file,setup,channel,SOC_number,temp_ref,title='',index=None):
+    '''Plot the potential and temperature of one SOC of a Basytec file through its SOC index, without building an Experiment
+       (see Experiment.SOC_plot). The parameters are the same as fit_indexed_SOC, temp_ref: reference temperature (Unit: °C)'''
+    plot_SOC(read_SOC(basytec_file,setup,SOC_number,index),setup,channel,temp_ref,('SOC n°'+str(SOC_number)+'  '+title).rstrip())
+
+
+def indexed_SOC_relax_fit_plot(basytec_file,setup,channel,SOC_number,number_temperature_level,temp_ref,method,title='',index=None,**options):
+    '''Fit one SOC of a Basytec file through its SOC index and plot its relaxation part with the fitted OCV, without building an
+       Experiment (see Experiment.SOC_relax_fit_plot). The parameters are the same as fit_indexed_SOC, temp_ref: reference
+       temperature (Unit: °C), method: see plot_SOC_relax_fit
+
+       Return
+       -------
+       result : dict
+           Result of fit_SOC'''
+    SOC_df,result=fit_indexed_SOC(basytec_file,setup,channel,SOC_number,number_temperature_level,index,**options)
+    plot_SOC_relax_fit(SOC_df,channel,temp_ref,method,('SOC n°'+str(SOC_number)+'  '+title).rstrip())
+    return result
+
+
+def truncate_levels(level_index,n_rows,fraction):
+    '''Keep only the first fraction of the rows of each temperature step of a SOC, as if the steps were shorter
+
+       Parameters
+       ----------
+       level_index : array
+           Positions of the rows where the temperature steps start in the relaxation of the SOC
+       n_rows : int
+           Number of rows of the relaxation of the SOC
+       fraction : float
+           Fraction of each step kept, between 0 and 1 (a larger fraction keeps the whole steps: the rows of the next step are
+           never taken)
+
+       Return
+       -------
+       rows : array
+           Positions of the rows kept (the rows before the first step are all kept)
+       truncated_index : array
+           Positions of the starts of the steps in the truncated arrays'''
+    fraction=min(fraction,1.0)
+    bounds=np.append(level_index,n_rows)
+    rows=[np.arange(bounds[0])]
+    truncated_index=[]
+    count=bounds[0]
+    for k in range(len(level_index)):
+        kept=max(int(fraction*(bounds[k+1]-bounds[k])),1)
+        truncated_index.append(count)
+        rows.append(np.arange(bounds[k],bounds[k]+kept))
+        count+=kept
+    return np.concatenate(rows),np.array(truncated_index,dtype=int)
+
+
+#Digest of the files already hashed, by (path, size, modification time), and experiments already built, by interning key
+#(see Experiment.shared). An experiment is forgotten when it is not used anymore
+_DIGESTS={}
+_EXPERIMENTS=weakref.WeakValueDictionary()
+_EXPERIMENTS_LOCK=threading.Lock()
+_BUILDING={}          #interning key: lock of the thread building the experiment (the other threads wait for it)
+
+
+def file_digest(path,block_size=1<<24):
+    '''Return the SHA-1 digest of the content of a file; it is computed again only if the size or the modification time of the file change'''
+    stat=os.stat(path)
+    key=(os.path.abspath(path),stat.st_size,stat.st_mtime_ns)
+    if key not in _DIGESTS:
+        digest=hashlib.sha1()
+        with open(path,'rb') as file:
+            for block in iter(lambda: file.read(block_size),b''):
+                digest.update(block)
+        _DIGESTS[key]=digest.hexdigest()
+    return _DIGESTS[key]
+
+
+def experiment_key(name,experiment_type,setup,battery,channel,time_step,number_temperature_level,temp_ref,Tsteps,basytec_file,**options):
+    '''Interning key of an Experiment: digest of the content of its file and its parameters
+
+       The battery is identified by its name and the channel by its columns. The options are compared by value when they are
+       numbers, strings or None, and by identity otherwise (ex: two Fit_budget objects with the same limits give different keys).'''
+    option_key=tuple(sorted((key,value if value is None or isinstance(value,(bool,int,float,str)) else id(value)) for key,value in options.items()))
+    return (file_digest(basytec_file),name,experiment_type,setup,battery.name,(channel.name,channel.thermo,channel.OCV),time_step,
+            number_temperature_level,temp_ref,tuple(Tsteps),option_key)
+
+
+def atomic_dump(obj,path):
+    '''Pickle an object in a file atomically: it is written in a temporary file of the same folder, then renamed, so that an
+       interruption leaves the previous file or no file, never a partial one'''
+    temporary=path+'.'+uuid.uuid4().hex+'.tmp'
+    try:
+        with open(temporary,'wb') as file:
+            pickle.dump(obj,file,protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary,path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def checkpoint_folder(name,experiment_type,setup,battery,channel,time_step,number_temperature_level,temp_ref,Tsteps,basytec_file,*,checkpoint_dir,**options):
+    '''Folder of the checkpoints of an experiment in checkpoint_dir, named after the content of its file and the parameters which
+       change its results (the other options, ex: max_workers, are not taken into account)'''
+    budget=options.get('budget') or Fit_budget()
+    selector=options.get('selector')
+    key=(file_digest(basytec_file),name,experiment_type,setup,battery.name,(channel.name,channel.thermo,channel.OCV),time_step,
+         number_temperature_level,temp_ref,tuple(Tsteps),options.get('lean',False),options.get('step_detection','state'),options.get('decimation'),
+         (budget.fit_evaluations,budget.fit_time,budget.experiment_evaluations,budget.experiment_time),
+         None if selector is None else (selector.window,selector.threshold,selector.recheck))
+    return os.path.join(checkpoint_dir,hashlib.sha1(repr(key).encode()).hexdigest()[:20])
+
+
+class Checkpoint:
+    '''Checkpoints of an experiment, written atomically in a folder (see atomic_dump): one file per SOC, written as soon as the
+       SOC is fitted, and one file when the experiment is finished
+
+    Attributes
+    ----------
+    folder : string
+        Folder of the checkpoint files'''
+
+    def __init__(self,folder):
+        os.makedirs(folder,exist_ok=True)
+        self.folder=folder
+
+    def path(self,name):
+        return os.path.join(self.folder,name+'.pkl')
+
+    def load(self,name):
+        '''Return the object of a checkpoint, None if it does not exist'''
+        try:
+            with open(self.path(name),'rb') as file:
+                return pickle.load(file)
+        except (OSError,EOFError,pickle.UnpicklingError):
+            return None
+
+    def save(self,name,obj):
+        atomic_dump(obj,self.path(name))
+
+    def completed(self):
+        '''Return True if the experiment is finished'''
+        return os.path.exists(self.path('experiment'))
+
+
+def detect_temperature_steps(time,temperature,SOC_start,Tsteps,time_step,tolerance=0.25):
+    '''Find the start of the temperature steps of all the SOCs from the thermocouple signal, in one vectorized pass
+
+       The steps are expected every time_step from the start of the relaxation of each SOC. Around each expected change of set
+       point (ex: 28->25 °C), the first row out of the noise band of the previous temperature is found, and the onset of the change
+       is extrapolated back from the slope of the following rows. The time origin of the SOC is the mean offset of the onsets, and the starts of all the steps, including those without
+       change of set point, follow every time_step.
+
+       Parameters
+       ----------
+       time : array
+           Time of the relaxation rows of all the SOCs, one SOC after the other (Unit: h)
+       temperature : array
+           Temperature of the rows (Unit: K or °C)
+       SOC_start : array
+           Position of the first row of each SOC in the arrays, and total number of rows at the end (number of SOC + 1)
+       Tsteps : list
+           Temperature of the different steps (ex: [28,28,25,22,28])
+       time_step : float
+           time of a temperature step (Unit: min)
+       tolerance : float
+           Maximum distance between a detected onset and the expected profile, and maximum relative error of the amplitude of a
+           change (Unit: fraction of time_step / of the change of set point)
+
+       Return
+       -------
+       positions : array (number of SOC x number of steps)
+           Position of the first row of each step in the arrays
+       valid : array of bool (number of SOC)
+           False when the signal of the SOC does not match the expected profile (missing or shifted change, wrong amplitude)'''
+    time=np.asarray(time,dtype=float)
+    temperature=np.asarray(temperature,dtype=float)
+    SOC_start=np.asarray(SOC_start)
+    n_SOC=len(SOC_start)-1
+    n_steps=len(Tsteps)
+    ts=time_step/60
+    change=np.diff(np.asarray(Tsteps,dtype=float),prepend=Tsteps[0])      #change of set point at the start of each step
+    steps_changed=np.flatnonzero(change!=0)
+    SOC_of_row=np.repeat(np.arange(n_SOC),np.diff(SOC_start))
+    t_SOC=time-time[SOC_start[:-1]][SOC_of_row]          #time since the start of the relaxation of the SOC
+
+    #window of each change: within half a step of its expected time (rows sorted by SOC then step, so the windows are contiguous)
+    step_of_row=np.rint(t_SOC/ts).astype(int)
+    rows=np.flatnonzero(np.isin(step_of_row,steps_changed))
+    onset=np.full((n_SOC,n_steps),np.nan)
+    amplitude_ok=np.zeros((n_SOC,n_steps),dtype=bool)
+    if len(rows)>0:
+        window=SOC_of_row[rows]*n_steps+step_of_row[rows]
+        starts=np.flatnonzero(np.diff(window,prepend=-1))
+        ends=np.append(starts[1:],len(rows))
+        window_of_row=np.repeat(np.arange(len(starts)),ends-starts)
+        #noise of the thermocouple, from the differences between consecutive rows (most of the rows are on a stable step)
+        same_SOC=SOC_of_row[1:]==SOC_of_row[:-1]
+        noise=1.4826*np.median(np.abs(np.diff(temperature)[same_SOC]))/np.sqrt(2) if same_SOC.any() else 0.0
+        #temperature before the change: mean of the first quarter of the window
+        cumulative=np.concatenate(([0],np.cumsum(temperature)))
+        quarter=np.maximum((ends-starts)//4,1)
+        T_before=(cumulative[rows[starts]+quarter]-cumulative[rows[starts]])/quarter
+        T_after=temperature[rows[ends-1]]
+        #onset: the first row out of the noise band around T_before and the row two rows later give the line extrapolated back to T_before
+        leaving=np.abs(temperature[rows]-T_before[window_of_row])>max(5*noise,1e-3*np.abs(change).max())
+        leaving&=np.arange(len(rows))>=(starts+quarter)[window_of_row]
+        window_left,first=np.unique(window_of_row[leaving],return_index=True)
+        first_row=rows[np.flatnonzero(leaving)[first]]
+        next_row=np.minimum(first_row+2,rows[ends[window_left]-1])
+        with np.errstate(invalid='ignore',divide='ignore'):
+            back=(temperature[first_row]-T_before[window_left])*(time[next_row]-time[first_row])/(temperature[next_row]-temperature[first_row])
+        back=np.where(np.isfinite(back) & (back>=0),back,time[first_row]-time[np.maximum(first_row-1,0)])
+        onset_time=t_SOC[first_row]-back
+        SOC_window,step_window=np.divmod(window[starts],n_steps)
+        onset[SOC_window[window_left],step_window[window_left]]=onset_time
+        amplitude_ok[SOC_window,step_window]=np.abs((T_after-T_before)-change[step_window])<=tolerance*np.abs(change[step_window])
+
+    #time origin of each SOC and check against the expected profile
+    offset=onset[:,steps_changed]-steps_changed*ts
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore',category=RuntimeWarning)     #SOC without any detected change: NaN
+        origin=np.nanmean(offset,axis=1)
+    valid=(len(steps_changed)>0) & np.all(np.abs(offset-origin[:,None])<=tolerance*ts,axis=1) & np.all(amplitude_ok[:,steps_changed],axis=1)
+    origin=np.where(valid,np.clip(origin,-tolerance*ts,tolerance*ts),0.0)
+
+    #nearest row of the start of each step, inside the SOC
+    expected=time[SOC_start[:-1]][:,None]+origin[:,None]+np.arange(n_steps)[None,:]*ts
+    after=np.clip(np.searchsorted(time,expected),SOC_start[:-1,None],SOC_start[1:,None]-1)
+    before=np.clip(after-1,SOC_start[:-1,None],SOC_start[1:,None]-1)
+    positions=np.where(np.abs(time[before]-expected)<np.abs(time[after]-expected),before,after)
+    return positions,valid
+
+
+def screen_SOCs(time,current,temperature,voltage,SOC_start,level_start,number_temperature_level,Tsteps,time_step,temperature_margin=10):
+    '''Check the data of all the SOCs before the fitting, with vectorized reductions over the rows
+
+       Reason codes of a rejected SOC:
+           MISSING_LEVEL: less than number_temperature_level+1 step starts, or a temperature level too short to be averaged (7 rows)
+           TRUNCATED_REST: the last step (reference temperature) lasts less than half of time_step
+           CURRENT_IN_REST: non-zero current after the start of the first level used by the fitting
+           THERMO_DROPOUT: missing temperature, or temperature more than temperature_margin away from the range of Tsteps, during the levels
+           VOLTAGE_DROPOUT: missing voltage during the levels
+
+       Parameters
+       ----------
+       time, current, temperature, voltage : array
+           Time (Unit: h), current (Unit: A), temperature (Unit: °C) and voltage (Unit: V) of all the rows of the SOCs, one SOC after the other
+       SOC_start : array
+           Position of the first row of each SOC in the arrays, and total number of rows at the end (number of SOC + 1)
+       level_start : list of array
+           Positions in the arrays of the rows starting the temperature steps of each SOC
+       number_temperature_level: int
+           number of temperature levels in a SOC
+       Tsteps : list
+           Temperature of the different steps (Unit: °C)
+       time_step: float
+           time of a temperature step (Unit: min)
+       temperature_margin : float
+           Tolerance on the temperature range (Unit: °C)
+
+       Return
+       -------
+       reasons : list of string
+           '' for a valid SOC, otherwise the reason codes separated by |'''
+    ntl=number_temperature_level
+    SOC_start=np.asarray(SOC_start)
+    n_SOC=len(SOC_start)-1
+    n_rows=SOC_start[-1]
+    rest=current==0
+    rest_count=np.concatenate(([0],np.cumsum(rest)))       #number of rest rows before each position
+    reasons=[[] for i in range(n_SOC)]
+
+    #start of the part used by the fitting (first level) of each SOC, and checks of the levels
+    fit_start=SOC_start[1:].copy()
+    for i,starts in enumerate(level_start):
+        m=len(starts)
+        if m<ntl+1:
+            reasons[i].append('MISSING_LEVEL')
+            continue
+        fit_start[i]=starts[m-ntl-1]
+        bounds=np.asarray(starts[m-ntl-1:])
+        level_rows=rest_count[bounds[1:]+1]-rest_count[bounds[:-1]]      #rest rows of each level, bounds included
+        if level_rows.min()<7:
+            reasons[i].append('MISSING_LEVEL')
+        if time[SOC_start[i+1]-1]-time[bounds[-1]]<0.5*time_step/60 or SOC_start[i+1]-bounds[-1]<2:
+            reasons[i].append('TRUNCATED_REST')
+
+    #checks of the rows of the fitted part of the SOCs, one reduction per SOC
+    SOC_of_row=np.repeat(np.arange(n_SOC),np.diff(SOC_start))
+    fitted=np.arange(n_rows)>=fit_start[SOC_of_row]
+    with np.errstate(invalid='ignore'):
+        thermo_bad=~np.isfinite(temperature) | (temperature<min(Tsteps)-temperature_margin) | (temperature>max(Tsteps)+temperature_margin)
+    checks={'CURRENT_IN_REST':~rest,'THERMO_DROPOUT':thermo_bad,'VOLTAGE_DROPOUT':~np.isfinite(voltage)}
+    for code,bad in checks.items():
+        count=np.bincount(SOC_of_row,weights=bad & fitted,minlength=n_SOC)
+        for i in np.flatnonzero(count>0):
+            reasons[i].append(code)
+    return ['|'.join(reason) for reason in reasons]
+
+
+def rejected_result(OCV_reference,number_method=4):
+    '''Result of a SOC rejected by the screening (see fit_SOC): the entropy of every method is NaN'''
+    nan=[np.nan]*number_method
+    return {'temperature_levels':[],'OCV_reference':OCV_reference,'entropy_rawdata':np.nan,'bestfit_method':np.nan,'fit_points':0,
+            'coefficients':[np.full(2,np.nan),np.full(3,np.nan),np.full(3,np.nan),np.full(3,np.nan)],'evaluations':[0]*number_method,
+            'status':['REJECTED']*number_method,'MSE':nan,'entropy':nan,'error':nan,'enthalpy':nan}
+
+
+def relaxation_model(method,coefficients,time):
+    '''Voltage of the relaxation estimated by a fitting method, as if there was no temperature change
+
+       Parameters
+       ----------
+       method : int
+           Method n°1: y = a + b*ln(x) / n°2: y = a*exp(-b*x) + c / n°3: y = a* (ln(x))² + b*ln(x) + c / n°4: y = (a*x)/(b+x) + c
+       coefficients : array
+           Coefficients of the method (polynomial coefficients for the methods n°1 and 3, a, b, c for the methods n°2 and 4)
+       time : array
+           Time (Unit: h)'''
+    if method==1 or method==3:
+        return np.polyval(coefficients,np.log(time))
+    a,b,c=coefficients
+    if method==2:
+        return a*np.exp(-b*time)+c
+    return (a*time)/(b+time) +c
+
+
+class Fit_budget:
+    '''Limits of the number of evaluations and of the time of the nonlinear fits (methods n°2 and 4) of an experiment
+
+       When a limit is reached, the fit stops and the method is marked as failed for the SOC (status MAXFEV or TIMEOUT), and
+       once the budget of the experiment is spent the next nonlinear fits are not run (status SKIPPED). The failed methods are
+       excluded from the best fit.
+
+    Attributes
+    ----------
+    fit_evaluations : int
+        Maximum number of evaluations of a fit (maxfev of curve_fit)
+    fit_time : float
+        Maximum time of a fit, otherwise None (Unit: s)
+    experiment_evaluations : int
+        Maximum number of evaluations of all the fits of the experiment, otherwise None
+    experiment_time : float
+        Maximum time of all the fits of the experiment, otherwise None (Unit: s)
+    evaluations : int
+        Evaluations spent since the start of the experiment
+    deadline : float
+        End of the time budget of the experiment (time.monotonic), otherwise None'''
+
+    def __init__(self,fit_evaluations=800000,fit_time=None,experiment_evaluations=None,experiment_time=None):
+        self.fit_evaluations=fit_evaluations
+        self.fit_time=fit_time
+        self.experiment_evaluations=experiment_evaluations
+        self.experiment_time=experiment_time
+        self.evaluations=0
+        self.deadline=None
+
+    def start(self):
+        '''Start the budget of the experiment'''
+        self.evaluations=0
+        self.deadline=None if self.experiment_time is None else monotonic()+self.experiment_time
+
+    def limits(self):
+        '''Return the maximum number of evaluations and the deadline (time.monotonic, None: no limit) of the next fit'''
+        maxfev=self.fit_evaluations
+        if self.experiment_evaluations is not None:
+            maxfev=min(maxfev,self.experiment_evaluations-self.evaluations)
+        deadline=self.deadline
+        if self.fit_time is not None:
+            deadline=monotonic()+self.fit_time if deadline is None else min(deadline,monotonic()+self.fit_time)
+        return maxfev,deadline
+
+    def spend(self,evaluations):
+        self.evaluations+=evaluations
+
+    def share(self,number_of_SOC):
+        '''Budget given to the worker process of one SOC: the evaluations of the experiment are divided evenly between the SOCs'''
+        budget=Fit_budget(self.fit_evaluations,self.fit_time,None,None)
+        if self.experiment_evaluations is not None:
+            budget.experiment_evaluations=(self.experiment_evaluations-self.evaluations)//max(number_of_SOC,1)
+        budget.deadline=self.deadline
+        return budget
+
+
+class Method_selector:
+    '''Cost-aware selection of the nonlinear fits (methods n°2 and 4) of the SOCs of an experiment fitted one after the other
+
+       The polynomial fits (methods n°1 and 3) are made first. On the SOCs where a nonlinear method is fitted, the ratios between
+       its MSE and the MSE of each polynomial method are recorded (the MSE of neighbouring SOCs follow each other closely). For the
+       next SOC, the lowest ratio of the last window SOCs times the MSE of the polynomial method gives an optimistic estimate of
+       the MSE of the nonlinear method: when this estimate is above threshold times the best polynomial MSE, the method cannot
+       win and is not fitted (status PRUNED). A method is fitted again after recheck pruned SOCs, to update its ratios. The best
+       fit is chosen among the fitted methods, so it can differ from the exhaustive selection (selector=None) if an estimate fails.
+
+    Attributes
+    ----------
+    window : int
+        Number of the last fitted SOCs whose ratios are used
+    threshold : float
+        Margin between the estimated MSE of a nonlinear method and the best polynomial MSE above which it is pruned
+    recheck : int
+        Number of SOCs a method is pruned before it is fitted again
+    history : dict
+        For each nonlinear method, ratios of its MSE to the MSE of the methods n°1 and 3 on the last fitted SOCs
+    pruned : dict
+        Number of SOCs each nonlinear method has been pruned since it was last fitted'''
+
+    def __init__(self,window=3,threshold=1.2,recheck=10):
+        self.window=window
+        self.threshold=threshold
+        self.recheck=recheck
+        self.start()
+
+    def start(self):
+        '''Forget the history (start of an experiment)'''
+        self.history={2:[],4:[]}
+        self.pruned={2:0,4:0}
+
+    def skip(self,method,polynomial_MSE):
+        '''Return True if the nonlinear method cannot be the best fit of the SOC
+
+           Parameters
+           ----------
+           method : int
+               Method n°2 or 4
+           polynomial_MSE : list of float
+               MSE of the methods n°1 and 3 for the SOC'''
+        ratios=np.array(self.history[method][-self.window:]).reshape(-1,2)
+        polynomial_MSE=np.asarray(polynomial_MSE,dtype=float)
+        if len(ratios)<self.window or not np.isfinite(polynomial_MSE).all() or self.pruned[method]>=self.recheck:
+            self.pruned[method]=0
+            return False
+        estimate=np.min(ratios.min(axis=0)*polynomial_MSE)
+        if estimate>self.threshold*polynomial_MSE.min():
+            self.pruned[method]+=1
+            return True
+        self.pruned[method]=0
+        return False
+
+    def update(self,MSE,status):
+        '''Record the ratios of MSE of the fitted nonlinear methods of a SOC (see fit_SOC)'''
+        polynomial_MSE=np.array([MSE[0],MSE[2]],dtype=float)
+        if not (np.isfinite(polynomial_MSE).all() and (polynomial_MSE>0).all()):
+            return
+        for method in self.history:
+            if status[method-1]=='OK':
+                self.history[method].append(MSE[method-1]/polynomial_MSE)
+            elif status[method-1]!='PRUNED':
+                self.history[method].append(np.full(2,np.inf))       #failed fit: the method can not win
+            del self.history[method][:-self.window]
+
+
+class Fit_timeout(Exception):
+    '''Raised by a fitted function when the time budget of the fit is spent'''
+
+
+class _Budgeted_function:
+    '''Function fitted by curve_fit, counting its evaluations and stopping the fit at the deadline'''
+
+    def __init__(self,function,deadline):
+        self.function=function
+        self.deadline=deadline
+        self.evaluations=0
+
+    def __call__(self,x,*parameters):
+        self.evaluations+=1
+        if self.deadline is not None and monotonic()>self.deadline:
+            raise Fit_timeout()
+        return self.function(x,*parameters)
+
+
+def log_time_bins(time,voltage,number_bins):
+    '''Resample a relaxation on log-spaced time bins, for the fitting of high-rate data
+
+       The samples of each bin are replaced by one point: the geometric mean of their times and the mean of their voltages,
+       weighted by the number of samples of the bin (empty bins are dropped). A model linear in ln(t) over a bin gives the same
+       weighted residuals as on the samples of the bin, so the fit of the bins stays close to the fit of all the samples.
+
+       Parameters
+       ----------
+       time : array
+           Time, strictly positive (Unit: h)
+       voltage : array
+           Voltage (Unit: V)
+       number_bins : int
+           Number of log-spaced bins between the first and the last time
+
+       Return
+       -------
+       time_bins, voltage_bins : array
+           Time (Unit: h) and voltage (Unit: V) of the non-empty bins
+       weights : array
+           Number of samples of each non-empty bin'''
+    log_time=np.log(time)
+    edges=np.linspace(log_time.min(),log_time.max(),number_bins+1)
+    index=np.clip(np.searchsorted(edges,log_time,side='right')-1,0,number_bins-1)
+    counts=np.bincount(index,minlength=number_bins)
+    keep=counts>0
+    weights=counts[keep]
+    time_bins=np.exp(np.bincount(index,log_time,minlength=number_bins)[keep]/weights)
+    voltage_bins=np.bincount(index,voltage,minlength=number_bins)[keep]/weights
+    return time_bins,voltage_bins,weights
+
+
+def fit_SOC(time,voltage,temperature,level_index,number_temperature_level,SOC=None,instrumentation=None,budget=None,decimation=None,
+            selector=None):
+    '''Fit the relaxation of one SOC with the 4 methods and calculate its entropy coefficients (Blocks 5.3 to 5.10 of
+       Experiment.entropy_coefficient). Only arrays are used, so that the function can run in a worker process.
+
+       Parameters
+       ----------
+       time, voltage, temperature : array
+           Time (Unit: h), voltage (Unit: V) and temperature (Unit: K) of the relaxation part of the SOC
+       level_index : array
+           Positions in the arrays of the rows where the temperature levels start (State=0)
+       number_temperature_level: int
+           number of temperature levels in a SOC
+       SOC : int
+           Number of the SOC (only for the instrumentation and the log)
+       instrumentation : Instrumentation
+           Receives the time and number of fit evaluations of each stage, otherwise None
+       budget : Fit_budget
+           Limits of the nonlinear fits, otherwise None (800000 evaluations per fit)
+       decimation : int
+           Number of log-spaced time bins the fitting data are resampled on (see log_time_bins), otherwise None (all the samples)
+       selector : Method_selector
+           Decides which nonlinear methods are fitted from the previous SOCs, otherwise None (all the methods are fitted)
+
+       Return
+       -------
+       result : dict
+           temperature_levels (Unit: K), OCV_reference (Unit: V), entropy_rawdata, bestfit_method, fit_points (number of points
+           fitted), and the lists with one value per
+           method: coefficients, evaluations, status (OK, MAXFEV, TIMEOUT, SKIPPED, PRUNED or FAILED), MSE, entropy, error, enthalpy'''
+    if instrumentation is None:
+        instrumentation=Instrumentation()
+    if budget is None:
+        budget=Fit_budget()
+    ##Block 1 : Constant and parameters
+    F= 96485.3415    #Faraday's number in J.mol-1.V-1
+    number_method=4     #number of different fitting method
+    number_parameter=[2,3,3,3]      #number of coefficients of each fitting method
+    ntl=number_temperature_level
+    m=len(level_index)
+
+    #Percentage for the fitting
+    per1=0.5          #between per1% and per2% of the time and voltage of the first part of SOC_relax where temperature=temperature_reference
+    per2=0.9
+    per3=0.50         #between per3% and 100% of the time and voltage of the last part of SOC_relax where temperature=temperature_reference
+
+    #first and last position (excluded) of each temperature level; the level k goes from the start of the step k to the start of the step k+1 (included)
+    levels=[(level_index[m-ntl+k-1],level_index[m-ntl+k]+1) for k in range(ntl)]
+
+    ##Block 5.3: Get the temperature levels, voltage levels_rawdata, delta_temperature
+    instrumentation.start('levels',SOC)
+    temperature_levels=[]
+    voltage_levels_rawdata=[]
+    for start,end in levels:
+        #gets the 90% of the total index for a specific temperature
+        idx90=int(0.9*(end-start))
+        #Mean value of the temperature and voltage around idx90 of the profiles for specific soc and temperature (6 points)
+        temperature_levels.append(temperature[start:end][idx90-6:idx90].mean())
+        voltage_levels_rawdata.append(voltage[start:end][idx90-6:idx90].mean())
+    delta_temperature=[temperature_levels[0]-temperature_levels[k] for k in range(ntl)]  #delta_temperature[k]=T_ref-T[k]  with T_ref=Temperature_levels[0]
+
+    ## Block 5.4 : Data extraction for the fitting methods
+    #   -between per1% and per2% of the time and voltage of the first part of SOC_relax where temperature=temperature_reference
+    time_first=time[level_index[m-ntl-1]:level_index[m-ntl]+1]
+    volt_first=voltage[level_index[m-ntl-1]:level_index[m-ntl]+1]
+    index_per1=int(per1*len(time_first))
+    index_per2=int(per2*len(time_first))
+    #   -between per3% and 100% of the time and voltage of the last part of SOC_relax where temperature=temperature_reference
+    time_last=time[level_index[m-1]:]
+    volt_last=voltage[level_index[m-1]:]
+    index_per3=int(per3*len(time_last))
+    #   -create the arrays used for the fitting
+    time_tofit=np.concatenate((time_first[index_per1:index_per2],time_last[index_per3:]))
+    volt_tofit=np.concatenate((volt_first[index_per1:index_per2],volt_last[index_per3:]))
+    #   -resample on log-spaced time bins, each bin weighted by its number of samples
+    fit_weight=None
+    if decimation is not None and len(time_tofit)>decimation:
+        time_tofit,volt_tofit,fit_weight=log_time_bins(time_tofit,volt_tofit,decimation)
+    instrumentation.stop()
+
+    def level_MSE(method):
+        #MSE of a method (index from 0) on the temperature levels, see Block 5.6
+        total_sum_residual=0
+        number_datapoints=0
+        for start,end in levels:
+            idx40=int(0.4*(end-start))  #index 40%
+            idx90=int(0.9*(end-start))  #index 90%
+            residual=delta_E[method][start:end][idx40:idx90]
+            total_sum_residual=total_sum_residual+(residual**2).sum()
+            number_datapoints=number_datapoints+len(residual)
+        return total_sum_residual/(number_datapoints-number_parameter[method])
+
+    ## Block 5.5 : Voltage fitting and get deltaE=voltage_rawdata-estimated volt_curve for each method
+    #the polynomial fits are made first, so that the selector can compare the nonlinear fits with them
+    coefficients=[None]*number_method
+    evaluations=[0]*number_method
+    status=[None]*number_method
+    delta_E=[None]*number_method
+    for method in (1,3,2,4):
+        instrumentation.start('method n°'+str(method),SOC)
+        nfev=1              #one linear least squares for the polynomial fits
+        method_status='OK'
+        try:
+            if method==1:            #y = a + b*ln(x)
+                coef=np.polyfit(np.log(time_tofit),volt_tofit,1,w=None if fit_weight is None else np.sqrt(fit_weight))
+            if method==3:            #y = a* (ln(x))² + b*ln(x) + c
+                coef=np.polyfit(np.log(time_tofit),volt_tofit,2,w=None if fit_weight is None else np.sqrt(fit_weight))
+            if method==2 or method==4:
+                if method==2:            #y = a*exp(-b*x) + c
+                    #a = y(1) - y(end), b = 1/tau with the settling time 2.3*tau assumed to be the last time, c = asymptote value of the function
+                    start=[volt_tofit[0]-volt_tofit[-1], 2.3/time_tofit[-1],volt_tofit[-1]]
+                else:                    #y = (a*x)/(b+x) + c
+                    #a = asymptote end of the function, b = time wherein y = a/2, c = initial value
+                    start=[volt_tofit[-1], time_tofit[0], volt_tofit[0]]
+                maxfev,deadline=budget.limits()
+                function=_Budgeted_function(lambda x,a,b,c,method=method: relaxation_model(method,(a,b,c),x),deadline)
+                try:
+                    if selector is not None and selector.skip(method,[level_MSE(0),level_MSE(2)]):
+                        method_status='PRUNED'            #lost against the polynomial fits on the previous SOCs
+                    elif maxfev<=0 or (budget.deadline is not None and monotonic()>budget.deadline):
+                        method_status='SKIPPED'           #budget of the experiment spent
+                    else:
+                        coef,cov,infodict,mesg,ier=curve_fit(function,time_tofit,volt_tofit,p0=start,maxfev=maxfev,full_output=True,
+                                                               sigma=None if fit_weight is None else 1/np.sqrt(fit_weight))
+                except Fit_timeout:
+                    method_status='TIMEOUT'
+                except RuntimeError:             #maxfev reached without convergence
+                    method_status='MAXFEV'
+                nfev=function.evaluations
+                budget.spend(nfev)
+        except (np.linalg.LinAlgError,ValueError):
+            method_status='FAILED'
+        if method_status=='OK' and not np.all(np.isfinite(coef)):
+            method_status='FAILED'
+        if method_status!='OK':
+            coef=np.full(number_parameter[method-1],np.nan)
+            if method_status=='PRUNED':
+                logger.debug('Method%d SOC%s pruned',method,SOC)
+            else:
+                logger.warning('Method%d SOC%s failed (%s)',method,SOC,method_status)
+        coefficients[method-1]=coef
+        evaluations[method-1]=nfev
+        status[method-1]=method_status
+        delta_E[method-1]=voltage-relaxation_model(method,coef,time)      #delta_E=raw data - estimated volt curve if there was no temperature change
+        instrumentation.stop(nfev)
+        logger.debug('Method%d SOC%s',method,SOC)
+
+    ##Block 5.6 : Get MSE (Mean Square error) for each method
+    #MSE=sum(residual²)/n-p with n the number of datapoints and p the number of coefficients of the method. The residuals are
+    #taken between 40% and 90% of each temperature level, where the relaxation effect is not visible
+    instrumentation.start('MSE',SOC)
+    MSE=[level_MSE(method) for method in range(number_method)]
+    if selector is not None:
+        selector.update(MSE,status)
+    logger.debug('MSE SOC%s: %s',SOC,MSE)
+    instrumentation.stop()
+
+    ##Block 5.7 to 5.9: entropy=-nF*delta_E/delta_T for each temperature level, entropy = mean(entropy_levels) and enthalpy
+    instrumentation.start('entropy',SOC)
+    entropy=[]
+    error=[]
+    enthalpy=[]
+    OCV_reference=voltage[-1]     #last voltage value of the SOC
+    for method in range(number_method):
+        #delta_E at 90% of each temperature level
+        delta_E_levels_method=[delta_E[method][start:end][int(0.9*(end-start))-6] for start,end in levels]
+        entropy_levels_method=[-F*(delta_E_levels_method[k+1]/delta_temperature[k+1]) for k in range(ntl-1)]   #entropy= -nF * delta_E/ delta_T
+        entropy.append(np.mean(np.array(entropy_levels_method)))      # S_m= mean( S_m,k)
+        error.append(np.sqrt(abs(np.std(np.array(entropy_levels_method)))**2))   #error_repetition= standart deviation of the list of entropy levels
+        enthalpy.append(entropy[method]*(temperature_levels[0]) - F*OCV_reference)   #H=S*T_ref- F *volt_ref
+        logger.debug('Entropy method n°%d SOC%s: %s',method+1,SOC,entropy[method])
+    #Raw data: linear regression V=a*T+b whith a=entropy
+    coef_linear_regression_rawdata=np.polyfit(temperature_levels,voltage_levels_rawdata,1)
+    logger.debug('Temperature_levels: %s',temperature_levels)
+
+    ## Block 5.10: Select the best fit for the SOC (minimum MSE of the methods which did not fail)
+    MSE_valid=np.where(np.array(status)=='OK',np.array(MSE),np.inf)
+    MSE_valid[np.isnan(MSE_valid)]=np.inf
+    bestfit_method=int(np.argmin(MSE_valid))+1 if np.isfinite(MSE_valid).any() else np.nan          #list indice starts at 0, and method starts at 1
+    instrumentation.stop()
+    return {'temperature_levels':temperature_levels,'OCV_reference':OCV_reference,'entropy_rawdata':F*coef_linear_regression_rawdata[0],
+            'bestfit_method':bestfit_method,'fit_points':len(time_tofit),'coefficients':coefficients,'evaluations':evaluations,'status':status,
+            'MSE':MSE,'entropy':entropy,'error':error,'enthalpy':enthalpy}
+
+
+def add_estimation_columns(SOC_df,coefficients):
+    '''Add the estimated volt curve of each method (if there was not temperature changes) and delta_E to the dataFrame of the
+       relaxation of a SOC
+
+       Parameters
+       ----------
+       SOC_df : dataFrame
+           Relaxation part of the SOC
+       coefficients : list of array
+           Coefficients of each method (see fit_SOC)'''
+    SOC_time_array=SOC_df['~Time[h]'].values
+    SOC_voltage_array=SOC_df['Agilent(V)'].values
+    for method in range(1,len(coefficients)+1):
+        volt_estimation_method_SOC=relaxation_model(method,coefficients[method-1],SOC_time_array)
+        SOC_df['Volt estimation method n°'+str(method)+' (V)']=volt_estimation_method_SOC
+        SOC_df['Delta_E method n°'+str(method)+' (V)']=SOC_voltage_array-volt_estimation_method_SOC
+
+
+class Spilled_SOC_list:
+    '''A list of dataFrames kept in files (pickle) instead of the memory, used for the SOC_relax_list of the out-of-core mode.
+       A dataFrame is read from its file each time it is accessed (the last one read is kept in memory).
+
+    Attributes
+    ----------
+    folder : string
+        Folder of the files (a temporary folder deleted with the list if None is given)
+    paths : list of string
+        File of each dataFrame'''
+
+    def __init__(self,folder=None):
+        if folder is None:
+            folder=tempfile.mkdtemp(prefix='SOC_relax_')
+            weakref.finalize(self,shutil.rmtree,folder,True)
+        else:
+            os.makedirs(folder,exist_ok=True)
+        self.folder=folder
+        self.paths=[]
+        self._last=(None,None)
+
+    def append(self,df):
+        path=os.path.join(self.folder,'SOC'+str(len(self.paths))+'_'+uuid.uuid4().hex+'.pkl')
+        df.to_pickle(path)
+        self.paths.append(path)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self,i):
+        if isinstance(i,slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        path=self.paths[i]
+        if self._last[0]!=path:
+            self._last=(path,pd.read_pickle(path))
+        return self._last[1]
+
+    def __delitem__(self,i):
+        #the files are removed with their entries, the folder does not keep the deleted dataFrames
+        for path in (self.paths[i] if isinstance(i,slice) else [self.paths[i]]):
+            os.remove(path)
+            if self._last[0]==path:
+                self._last=(None,None)
+        del self.paths[i]
+
+    def __getstate__(self):
+        #the dataFrame kept in memory is not pickled (see Checkpoint)
+        state=self.__dict__.copy()
+        state['_last']=(None,None)
+        return state
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _fit_SOC_shared(handle,start,end,level_index,number_temperature_level,SOC,budget=None,decimation=None):
+    '''Worker of Experiment.fit_SOC_parallel: fit one SOC whose arrays are read in place from the shared memory block
+
+       Parameters
+       ----------
+       handle : tuple
+           (name of the shared memory block, number of rows): the block holds the time, voltage and temperature of all the SOCs
+       start, end : int
+           Range of the rows of the SOC in the block'''
+    name,n_rows=handle
+    shared=shared_memory.SharedMemory(name=name)
+    try:
+        block=np.ndarray((3,n_rows),dtype=np.float64,buffer=shared.buf)
+        result=fit_SOC(block[0,start:end],block[1,start:end],block[2,start:end],level_index,number_temperature_level,SOC,budget=budget,decimation=decimation)
+        del block
+    finally:
+        shared.close()
+    return result
 
 ###CLASS AND METHODS
 
@@ -120,7 +1271,7 @@ class Battery:
         else:                               #basytec file
             df=pd.read_csv(self.RPT_file, header=32, encoding='latin-1')
         
-        plt.shw()
+        plt.show()
             
         
     def RPT_capacity(self):
@@ -143,6 +1294,20 @@ class Battery:
             capacity=max(df['Ah[Ah]'])-min(df['Ah[Ah]'])
         return capacity
     
+    def impedance_data(self,columns=None):
+        ''' Read the impedance file (BioLogic .mpt) of a battery
+        
+            Parameters
+            ----------
+            columns : list of string
+                Columns to read, otherwise None (all the columns)
+        
+            Returns
+            -------
+            df: dataFrame
+                Data of the impedance file'''
+        return pd.read_csv(self.impedance_file,header=104,sep='\t', encoding='latin-1',usecols=columns)
+    
     def get_impedance(self):
         ''' Get the different caracterisation resistances of a battery (high-frequences, medium-frequences, total)
         
@@ -155,7 +1320,7 @@ class Battery:
             R_t: float
                 Total resistance (Unit : mOhm)'''
                 
-        df=pd.read_csv(self.impedance_file,header=104,sep='\t', encoding='latin-1')
+        df=self.impedance_data()
         #Take off the first data and keep the accurate ones
         df2 = df[(df['Re(Z)/Ohm'] != 0.0) & (df['-Im(Z)/Ohm'] != -0.0)]
         #Find the R_hf
@@ -169,6 +1334,19 @@ class Battery:
         last_index_label=df2.index.values[len(df2)-1]
         R_t=df2.loc[last_index_label,'Re(Z)/Ohm']*1000 #the Re(Z) value of the last row (df2.tail()) 
         return R_hf,R_mf,R_t
+    
+    def get_characteristics(self):
+        ''' Get the RPT capacity and the characterisation resistances of a battery in one call
+        
+            Returns
+            -------
+            capacity: float
+                RPT capacity (Unit : Ah), NaN if there is no RPT file
+            R_hf, R_mf, R_t: float
+                High-frequences, medium-frequences and total resistances (Unit : mOhm), NaN if there is no impedance file'''
+        capacity=self.RPT_capacity() if self.RPT_file!='' else np.nan
+        R_hf,R_mf,R_t=self.get_impedance() if self.impedance_file!='' else (np.nan,np.nan,np.nan)
+        return capacity,R_hf,R_mf,R_t
         
 
 
@@ -180,10 +1358,24 @@ class Battery_group:
     battery_list : list 
        List of Battery 
     weight_list : list
-        List of the weight of the Batteries'''
+        List of the weight of the Batteries
+    max_workers : int
+        Maximum number of cell files loaded at the same time
+    executor : string
+        Pool used to load the cell files ('thread' or 'process')'''
         
-    def __init__(self, battery_list):
+    def __init__(self, battery_list,max_workers=8,executor='thread'):
+        '''Parameters
+           ----------
+            battery_list : list
+                List of Battery
+            max_workers : int
+                Maximum number of cell files loaded at the same time (1: files loaded one after the other)
+            executor : string
+                'thread' (the parsing of pandas releases the GIL, no copy of the data) or 'process' (pure python parsing) '''
         self.battery_list=battery_list
+        self.max_workers=max_workers
+        self.executor=executor
         weight_list=[]
         for i in range(len(battery_list)):
             weight_list.append(self.battery_list[i].mass)
@@ -201,11 +1393,55 @@ class Battery_group:
             Mean capacity: float
                  (Unit : Ah) '''
                  
-        disc_caps=[]
-        for i in range(len(self.battery_list)):
-            disc_caps.append(self.battery_list[i].RPT_capacity())    #get the capacity from each battery
+        disc_caps=self.map_batteries(Battery.RPT_capacity)    #get the capacity from each battery
         return (disc_caps, pd.Series(disc_caps).std(),pd.Series(disc_caps).mean())
     
+    def map_batteries(self,function,battery_list=None):
+        '''Apply a function to each battery, with at most max_workers batteries processed at the same time
+        
+            Parameters
+            ----------
+            function : callable
+                Function taking a Battery (ex: Battery.RPT_capacity). It must be picklable with executor='process'
+            battery_list : list
+                List of Battery, otherwise None (all the batteries of the group)
+            
+            Returns
+            -------
+            results: list
+                Result of the function for each battery, in the order of the list'''
+        if battery_list is None:
+            battery_list=self.battery_list
+        if self.max_workers==1 or len(battery_list)<=1:
+            return [function(battery) for battery in battery_list]
+        pool=ProcessPoolExecutor if self.executor=='process' else ThreadPoolExecutor
+        with pool(max_workers=min(self.max_workers,len(battery_list))) as executor:
+            return list(executor.map(function,battery_list))
+    
+    def group_table(self):
+        '''Get the RPT capacity and the resistances of each cell, the cell files being loaded concurrently
+        
+            Returns
+            -------
+            df: dataFrame
+                One row per cell: Cell, Mass (g), Hioki R, Capacity (Ah), EIS Rhf, EIS Rmf, EIS Rt (Unit: mOhm). 
+                The values are NaN when the cell has no RPT or impedance file'''
+        rows=self.map_batteries(Battery.get_characteristics)
+        df=pd.DataFrame(rows,columns=['Capacity (Ah)','EIS Rhf','EIS Rmf','EIS Rt'])
+        df.insert(0,'Cell',[battery.name for battery in self.battery_list])
+        df.insert(1,'Mass (g)',self.weight_list)
+        df.insert(2,'Hioki R',[battery.Hioki_R for battery in self.battery_list])
+        return df
+    
+    def group_statistics(self):
+        '''Get the mean, standard deviation, minimum and maximum of the capacity, mass and resistances of the group
+        
+            Returns
+            -------
+            df: dataFrame
+                One row per statistic (mean, std, min, max), one column per quantity of group_table'''
+        return self.group_table().drop(columns='Cell').agg(['mean','std','min','max'])
+    
 
     def Discharge_cap_plot(self):
         '''Display the discharge capacity of the cells list on an histogram with the standard deviation margin and the mean value '''
@@ -246,22 +1482,15 @@ class Battery_group:
         
     def get_mean_impedance(self):
         ''' Get the mean resistances (R_hf, R_mf,R_t) from a set of Battery '''
-        R_hf_list=[]
-        R_mf_list=[]
-        R_t_list=[]
-        for i in range(len(self.battery_list)):
-            R_hf,R_mf,R_t=self.battery_list[i].get_impedance()
-            R_hf_list.append(R_hf)   
-            R_mf_list.append(R_mf)
-            R_t_list.append(R_t)
-        return pd.Series(R_hf_list).mean(), pd.Series(R_mf_list).mean(), pd.Series(R_t_list).mean()
+        resistances=pd.DataFrame(self.map_batteries(Battery.get_impedance),columns=['R_hf','R_mf','R_t'])
+        return resistances['R_hf'].mean(), resistances['R_mf'].mean(), resistances['R_t'].mean()
     
     def Nyquist_impedance_plot(self):
         '''Display the Nyquist diagram from a set of battery'''
-        R_hf_mean,R_mf_mean,R_t_mean= self.get_mean_impedance()
+        df_list=self.map_batteries(Battery.impedance_data)
         fig,ax=plt.subplots()
         for i in range(len(self.battery_list)):
-            df=pd.read_csv(self.battery_list[i].impedance_file,header=104,sep='\t', encoding='latin-1')
+            df=df_list[i]
             lab=self.battery_list[i].name
             #Take off the first data and keep the accurate ones
             df2 = df[(df['Re(Z)/Ohm'] > 0.02) & (df['-Im(Z)/Ohm'] > -0.005)]
@@ -276,24 +1505,9 @@ class Battery_group:
         
     def comparaison_impedance_plot(self):
         '''Display the different resistance (R_hf,R_mf, R_t) from a set of Battery in a bar plot'''
-        R_hf_mean,R_mf_mean,R_t_mean= self.get_mean_impedance()
-        Hioki_R_list=[]
-        R_hf_list=[]
-        R_mf_list=[]
-        R_t_list=[]
-        cell_name_list=[]
-        for i in range(len(self.battery_list)):
-            R_hf,R_mf,R_t=self.battery_list[i].get_impedance()
-            R_hf_list.append(R_hf)
-            Hioki_R_list.append(self.battery_list[i].Hioki_R)
-            R_mf_list.append(R_mf)
-            R_t_list.append(R_t)
-            cell_name_list.append(self.battery_list[i].name)
-        df=pd.DataFrame(cell_name_list,columns=['Cell'])
-        df['Hioki R']=pd.Series(Hioki_R_list)
-        df['EIS Rhf']=pd.Series(R_hf_list)
-        df['EIS Rmf']=pd.Series(R_mf_list)
-        df['EIS Rt']=pd.Series(R_t_list)
+        df=pd.DataFrame(self.map_batteries(Battery.get_impedance),columns=['EIS Rhf','EIS Rmf','EIS Rt'])
+        df.insert(0,'Cell',[battery.name for battery in self.battery_list])
+        df.insert(1,'Hioki R',[battery.Hioki_R for battery in self.battery_list])
         df.plot(x='Cell' , y=['Hioki R','EIS Rhf','EIS Rmf','EIS Rt'], kind = 'bar', grid=False)
         plt.ylabel('Resistance (mOhm)')
         plt.legend(loc='best')
@@ -371,7 +1585,32 @@ class Experiment:
     Tsteps : list 
         List of the temperature of the different steps of the entropy experiment (ex: [28,28,25,22,28])
     df_basytec : dataFrame
-        DataFrame of the Basytec file 
+        DataFrame of the Basytec file (read again from basytec_file at each access when it has been released, without being kept,
+        see release_data and raw_columns)
+    basytec_file: string
+        path of the txt file from basytec software
+    lean: bool
+        True: only the columns used by the pipeline are read, with smaller types, and df_basytec is released once the results are computed
+    max_workers: int
+        Number of worker processes fitting the SOCs, otherwise None (the SOCs are fitted one after the other in the process)
+    out_of_core: bool
+        True: the file is processed by chunks of chunksize rows and the relaxation data are spilled to spill_dir (see entropy_coefficient_out_of_core)
+    chunksize: int
+        Number of rows read at once in out-of-core mode
+    spill_dir: string
+        Folder of the relaxation data in out-of-core mode, otherwise None (temporary folder)
+    step_detection: string
+        'state': the temperature steps start on the rows where State=0, 'thermo': they are found on the thermocouple signal
+    budget: Fit_budget
+        Limits of the number of evaluations and of the time of the nonlinear fits
+    decimation: int
+        Number of log-spaced time bins the fitting data of each SOC are resampled on, otherwise None (all the samples)
+    selector: Method_selector
+        Cost-aware selection of the nonlinear fits, otherwise None (exhaustive: all the methods are fitted)
+    checkpoint: Checkpoint
+        Checkpoints of the SOCs and of the results, otherwise None
+    level_index_list: list of array
+        Positions of the temperature levels in the relaxation dataFrame of each SOC (None for a rejected SOC)
     title: str
         Title of the experiment (ex: Entropy Charge_LFP02 (20min_28C) )
     SOC_relax_list : list of dataFrame
@@ -379,9 +1618,16 @@ class Experiment:
         voltage difference between the estimation and the raw data
     df_entropy_data: dataFrame
         DataFrame containing all the data from the entropy profiling (Capacity, voltage reference, best fitting method, entropy coefficient etc)
+    results_version: int
+        Number of assignments of df_entropy_data, the views of the results cached elsewhere are computed again when it changes
+        (see Experiment_group.SOC_grid_profiles)
+    instrumentation: Instrumentation
+        Receives the time, number of fit evaluations and progress of each stage of the entropy pipeline (ex: Instrumentation.Recorder)
     '''
         
-    def __init__(self,name,experiment_type,setup,battery,channel,time_step,number_temperature_level,temp_ref,Tsteps,basytec_file):
+    def __init__(self,name,experiment_type,setup,battery,channel,time_step,number_temperature_level,temp_ref,Tsteps,basytec_file,instrumentation=None,lean=False,max_workers=None,
+                 out_of_core=False,chunksize=500000,spill_dir=None,df_basytec=None,step_detection='state',
+                 budget=None,decimation=None,selector=None,checkpoint_dir=None):
         '''Parameters
            ----------
             name : string
@@ -403,7 +1649,41 @@ class Experiment:
             Tsteps : list 
                 List of the temperature of the different steps of the entropy experiment (ex: [28,28,25,22,28])
             basytec_file: string
-                path of the txt file from basytec software'''
+                path of the txt file from basytec software
+            instrumentation: Instrumentation
+                Receives the time, number of fit evaluations and progress of each stage, otherwise None (nothing recorded)
+            lean: bool
+                True: memory-lean mode, only the columns of the channel and of the segmentation are read (temperature, current and
+                capacity in float32, markers in integers) and df_basytec is released once the results are computed
+            max_workers: int
+                Number of worker processes fitting the SOCs (see fit_SOC_parallel), otherwise None (no worker process)
+            out_of_core: bool
+                True: the file is never loaded at once, it is processed by chunks of chunksize rows aligned on the SOCs and the
+                relaxation data are spilled to spill_dir (for the files larger than the memory)
+            chunksize: int
+                Number of rows read at once in out-of-core mode
+            spill_dir: string
+                Folder of the relaxation data in out-of-core mode, otherwise None (temporary folder deleted with the experiment)
+            df_basytec: dataFrame
+                Content of basytec_file when it is already read (see iter_experiments), otherwise None (the file is read)
+            step_detection: string
+                'state': the temperature steps start on the rows where State=0, 'thermo': they are found on the thermocouple signal and
+                checked against Tsteps (see detect_temperature_steps), for the files with extra state transitions
+            budget: Fit_budget
+                Limits of the evaluations and time of each nonlinear fit and of the experiment, otherwise None (800000 evaluations
+                per fit). A fit which reaches a limit is marked as failed for its SOC and excluded from the best fit
+            decimation: int
+                Number of log-spaced time bins the fitting data of each SOC are resampled on, with bin-averaged voltages weighted by
+                the number of samples (see log_time_bins), otherwise None (all the samples are fitted). For high-rate data, a few
+                hundred bins keep the fit accurate (see decimation_report)
+            selector: Method_selector
+                Skips the nonlinear fits which lost against the polynomial fits on the previous SOCs, otherwise None (exhaustive
+                selection, all the methods are fitted). The SOCs fitted in worker processes (max_workers) are fitted exhaustively
+            checkpoint_dir: string
+                Folder of the checkpoints, otherwise None (no checkpoint). The result of each SOC is saved as soon as it is fitted,
+                and the results of the experiment when it is finished (see Checkpoint). When the same file is analysed again with
+                the same parameters, the finished experiment is loaded without reading the file, and an interrupted one is resumed
+                from the first SOC which was not fitted'''
                 
         self.name=name
         self.experiment_type=experiment_type     #Charge: 1/Discharge: 2
@@ -414,22 +1694,256 @@ class Experiment:
         self.number_temperature_level=number_temperature_level
         self.temp_ref=temp_ref
         self.Tsteps=Tsteps
-        if self.setup==2:
-            self.df_basytec=pd.read_csv(basytec_file, header=32, encoding='latin-1')
+        self.basytec_file=basytec_file
+        self.lean=lean
+        self.max_workers=max_workers
+        self.out_of_core=out_of_core
+        self.chunksize=chunksize
+        self.spill_dir=spill_dir
+        self.step_detection=step_detection
+        self.budget=budget if budget is not None else Fit_budget()
+        self.decimation=decimation
+        self.selector=selector
+        self.instrumentation=instrumentation if instrumentation is not None else Instrumentation()
+        self.checkpoint=None
+        state=None               #results of a finished experiment
+        if checkpoint_dir is not None:
+            self.checkpoint=Checkpoint(checkpoint_folder(name,experiment_type,setup,battery,channel,time_step,number_temperature_level,temp_ref,
+                                                         Tsteps,basytec_file,checkpoint_dir=checkpoint_dir,lean=lean,step_detection=step_detection,
+                                                         decimation=decimation,budget=self.budget,selector=selector))
+            state=self.checkpoint.load('experiment')
+            if self.out_of_core and self.spill_dir is None:
+                self.spill_dir=os.path.join(self.checkpoint.folder,'SOC_relax')     #kept with the checkpoints
+                if state is None:
+                    shutil.rmtree(self.spill_dir,ignore_errors=True)       #relaxation data of an interrupted run
+        if self.out_of_core or state is not None:
+            self.df_basytec=None                 #read again from the file only if a method needs it
+        elif df_basytec is not None:
+            self.df_basytec=df_basytec
         else:
-            self.df_basytec=pd.read_csv(basytec_file,header=12,encoding='latin-1')
+            self.instrumentation.start('reading')
+            self.df_basytec=self.read_basytec()
+            self.instrumentation.stop()
         if self.experiment_type==1:
             self.title=self.name+' Charge_'+self.battery.name+' ('+str(self.time_step)+'min_'+str(self.temp_ref)+'C)'
         else:
             self.title=self.name+' Discharge_'+self.battery.name+' ('+str(self.time_step)+'min_'+str(self.temp_ref)+'C)'
         
-        self.SOC_relax_list,self.df_entropy_data = self.entropy_coefficient()
+        if state is not None:
+            self.SOC_relax_list,self.df_entropy_data,self.level_index_list=state
+            logger.info('%s: results loaded from the checkpoints',self.title)
+        elif self.out_of_core:
+            self.SOC_relax_list,self.df_entropy_data = self.entropy_coefficient_out_of_core()
+        else:
+            self.SOC_relax_list,self.df_entropy_data = self.entropy_coefficient()
+        if self.checkpoint is not None and state is None:
+            self.checkpoint.save('experiment',(self.SOC_relax_list,self.df_entropy_data,self.level_index_list))
+        if self.lean:
+            self.release_data()
             
-        
+    @classmethod
+    def shared(cls,*definition,**options):
+        '''Build an Experiment, or return the one already built from the same file content and parameters (see experiment_key)
+
+           The definitions of the same analysis under different names share one parsed dataset and one result object: only the
+           first one reads and fits the file, also when several threads ask for it at the same time (the other threads wait for
+           it). The parameters are the same as Experiment.'''
+        key=experiment_key(*definition,**options)
+        with _EXPERIMENTS_LOCK:
+            experiment=_EXPERIMENTS.get(key)
+            if experiment is None:
+                building=_BUILDING.setdefault(key,threading.Lock())
+        if experiment is None:
+            with building:
+                with _EXPERIMENTS_LOCK:
+                    experiment=_EXPERIMENTS.get(key)           #built by another thread in the meantime
+                if experiment is None:
+                    try:
+                        experiment=cls(*definition,**options)
+                        with _EXPERIMENTS_LOCK:
+                            _EXPERIMENTS[key]=experiment
+                    finally:
+                        with _EXPERIMENTS_LOCK:
+                            _BUILDING.pop(key,None)
+                    return experiment
+        logger.info('%s: same file and parameters as an experiment already built, shared',experiment.title)
+        return experiment
+
+    @property
+    def df_basytec(self):
+        if self._df_basytec is None:        #released: read again from the file, not kept (see raw_columns for a few columns)
+            return self.read_basytec()
+        return self._df_basytec
+
+    @df_basytec.setter
+    def df_basytec(self,df):
+        self._df_basytec=df
+
+    @property
+    def df_entropy_data(self):
+        return self._df_entropy_data
+
+    @df_entropy_data.setter
+    def df_entropy_data(self,df):
+        self._df_entropy_data=df
+        self.results_version=getattr(self,'results_version',0)+1
+
+    def read_basytec(self,chunksize=None):
+        '''Read the Basytec file of the experiment (only the columns of LEAN_COLUMNS and of the channel in lean mode), at once
+           or by chunks of chunksize rows (iterator of dataFrames)'''
+        return read_basytec_file(self.basytec_file,self.setup,self.channel,self.lean,chunksize)
+
+    def release_data(self):
+        '''Release df_basytec: the results are kept, the raw data are read again from the file only if a method needs them'''
+        self._df_basytec=None
+
+    def raw_columns(self,columns):
+        '''Return some columns of the Basytec file, from df_basytec when it is in memory, otherwise read by chunks of chunksize
+           rows: only these columns are gathered and they are not kept (the file is never loaded at once)'''
+        if self._df_basytec is not None:
+            return self._df_basytec[columns]
+        return pd.concat([chunk[columns] for chunk in self.read_basytec(self.chunksize)])
+
+    def screen(self,SOC_list,SOC_temp_index_list,first_SOC=0):
+        '''Check the data of the SOCs before the fitting (see screen_SOCs)
+
+           Parameters
+           ----------
+           SOC_list : list of dataFrame
+               All the rows of each SOC
+           SOC_temp_index_list : list of array
+               Indexes of the rows starting the temperature steps of each SOC
+           first_SOC : int
+               Number of the first SOC of the list (only for the log)
+
+           Return
+           -------
+           reasons : list of string
+               '' for a valid SOC, otherwise the reason codes of the rejection separated by |'''
+        SOC_start=np.concatenate(([0],np.cumsum([len(SOC) for SOC in SOC_list]))).astype(int)
+        columns=['~Time[h]','I[A]',self.channel.thermo,'Agilent(V)']
+        time,current,temperature,voltage=[np.concatenate([SOC[column].values for SOC in SOC_list]).astype(float) for column in columns]
+        level_start=[SOC_start[i]+SOC.index.get_indexer(index) for i,(SOC,index) in enumerate(zip(SOC_list,SOC_temp_index_list))]
+        reasons=screen_SOCs(time,current,temperature,voltage,SOC_start,level_start,self.number_temperature_level,self.Tsteps,self.time_step)
+        for i,reason in enumerate(reasons):
+            if reason:
+                logger.warning('%s: SOC%d rejected (%s)',self.title,first_SOC+i,reason)
+        return reasons
+
+    def temperature_steps(self,SOC_relax_list,SOC_temp_index_list,first_SOC=0):
+        '''Indexes of the temperature steps of the SOCs found on the thermocouple signal (see detect_temperature_steps)
+
+           Parameters
+           ----------
+           SOC_relax_list : list of dataFrame
+               Relaxation part of the SOCs
+           SOC_temp_index_list : list of array
+               Indexes found with the 'State' column, kept for the SOCs whose signal does not match the expected profile
+           first_SOC : int
+               Number of the first SOC of the list (only for the log)
+
+           Return
+           -------
+           SOC_temp_index_list : list of array
+               Indexes of the rows starting the temperature steps of each SOC'''
+        lengths=[len(SOC_relax) for SOC_relax in SOC_relax_list]
+        SOC_start=np.concatenate(([0],np.cumsum(lengths))).astype(int)
+        time=np.concatenate([SOC_relax['~Time[h]'].values for SOC_relax in SOC_relax_list])
+        temperature=np.concatenate([SOC_relax[self.channel.thermo].values for SOC_relax in SOC_relax_list])
+        positions,valid=detect_temperature_steps(time,temperature,SOC_start,self.Tsteps,self.time_step)
+        index=[]
+        for i,SOC_relax in enumerate(SOC_relax_list):
+            if valid[i]:
+                index.append(SOC_relax.index.values[positions[i]-SOC_start[i]])
+            else:
+                logger.warning('%s: SOC%d, temperature steps not found on the thermocouple signal, State column used',self.title,first_SOC+i)
+                index.append(SOC_temp_index_list[i])
+        return index
+
+    def load_SOC_checkpoint(self,SOC_number):
+        '''Return the result of a SOC fitted in a previous run (see Checkpoint), None if there is no checkpoint of the SOC'''
+        if self.checkpoint is None:
+            return None
+        result=self.checkpoint.load('SOC'+str(SOC_number))
+        if result is not None:
+            #the budget and the selector go on as if the SOC was fitted in this run
+            self.budget.spend(sum(result['evaluations']))
+            if self.selector is not None:
+                self.selector.update(result['MSE'],result['status'])
+            logger.debug('SOC%d loaded from the checkpoints',SOC_number)
+        return result
+
+    def save_SOC_checkpoint(self,SOC_number,result):
+        if self.checkpoint is not None:
+            self.checkpoint.save('SOC'+str(SOC_number),result)
+
+    def fit_SOC_parallel(self,arrays,checkpoint=True,errors=(),budget=None):
+        '''Fit the SOCs in max_workers processes (see fit_SOC)
+
+           The time, voltage and temperature of all the SOCs are copied once in a shared memory block: each worker receives only
+           the name of the block and the range of rows of its SOC, and reads the arrays in place instead of receiving a pickled copy.
+
+           Parameters
+           ----------
+           arrays : list of tuple
+               (time, voltage, temperature, level_index) of each SOC, None for a SOC rejected by the screening
+           checkpoint : bool
+               True: the SOCs are loaded from and saved to the checkpoints of the experiment, False: the arrays are not the SOCs of
+               the experiment (ex: truncated steps, see step_duration_analysis)
+           errors : tuple of exception classes
+               Errors of fit_SOC for which the result of the SOC is None instead of stopping all the fits
+           budget : Fit_budget
+               Budget shared by the SOCs and spent by their fits, otherwise None (budget of the experiment)
+
+           Return
+           -------
+           results : list of dict
+               Result of fit_SOC for each SOC, in the order of the SOCs (None for the rejected SOCs)'''
+        if budget is None:
+            budget=self.budget
+        offsets=np.concatenate(([0],np.cumsum([0 if SOC_arrays is None else len(SOC_arrays[0]) for SOC_arrays in arrays]))).astype(int)
+        n_rows=int(offsets[-1])
+        shared=shared_memory.SharedMemory(create=True,size=max(3*n_rows*8,1))
+        results=[None]*len(arrays)
+        self.instrumentation.start('parallel fitting')
+        try:
+            block=np.ndarray((3,n_rows),dtype=np.float64,buffer=shared.buf)
+            for i,SOC_arrays in enumerate(arrays):
+                if SOC_arrays is not None:
+                    block[:,offsets[i]:offsets[i+1]]=SOC_arrays[:3]
+            del block
+            with ProcessPoolExecutor(self.max_workers) as executor:
+                fitted=[]
+                for i in range(len(arrays)):
+                    if arrays[i] is not None:
+                        results[i]=self.load_SOC_checkpoint(i) if checkpoint else None
+                        if results[i] is None:
+                            fitted.append(i)
+                SOC_budget=budget.share(len(fitted))
+                futures={executor.submit(_fit_SOC_shared,(shared.name,n_rows),offsets[i],offsets[i+1],arrays[i][3],self.number_temperature_level,i,SOC_budget,
+                                         self.decimation):i
+                         for i in fitted}
+                for done,future in enumerate(as_completed(futures)):
+                    self.instrumentation.progress(done+1,len(futures),self.title)
+                    try:
+                        results[futures[future]]=future.result()
+                    except errors as error:
+                        logger.debug('SOC%d not fitted: %r',futures[future],error)
+                        continue
+                    budget.spend(sum(results[futures[future]]['evaluations']))
+                    if checkpoint:
+                        self.save_SOC_checkpoint(futures[future],results[futures[future]])
+        finally:
+            shared.close()
+            shared.unlink()
+        self.instrumentation.stop(sum(sum(result['evaluations']) for result in results if result is not None))
+        return results
         
     def max_capacity(self):
         '''Return the max capacity of the battery during the experiment'''
-        return self.df_basytec['Ah[Ah]'].max()
+        if self._df_basytec is None:            #released: maximum of the chunks, the file is not loaded at once
+            return max(chunk['Ah[Ah]'].max() for chunk in self.read_basytec(self.chunksize))
+        return self._df_basytec['Ah[Ah]'].max()
 
     
     def DataFrame_T_expected(self):
@@ -443,7 +1957,11 @@ class Experiment:
         temp=[]
         time=[]
         start=0
-        cycle_count= int(self.df_basytec.loc[self.df_basytec.index.values[len(self.df_basytec)-1],'Count'])
+        df=self._df_basytec
+        if df is None:            #released: the last chunk of the file holds the last row
+            for df in self.read_basytec(self.chunksize):
+                pass
+        cycle_count= int(df.loc[df.index.values[len(df)-1],'Count'])
         for i in range(cycle_count):
             for j in range(len(self.Tsteps)):
                 temp.append(self.Tsteps[j])
@@ -474,16 +1992,18 @@ class Experiment:
         ax1.set_frame_on(True)
         ax1.patch.set_visible(False)
         
+        df=self.raw_columns(['~Time[h]',self.channel.OCV,self.channel.thermo])
         if self.setup==1:
-            ax0.plot(self.df_basytec['~Time[h]'],(self.df_basytec[self.channel.OCV])/1000,color='Blue')   #conversion from mV to V only for the setup=1 (work station)
+            ax0.plot(df['~Time[h]'],(df[self.channel.OCV])/1000,color='Blue')   #conversion from mV to V only for the setup=1 (work station)
         else:
-            ax0.plot(self.df_basytec['~Time[h]'],self.df_basytec[self.channel.OCV],color='Blue')
+            ax0.plot(df['~Time[h]'],df[self.channel.OCV],color='Blue')
         ax0.set_ylabel('OCV (V)', color='Blue')
         ax0.tick_params(axis='y', colors='Blue')
         ax0.set_xlabel('Time (h)')
         
-        ax1.plot(self.df_basytec['~Time[h]'],self.df_basytec[self.channel.thermo],color='firebrick')
-        ax1.plot(self.DataFrame_T_expected()['Time(h)'], self.DataFrame_T_expected()['Temperature'], linestyle='-', color='pink', label='Temperature expected')
+        ax1.plot(df['~Time[h]'],df[self.channel.thermo],color='firebrick')
+        df_temp=self.DataFrame_T_expected()
+        ax1.plot(df_temp['Time(h)'], df_temp['Temperature'], linestyle='-', color='pink', label='Temperature expected')
         ax1.set_ylabel('Temperature (°C)', color='firebrick')
         ax1.tick_params(axis='y', colors='firebrick')
         ax1.set_ylim(self.temp_ref-10,self.temp_ref+2)
@@ -597,15 +2117,14 @@ class Experiment:
             df_entropy_data: CSV
                 save all the data from the entropy profiling in a CSV file'''
                 
-        ##Block 1 : Constant and parameters 
-        F= 96485.3415    #Faraday's number in J.mol-1.V-1
-        n=  1              #number of exchanged electron
+        ##Block 1 : Constant and parameters (the parameters of the fitting are in fit_SOC)
         number_method=4     #number of different fitting method
         
-        #Percentage for the fitting
-        per1=0.5          #between per1% and per2% of the time and voltage of the first part of SOC_relax where temperature=temperature_reference
-        per2=0.9
-        per3=0.50         #between per3% and 100% of the time and voltage of the last part of SOC_relax where temperature=temperature_reference
+        instrumentation=self.instrumentation
+        self.budget.start()
+        if self.selector is not None:
+            self.selector.start()
+        instrumentation.start('segmentation')
         
         ##Block 2 : Conversion mV to V, °C to kelvin, for the bassytec file 
         if self.setup==1:                   #conversion from mV to V only for the setup=1 (work station)
@@ -642,348 +2161,317 @@ class Experiment:
             SOC_relax_list.append(SOC_relax)       
             SOC_temp_index=SOC_relax.loc[SOC_relax['State']==0]     #save the indexes of the different temperature levels of the SOCs
             SOC_temp_index_list.append(SOC_temp_index.index.values)
-        
-        
+        if self.step_detection=='thermo':
+            SOC_temp_index_list=self.temperature_steps(SOC_relax_list,SOC_temp_index_list)
+        instrumentation.stop()
 
-        ##Block 5 :For each SOC relax...
-        SOC_capacity=[]
-        SOC_OCV_reference=[]
-        coef_fit_method1=[]
-        coef_fit_method2=[]
-        coef_fit_method3=[]
-        coef_fit_method4=[]        
-        MSE_method1=[]
-        MSE_method2=[]
-        MSE_method3=[]
-        MSE_method4=[]
-        entropy_method1=[] 
-        entropy_method2=[]
-        entropy_method3=[]
-        entropy_method4=[] 
-        entropy_bestfit=[] 
-        entropy_rawdata=[]
-        entropy_method1_error=[] 
-        entropy_method2_error=[]
-        entropy_method3_error=[]
-        entropy_method4_error=[] 
-        bestfit_method_list=[] 
-        enthalpy_method1=[]
-        enthalpy_method2=[]
-        enthalpy_method3=[]
-        enthalpy_method4=[]
+        ##Block 4.1 : Screening of the data of the SOCs before the fitting (the rejected SOCs are not fitted)
+        instrumentation.start('screening')
+        screening=self.screen(SOC_list,SOC_temp_index_list)
+        instrumentation.stop()
+        logger.info('%s: %d SOC',self.title,len(SOC_list))
         
         
-        
-        number_of_SOC=len(SOC_relax_list)
+
+        ##Block 5 :For each SOC relax, fit the relaxation with the 4 methods and get the entropy (see fit_SOC)
+        arrays=[]
         for i in range (len(SOC_relax_list)):
-            SOC_df =SOC_relax_list[i]    
-            SOC_temp_index=SOC_temp_index_list[i]
-            
-            ## Block 5.1: Voltage reference 
-            SOC_OCV_reference.append(SOC_df.at[SOC_df.index.values[len(SOC_df)-1],'Agilent(V)']) #keep the last voltage value of the SOC
-            
+            SOC_df=SOC_relax_list[i]
+            if screening[i]:
+                arrays.append(None)            #rejected SOC
+                continue
+            level_index=SOC_df.index.get_indexer(SOC_temp_index_list[i])    #positions of the temperature levels in the SOC
+            arrays.append((SOC_df['~Time[h]'].values,SOC_df['Agilent(V)'].values,SOC_df['Temperature(K)'].values,level_index))
+        self.level_index_list=[None if SOC_arrays is None else SOC_arrays[3] for SOC_arrays in arrays]
+        number_of_SOC=len(SOC_relax_list)
+        if self.max_workers is not None and self.max_workers>1:
+            results=self.fit_SOC_parallel(arrays)
+        else:
+            results=[]
+            for i,SOC_arrays in enumerate(arrays):
+                if SOC_arrays is None:
+                    results.append(None)
+                    continue
+                result=self.load_SOC_checkpoint(i)
+                if result is None:
+                    time,voltage,temperature,level_index=SOC_arrays
+                    instrumentation.start('SOC',i)
+                    result=fit_SOC(time,voltage,temperature,level_index,self.number_temperature_level,i,instrumentation,self.budget,self.decimation,
+                                   self.selector)
+                    instrumentation.stop()
+                    self.save_SOC_checkpoint(i,result)
+                results.append(result)
+                instrumentation.progress(i+1,number_of_SOC,self.title)
+        for i in range(len(results)):
+            if results[i] is None:
+                SOC_df=SOC_relax_list[i]
+                results[i]=rejected_result(SOC_df['Agilent(V)'].values[-1] if len(SOC_df)>0 else np.nan)
+
+        SOC_capacity=[]
+        for i,result in enumerate(results):
+            SOC_df =SOC_relax_list[i]
             ##Block 5.2: Capacity reference
-            last_index_label=SOC_df.index.values[len(SOC_df)-1]
-            SOC_capacity.append(abs(SOC_df.loc[last_index_label,'Ah[Ah]']))  #keep the last capacity value of the SOC
-            
-            ##Block 5.3: Get the temperature levels, voltage levels_rawdata, delta_temperature
-            SOC_temperature=SOC_df.loc[:,'Temperature(K)']
-            SOC_voltage=SOC_df.loc[:,'Agilent(V)']
-            temperature_levels=[]
-            voltage_levels_rawdata=[]
-            delta_E_levels=[]
-            #For each temperature level
-            for k in range(self.number_temperature_level):
-                #temperature profile for specific soc and temperature
-                temp_profile= SOC_temperature.loc[SOC_temp_index[len(SOC_temp_index)-self.number_temperature_level+k-1]:SOC_temp_index[len(SOC_temp_index)-self.number_temperature_level+k]]
-                #voltage profile(raw data) for specific soc and temperature
-                volt_profile= SOC_voltage.loc[SOC_temp_index[len(SOC_temp_index)-self.number_temperature_level+k-1]:SOC_temp_index[len(SOC_temp_index)-self.number_temperature_level+k]]
-                #gets the 90% of the total index for a specific temperature
-                idx90=int(0.9*len(temp_profile))
-                #Mean value of the temperature and voltage around idx90 of the profiles for specific soc and temperature (6 points)
-                temp=temp_profile.iloc[idx90-6:idx90].mean()
-                volt=volt_profile.iloc[idx90-6:idx90].mean()
-    
-                temperature_levels.append(temp)  
-                voltage_levels_rawdata.append(volt)
-                
-             #Delta_temperature 
-            delta_temperature=[]
-            for k in range(self.number_temperature_level):
-                delta_temperature.append(temperature_levels[0]-temperature_levels[k])  #delta_temperature[k]=T_ref-T[k]  with T_ref=Temperature_levels[0]
-            
-            
-            ## Block 5.4 : Data extraction for the fitting methods
-            #   -Time of the full SOC: SOC_time
-            SOC_time= SOC_df.loc[:,'~Time[h]']
-            SOC_time_array=SOC_time.values   #converts in array to use the fitting tools of python
-            
-            #   -Voltage of the full SOC  : SOC_voltage
-            SOC_voltage=SOC_df.loc[:,'Agilent(V)']
-            SOC_voltage_array=SOC_voltage.values  #converts in array to use the fiiting tools of python
-            
-            #   -between per1% and per2% of the time and voltage of the first part of SOC_relax where temperature=temperature_reference
-            time_first=SOC_time.loc[SOC_temp_index[len(SOC_temp_index)-self.number_temperature_level-1] : SOC_temp_index[len(SOC_temp_index)-self.number_temperature_level]]
-            volt_first=SOC_voltage.loc[SOC_temp_index[len(SOC_temp_index)-self.number_temperature_level-1] : SOC_temp_index[len(SOC_temp_index)-self.number_temperature_level]]
-            index_per1=int(per1*len(time_first))
-            index_per2=int(per2*len(time_first))
-            time_first_cut=time_first.iloc[index_per1:index_per2].values   #keep between per1 and per2 and converts in array to use the fiiting tools of python
-            volt_first_cut=volt_first.iloc[index_per1:index_per2].values     #keep between per1 and per2 and converts in array to use the fiiting tools of python
-            
-             #   -between per3% and 100% of the time and voltage of the last part of SOC_relax where temperature=temperature_reference
-            time_last=SOC_time.loc[SOC_temp_index[len(SOC_temp_index)-1]:]
-            volt_last=SOC_voltage.loc[SOC_temp_index[len(SOC_temp_index)-1]:]
-            index_per3=int(per3*len(time_last))
-            time_last_cut=time_last.iloc[index_per3:].values     #keep between per3 and 100% and converts in array to use the fiiting tools of python
-            volt_last_cut=volt_last.iloc[index_per3:].values    #keep between per3 and 100% and converts in array to use the fiiting tools of python
-            
-            #   -create the arrays used for the fitting 
-            time_tofit=np.concatenate((time_first_cut,time_last_cut))   #time first ant time last concatenated to create one array
-            volt_tofit=np.concatenate((volt_first_cut,volt_last_cut))   #volt first ant volt last concatenated to create one array
-            
-            
-            
-            ## Block 5.5 : Voltage fitting and get deltaE=voltage_rawdata-estimated volt_curve for each method
-            for method in range(number_method):
-                #Method 1:  y = a + b*ln(x)
-                if method==0:
-                    
-                    coef_method1_SOC,cov_method=np.polyfit(np.log(time_tofit),volt_tofit,1,cov=True)
-                    coef_fit_method1.append(coef_method1_SOC)       #save the coefficient of the function in the list coef_method1_SOC
-                    
-                    volt_estimation_method_SOC=np.polyval(coef_method1_SOC,np.log(SOC_time_array))  #create the estimated volt curve if there was not temperature changes 
-                    SOC_df['Volt estimation method n°1 (V)']=volt_estimation_method_SOC             #add estimated volt_curve in the dataframe of the SOC_relax n°i
-                    SOC_df['Delta_E method n°1 (V)']=SOC_voltage_array-volt_estimation_method_SOC   #add delta_E in the dataframe of the SOC_relax n°i
-                    
-                    
-                    print('Method1 SOC'+str(i))
-                    
-                #Method 2:  y = a*exp(-b*x) + c
-                #a = y(1) - y(end), since at t=0 y=C-A and the exponential is assumed to be negative exponent
-                #b = by definition of settling time 2.3*tau, B is assumed to be 1/tau and the settling time is assumed to be the last time coefficient
-                #c = asymptote value of the function
-                def func1(x,a,b,c):
-                    return a*np.exp(-b*x)+c
-                if method==1:
-    
-                    start = [volt_tofit[0]-volt_tofit[-1], 2.3/time_tofit[-1],volt_tofit[-1]]
-                    coeff_method2_SOC,cov_method= curve_fit(func1,time_tofit,volt_tofit,p0=start,maxfev=800000)
-                    coef_fit_method2.append(coeff_method2_SOC)
-                    
-                    volt_estimation_method_SOC=func1(SOC_time_array,*coeff_method2_SOC)
-                    SOC_df['Volt estimation method n°2 (V)']=volt_estimation_method_SOC
-                    SOC_df['Delta_E method n°2 (V)']=SOC_voltage_array-volt_estimation_method_SOC
-                    
-                    
-                    print('Method2 SOC'+str(i))
-                    
-                #Method 3 : y = a* (ln(x))² + b*ln(x) + c
-                if method==2:
-                    
-                    coef_method3_SOC,cov_method=np.polyfit(np.log(time_tofit),volt_tofit,2,cov=True)
-                    coef_fit_method3.append(coef_method3_SOC)
-                    
-                    volt_estimation_method_SOC=np.polyval(coef_method3_SOC,np.log(SOC_time_array))
-                    coef_fit_method3.append(coef_method3_SOC)
-                    SOC_df['Volt estimation method n°3 (V)']=volt_estimation_method_SOC
-                    SOC_df['Delta_E method n°3 (V)']=SOC_voltage_array-volt_estimation_method_SOC
-                    
-                    print('Method3 SOC'+str(i))
-                    
-                    
-                #Method 4 :y = (a*x)/(b+x) + c
-                #a = asymptote end of the function y = (a*x)/(b+x)
-                #b = is the time wherein y = a/2 for y = (a*x)/(b+x)
-                #c = initial value for the plot
-                
-                def func3(x,a,b,c):
-                    return (a*x)/(b+x) +c
-                        
-                if method==3:
-                    
-                    start = [volt_tofit[-1], time_tofit[0], volt_tofit[0]]
-                    coeff_method4_SOC,cov_method= curve_fit(func3,time_tofit,volt_tofit,p0=start,maxfev=800000)
-                    coef_fit_method4.append(coeff_method4_SOC)
-                    
-                    volt_estimation_method_SOC=func3(SOC_time_array,*coeff_method4_SOC)
-                    SOC_df['Volt estimation method n°4 (V)']=volt_estimation_method_SOC
-                    SOC_df['Delta_E method n°4 (V)']=SOC_voltage_array-volt_estimation_method_SOC
-                    
-                    
-                    print('Method4 SOC'+str(i))
-                
-                
-                
-            ##Block 5.6 : Get MSE (Mean Square error) for each method and SOC
-            #MSE=sum(residual²)/n-p=sum((y_orig - y_est)²)/n-p=sum(delta_E²)/n-p
-            #y_orig= original OCV from the experiment
-            #y_est= estimated OCV
-            #n= number of datapoints
-            #p=number of parameters (number of coefficient in the fitting method)
-            
-            #Methodology: 
-            #   - isolate each delta_E profile (estimated-rawdata) for each level of each method
-            #   - then extract the part of each profile where the relaxation effect is not visible (between 40% and 90% of each profile) and get the residual
-            #   - sum all the residuals of the whole SOC and get the MSE
-            
-            #For each method
-            for method in range(number_method):
-                total_sum_residual=0
-                number_datapoints=0
-                
-                if method==0:
-                    column_delta_E='Delta_E method n°1 (V)'
-                    number_parameter=len(coef_fit_method1)
-                if method==1:
-                    column_delta_E='Delta_E method n°2 (V)'
-                    number_parameter=len(coef_fit_method2)
-                if method==2:
-                    column_delta_E='Delta_E method n°3 (V)'
-                    number_parameter=len(coef_fit_method3)
-                if method==3:
-                    column_delta_E='Delta_E method n°4 (V)'
-                    number_parameter=len(coef_fit_method4)
-                
-                #For each temperature level extract between 40% and 90% of delta_E = residual= orgininal OCV - estimated OCV
-                for k in range(self.number_temperature_level):
-                    delta_E_profile_method=SOC_df.loc[SOC_temp_index[len(SOC_temp_index)-self.number_temperature_level+k-1]:SOC_temp_index[len(SOC_temp_index)-self.number_temperature_level+k],column_delta_E]               #delta_E profile level k
-                    idx40=int(0.4*len(delta_E_profile_method))  #index 40%
-                    idx90=int(0.9*len(delta_E_profile_method))  #index 90%
-                    residual=delta_E_profile_method.iloc[idx40:idx90]  #extraction 
-                    square_residual=residual**2                       #residual²  level k
-                    sum_residual= square_residual.sum()               # sum(residual²) level k
-                    total_sum_residual=total_sum_residual+sum_residual   # total_sum_residual= sum( sum(residual²) level k)
-                    number_datapoints=number_datapoints+len(residual)  # number_data_points= sum( size(residual) level k)
-                
-                MSE=total_sum_residual/(number_datapoints-number_parameter)
-                print('MSE SOC'+str(i))
-                
-                if method==0:
-                    MSE_method1.append(MSE)
-                if method==1:
-                    MSE_method2.append(MSE)
-                if method==2:
-                    MSE_method3.append(MSE)
-                if method==3:
-                    MSE_method4.append(MSE)
-                
+            if len(SOC_df)==0:
+                SOC_capacity.append(np.nan)
+            else:
+                last_index_label=SOC_df.index.values[len(SOC_df)-1]
+                SOC_capacity.append(abs(SOC_df.loc[last_index_label,'Ah[Ah]']))  #keep the last capacity value of the SOC
 
-             ##Block 5.7: Get delta_E  for specific soc and temperature level, and for each method
-            delta_E_levels=[]
-            entropy_levels=[]
-            #For each method
-            for method in range(number_method):
-                delta_E_levels_method=[]
-                if method==0:
-                    column_delta_E='Delta_E method n°1 (V)'
-                if method==1:
-                    column_delta_E='Delta_E method n°2 (V)'
-                if method==2:
-                    column_delta_E='Delta_E method n°3 (V)'
-                if method==3:
-                    column_delta_E='Delta_E method n°4 (V)'
-                    
-                #For each temperature level
-                for k in range(self.number_temperature_level):
-                    #Isolate the delta_E profile for a specific temperature level
-                    delta_E_profile_method=SOC_df.loc[SOC_temp_index[len(SOC_temp_index)-self.number_temperature_level+k-1]:SOC_temp_index[len(SOC_temp_index)-self.number_temperature_level+k],column_delta_E]
-                    
-                    #gets the 90% of the total index for a specific temperature
-                    idx90=int(0.9*len(delta_E_profile_method))
-                    
-                    #Mean value of delta_E around idx90 (6 points)
-                    delta_E_mean=delta_E_profile_method.iloc[idx90-6].mean()
-                    
-                    #Add this value of delta_E correponding to one level of temperature of method in the list delta_E_levels of  method
-                    delta_E_levels_method.append(delta_E_mean)
-                    
-                    
-                 ##Block 5.8: Get the entropy=-nF*delta_E/delta_T for specific soc, method and temperature level
-                 
-                #For each temperature levels, get the slope  (in the list slope_levels_method, number of slopes=number of temperature levels -1 
-                entropy_levels_method=[]
-                for k in range(self.number_temperature_level-1):
-                    entropy= -F*(delta_E_levels_method[k+1]/delta_temperature[k+1])  #entropy= -nF * delta_E/ delta_T
-                    entropy_levels_method.append(entropy)
-                    
-                #Add the slopes of the method in the list of slopes gathering those of each method 
-                entropy_levels.append(entropy_levels_method)
-               
-                
-                
-            ##Block 5.9 : Entropy = mean(entropy_levels)  and enthalpy
-            #Raw data
-            coef_linear_regression_rawdata=np.polyfit(temperature_levels,voltage_levels_rawdata,1)  #get the the coefficient of the linear regression V=a*T+b whith a=entropy
-            entropy_rawdata.append(F*coef_linear_regression_rawdata[0])    #add the raw data entropy coefficient of the SOC i in the list of raw data entropy coefficients
-                    
-            #Fit data
-            for method in range(number_method):
-                entropy=np.mean(np.array(entropy_levels[method]))                   # S_m= mean( S_m,k)  entropy is the average of the different value of entropy of the p temperatures levels
-                print(entropy)
-                
-                enthalpy=entropy*(temperature_levels[0]) - F*SOC_OCV_reference[i]              #H=S*T_ref- F *volt_ref
-                
-                error_repetition = abs(np.std(np.array(entropy_levels[method])))      #error_repetition= standart deviation of the list of entropy levels
-                entropy_error=np.sqrt( error_repetition**2)                             
-                
-                if method==0:
-                    entropy_method1.append(entropy)
-                    entropy_method1_error.append(entropy_error)
-                    enthalpy_method1.append(enthalpy)
-                if method==1:
-                    entropy_method2.append(entropy)
-                    entropy_method2_error.append(entropy_error)
-                    enthalpy_method2.append(enthalpy)
-                if method==2:
-                    entropy_method3.append(entropy)
-                    entropy_method3_error.append(entropy_error)
-                    enthalpy_method3.append(enthalpy)
-                if method==3:
-                    entropy_method4.append(entropy)
-                    entropy_method4_error.append(entropy_error)
-                    enthalpy_method4.append(enthalpy)
-                    
-            print('Temperature_levels: ',temperature_levels)
-            
-            ## Block 5.10: Select the best fit for the SOC
-            list_MSE_SOC=np.array([ MSE_method1[i],MSE_method2[i],MSE_method3[i],MSE_method4[i]])  
-            indice_min_MSE=np.argmin(list_MSE_SOC)    #indice of the minimum MSE
-            
-            bestfit_method=indice_min_MSE+1          #list indice starts at 0, and method starts at 1
-            bestfit_method_list.append(bestfit_method)
-            if bestfit_method==1:
-                entropy_bestfit.append(entropy_method1[i])
-            if bestfit_method==2:
-                entropy_bestfit.append(entropy_method2[i])
-            if bestfit_method==3:
-                entropy_bestfit.append(entropy_method3[i])
-            if bestfit_method==4:
-                entropy_bestfit.append(entropy_method4[i])
-            
-            ##Update of the SOC_relax_list with all the entropy data
+            ##Update of the SOC_relax_list with the estimated volt curves and delta_E of each method
+            add_estimation_columns(SOC_df,result['coefficients'])
             SOC_relax_list[i]=SOC_df
 
-                
-            
         ## Block 6: CSV export 
+        instrumentation.start('export')
         #Export  of the SOCs
         for i in range (len(SOC_list)):
             csv_soc_name='SOC'+str(i)+'_'+self.title+'.csv'
             SOC_list[i].to_csv(csv_soc_name,index=False,header=False)
         
-        
         #Export of entropycoeff
+        df_entropy_data=self.entropy_table(results,SOC_capacity,screening)
+        instrumentation.stop()
+        
+        ##Return: SOC_relax_list,df_entropy_data
+        return SOC_relax_list,df_entropy_data
+
+    def entropy_table(self,results,SOC_capacity,screening):
+        '''Gather the results of the SOCs in df_entropy_data and save it in a CSV file
+
+           Parameters
+           ----------
+           results : list of dict
+               Result of fit_SOC for each SOC
+           SOC_capacity : list of float
+               Capacity reference of each SOC (Unit: Ah)
+           screening : list of string
+               Reason codes of the rejected SOCs ('' for a valid SOC, see screen_SOCs)'''
+        number_method=4
+        ## Block 5.1: Voltage reference, raw data entropy and best fit of each SOC
+        SOC_OCV_reference=[result['OCV_reference'] for result in results]
+        entropy_rawdata=[result['entropy_rawdata'] for result in results]
+        bestfit_method_list=[result['bestfit_method'] for result in results]
+        entropy_bestfit=[np.nan if np.isnan(result['bestfit_method']) else result['entropy'][result['bestfit_method']-1] for result in results]
+        #Entropy, error and enthalpy of each method (one list per method)
+        entropy_method1,entropy_method2,entropy_method3,entropy_method4=[[result['entropy'][method] for result in results] for method in range(number_method)]
+        entropy_method1_error,entropy_method2_error,entropy_method3_error,entropy_method4_error=[[result['error'][method] for result in results] for method in range(number_method)]
+        enthalpy_method1,enthalpy_method2,enthalpy_method3,enthalpy_method4=[[result['enthalpy'][method] for result in results] for method in range(number_method)]
+
         df_entropy_data = pd.DataFrame({'Charge/Discharge [mAh]': SOC_capacity,  'OCV [V]   ': SOC_OCV_reference,'Bestfit Entropy [J mol-1 K-1]': entropy_bestfit,'Bestfit method':bestfit_method_list,'Rawdata Entropy [J mol-1 K-1]': entropy_rawdata, 'Entropy method n°1 [J mol-1 K-1]': entropy_method1, 'Error method n°1': entropy_method1_error, 'Enthalpy method n°1': enthalpy_method1,'Entropy method n°2 [J mol-1 K-1]': entropy_method2,'Error method n°2': entropy_method2_error,'Enthalpy method n°2': enthalpy_method2, 'Entropy method n°3 [J mol-1 K-1]': entropy_method3,'Error method n°3': entropy_method3_error,'Enthalpy method n°3': enthalpy_method1, 'Entropy method n°4 [J mol-1 K-1]': entropy_method4,'Error method n°4': entropy_method4_error,'Enthalpy method n°4': enthalpy_method4}, columns = ['Charge/Discharge [mAh]', 'OCV [V]   ','Bestfit Entropy [J mol-1 K-1]','Bestfit method','Rawdata Entropy [J mol-1 K-1]', 'Entropy method n°1 [J mol-1 K-1]','Error method n°1','Enthalpy method n°1','Entropy method n°2 [J mol-1 K-1]','Error method n°2', 'Enthalpy method n°2','Entropy method n°3 [J mol-1 K-1]','Error method n°3','Enthalpy method n°3','Entropy method n°4 [J mol-1 K-1]','Error method n°4','Enthalpy method n°4'])
+        for method in range(number_method):
+            df_entropy_data['Status method n°'+str(method+1)]=[result['status'][method] for result in results]
+        df_entropy_data['Screening']=[reason if reason else 'OK' for reason in screening]
         CSV_name=self.title+'entropycoeff.csv'
         df_entropy_data.to_csv(CSV_name,index=False)
-        
+        return df_entropy_data
 
-        
-        ##Return: SOC_relax_list,df_entropy_data
+    def entropy_coefficient_out_of_core(self):
+        '''Same as entropy_coefficient, for the Basytec files larger than the memory
+
+           The file is read by chunks of chunksize rows. The rows are gathered SOC by SOC (the chunks are split on the SOC
+           boundaries, where 'Count' and 'Cyc-Count' are different), and each SOC is fitted and exported as soon as it is complete.
+           Its relaxation part, with the estimated volt curves, is then spilled to a file of spill_dir: only the rows of the SOC
+           in progress and the results stay in memory.
+
+           Return
+           -------
+           SOC_relax_list : Spilled_SOC_list
+                The relaxation dataFrames of the SOCs, read from spill_dir when they are accessed
+            df_entropy_data: dataFrame
+                DataFrame containing all the data from the entropy profiling (the same as entropy_coefficient)'''
+        instrumentation=self.instrumentation
+        self.budget.start()
+        if self.selector is not None:
+            self.selector.start()
+        SOC_relax_list=Spilled_SOC_list(self.spill_dir)
+        self.level_index_list=[]
+        results=[]
+        SOC_capacity=[]
+        screening=[]
+        pieces=[]              #rows of the SOC in progress
+        SOC_total=0
+
+        def close_SOC(SOC):
+            i=len(results)
+            SOC.to_csv('SOC'+str(i)+'_'+self.title+'.csv',index=False,header=False)
+            SOC_df=SOC[SOC['I[A]'] == 0.0 ].copy()   #keep the relaxation part when current=0 A
+            SOC_temp_index=SOC_df.index.values[SOC_df['State'].values==0]
+            if self.step_detection=='thermo':
+                SOC_temp_index=self.temperature_steps([SOC_df],[SOC_temp_index],first_SOC=i)[0]
+            level_index=SOC_df.index.get_indexer(SOC_temp_index)
+            screening.append(self.screen([SOC],[SOC_temp_index],first_SOC=i)[0])
+            self.level_index_list.append(None if screening[-1] else level_index)
+            if screening[-1]:
+                result=rejected_result(SOC_df['Agilent(V)'].values[-1] if len(SOC_df)>0 else np.nan)
+            else:
+                result=self.load_SOC_checkpoint(i)
+                if result is None:
+                    instrumentation.start('SOC',i)
+                    result=fit_SOC(SOC_df['~Time[h]'].values,SOC_df['Agilent(V)'].values,SOC_df['Temperature(K)'].values,level_index,
+                                   self.number_temperature_level,i,instrumentation,self.budget,self.decimation,self.selector)
+                    instrumentation.stop()
+                    self.save_SOC_checkpoint(i,result)
+            SOC_capacity.append(abs(SOC_df.loc[SOC_df.index.values[len(SOC_df)-1],'Ah[Ah]']) if len(SOC_df)>0 else np.nan)  #keep the last capacity value of the SOC
+            add_estimation_columns(SOC_df,result['coefficients'])
+            SOC_relax_list.append(SOC_df)
+            results.append(result)
+            logger.info('%s: SOC%d done',self.title,i)
+
+        instrumentation.start('reading')
+        for chunk in self.read_basytec(chunksize=self.chunksize):
+            instrumentation.stop()
+            #Conversion mV to V, °C to kelvin
+            chunk['Agilent(V)']=chunk[self.channel.OCV]/1000 if self.setup==1 else chunk[self.channel.OCV]
+            chunk['Temperature(K)']=chunk[self.channel.thermo]+273
+            #a new SOC starts on each row where 'Count' and 'Cyc-Count' are different
+            boundaries=np.flatnonzero((chunk['Count']!=chunk['Cyc-Count']).values)
+            start=0
+            for boundary in boundaries:
+                pieces.append(chunk.iloc[start:boundary])
+                close_SOC(pd.concat(pieces))
+                pieces=[]
+                start=boundary
+            pieces.append(chunk.iloc[start:])
+            SOC_total=int(chunk['Count'].iloc[-1])
+            instrumentation.start('reading')
+        instrumentation.stop()
+        #the rows after the last boundary (last pulse) are not a SOC, as in entropy_coefficient
+        del pieces
+        if len(results)>SOC_total:
+            del results[SOC_total:],SOC_capacity[SOC_total:],SOC_relax_list[SOC_total:],screening[SOC_total:],self.level_index_list[SOC_total:]
+        instrumentation.start('export')
+        df_entropy_data=self.entropy_table(results,SOC_capacity,screening)
+        instrumentation.stop()
         return SOC_relax_list,df_entropy_data
+
+    def step_duration_analysis(self,durations=None,method=5,tolerance=1.0):
+        '''Find the shortest temperature step which gives the same entropy profile as the full steps, within a tolerance
+
+           Each temperature step of each SOC is truncated to its first rows, as if it had lasted only a given duration (see
+           truncate_levels), and the SOCs are fitted again for every duration. The time of the rows is not changed. The fits of
+           all the (SOC, duration) pairs are made in one pass, in max_workers processes when max_workers is set (see
+           fit_SOC_parallel), within a budget of their own with the limits of the budget of the experiment (the evaluations
+           spent by the experiment are not changed).
+
+           Parameters
+           ---------------------------------------------------------------------
+            durations: list of float
+                Virtual durations of the steps, each in (0, time_step] (Unit: min), otherwise None (from 100% down to 30% of
+                time_step by steps of 10%). The full steps (time_step) are always the reference
+            method: int
+                Method n° 1-4: method=1-4 / Bestfit: method=5 /Rawdata: method=6
+            tolerance: float
+                Maximum deviation from the profile of the full steps, at every SOC (Unit: J.mol-1.K-1)
+
+           Return
+           -------
+           df_summary: dataFrame
+                One row per duration: Step duration (min), maximum and RMS deviation (Unit: J.mol-1.K-1), number of failed SOCs,
+                and if the duration is within the tolerance
+           df_profiles: dataFrame
+                Entropy of each SOC (rows) for each duration (columns) (Unit: J.mol-1.K-1)
+           shortest: float
+                Shortest duration such that this duration and all the longer ones are within the tolerance (Unit: min), NaN if none'''
+        if durations is None:
+            durations=[self.time_step*fraction/10 for fraction in range(10,2,-1)]
+        invalid=[duration for duration in durations if not 0<duration<=self.time_step]
+        if invalid:
+            raise ValueError('The step durations must be in (0, time_step='+str(self.time_step)+'], not '+str(invalid))
+        durations=sorted(set(durations)|{self.time_step},reverse=True)      #reference: the full steps, first
+        SOC_numbers=[i for i in range(len(self.level_index_list)) if self.level_index_list[i] is not None]
+        #arrays of every (SOC, duration) pair, fitted in one pass
+        arrays=[]
+        for SOC_number in SOC_numbers:
+            SOC_df=self.SOC_relax_list[SOC_number]
+            time=SOC_df['~Time[h]'].values
+            voltage=SOC_df['Agilent(V)'].values
+            temperature=SOC_df['Temperature(K)'].values
+            for duration in durations:
+                rows,level_index=truncate_levels(self.level_index_list[SOC_number],len(SOC_df),duration/self.time_step)
+                arrays.append((time[rows],voltage[rows],temperature[rows],level_index))
+        errors=(IndexError,ValueError,ZeroDivisionError)      #steps too short for the levels of fit_SOC
+        #budget of the analysis: the limits of the experiment, the evaluations spent by the experiment are not changed
+        budget=Fit_budget(self.budget.fit_evaluations,self.budget.fit_time,self.budget.experiment_evaluations,self.budget.experiment_time)
+        budget.start()
+        if self.max_workers is not None and self.max_workers>1:
+            results=self.fit_SOC_parallel(arrays,checkpoint=False,errors=errors,budget=budget)
+        else:
+            results=[]
+            for k,(time,voltage,temperature,level_index) in enumerate(arrays):
+                try:
+                    results.append(fit_SOC(time,voltage,temperature,level_index,self.number_temperature_level,SOC_numbers[k//len(durations)],
+                                           budget=budget,decimation=self.decimation))
+                except errors:
+                    results.append(None)
+                self.instrumentation.progress(k+1,len(arrays),self.title+' step durations')
+        profiles=np.full((len(SOC_numbers),len(durations)),np.nan)
+        for k,result in enumerate(results):
+            i,j=divmod(k,len(durations))
+            if result is None:
+                continue
+            if method==6:
+                profiles[i,j]=result['entropy_rawdata']
+            elif method==5:
+                profiles[i,j]=np.nan if np.isnan(result['bestfit_method']) else result['entropy'][result['bestfit_method']-1]
+            else:
+                profiles[i,j]=result['entropy'][method-1]
+        deviation=np.abs(profiles-profiles[:,:1])
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore',category=RuntimeWarning)      #duration where every SOC failed: NaN
+            maximum=np.nanmax(deviation,axis=0)
+            RMS=np.sqrt(np.nanmean(deviation**2,axis=0))
+        failed=np.isnan(profiles).sum(axis=0)-np.isnan(profiles[:,0]).sum()
+        within=(maximum<=tolerance) & (failed==0)
+        df_summary=pd.DataFrame({'Step duration (min)':durations,'Max deviation [J mol-1 K-1]':maximum,'RMS deviation [J mol-1 K-1]':RMS,
+                                 'Failed SOC':failed,'Within tolerance':within})
+        df_profiles=pd.DataFrame(profiles,index=pd.Index(SOC_numbers,name='SOC'),columns=durations)
+        #the durations are sorted from the longest: the shortest one before the first duration out of the tolerance
+        number_within=len(within) if within.all() else int(np.argmin(within))
+        shortest=durations[number_within-1] if number_within>0 else np.nan
+        return df_summary,df_profiles,shortest
+
+    def decimation_report(self,SOC_numbers=None):
+        '''Fit again the SOCs with all the samples and compare the entropy with the decimated fit of the experiment
+
+           Parameters
+           ---------------------------------------------------------------------
+            SOC_numbers: list of int
+                SOCs compared, otherwise None (all the SOCs which are not rejected)
+
+           Return
+           -------
+           df_report: dataFrame
+                One row per SOC: number of points of the decimated and of the full fit, deviation of the entropy of each method
+                (decimated - full, Unit: J.mol-1.K-1) and best fit method of both fits'''
+        number_method=4
+        if SOC_numbers is None:
+            SOC_numbers=[i for i in range(len(self.level_index_list)) if self.level_index_list[i] is not None]
+        rows=[]
+        for i in SOC_numbers:
+            SOC_df=self.SOC_relax_list[i]
+            arrays=(SOC_df['~Time[h]'].values,SOC_df['Agilent(V)'].values,SOC_df['Temperature(K)'].values,self.level_index_list[i])
+            full=fit_SOC(*arrays,self.number_temperature_level,i)
+            decimated=fit_SOC(*arrays,self.number_temperature_level,i,decimation=self.decimation)
+            deviation=[decimated['entropy'][method]-full['entropy'][method] for method in range(number_method)]
+            rows.append([i,decimated['fit_points'],full['fit_points']]+deviation+[decimated['bestfit_method'],full['bestfit_method']])
+        columns=['SOC','Decimated points','Full points']+['Deviation method n°'+str(method+1)+' [J mol-1 K-1]' for method in range(number_method)]
+        return pd.DataFrame(rows,columns=columns+['Decimated bestfit method','Full bestfit method'])
+        
+        
+        
         
         
+    def SOC_axis(self):
+        '''Return the SOC (charge) or the depth of charge (discharge) of each SOC of the experiment, between 0 and 1
         
+           Return
+           -------
+           SOC: Series
+                Capacity of each SOC divided by the maximum capacity (1 - this ratio for a discharge)'''
+        capacity=self.df_entropy_data['Charge/Discharge [mAh]']
+        if self.experiment_type==1:
+            return capacity/capacity.max()
+        return 1-(capacity/capacity.max())
         
         
     def entropy_plot(self,method):
@@ -994,14 +2482,11 @@ class Experiment:
            method: int 
                 All the methods 1-4: Method=0 /Method n° 1 : method=1 / Method n°2: method=2 /Method n°3: method=3 /Method n°4: method=4 / Bestfit: method=5 /Rawdata: method=6''' 
             
-        df_CSV =self.df_entropy_data
+        df_CSV =self.df_entropy_data.copy()     #the SOC column is added to a copy, the results are not modified
         fig, ax = plt.subplots()
         fig.suptitle(self.title)
         
-        if self.experiment_type==1:
-            df_CSV['SOC/Depth of charge'] = df_CSV['Charge/Discharge [mAh]']/ df_CSV['Charge/Discharge [mAh]'].max()
-        if self.experiment_type==2:
-            df_CSV['SOC/Depth of charge'] = 1-(df_CSV['Charge/Discharge [mAh]']/ df_CSV['Charge/Discharge [mAh]'].max())
+        df_CSV['SOC/Depth of charge'] = self.SOC_axis()
       
         if method==0:
             ax.plot(df_CSV['SOC/Depth of charge'],df_CSV['Entropy method n°1 [J mol-1 K-1]'], color='grey', marker='x', markerfacecolor ='grey',label='Method n°1')
@@ -1050,44 +2535,13 @@ class Experiment:
            SOC_number: int 
                 Number of the state of charge you want to display'''
         
-        #Get the total number of SOC
-        SOC_total= int(self.df_basytec.loc[self.df_basytec.index.values[len(self.df_basytec)-1],'Count'])
-        #get the indexes of the raws where non-zero current starts, where a new SOC starts(only raws where 'Count' and 'Cyc-Count' are different)
-        index_list=[]
-        index_raws=self.df_basytec[self.df_basytec['Count'] != self.df_basytec['Cyc-Count'] ]
-        index_list=index_raws.index
-        #Stock the SOC in a list
-        SOC_list=[]
-        for i in range(SOC_total):
-            if i==0:                         #for the 1st soc
-                SOC=self.df_basytec.iloc[0:index_list[i],:]    
-            elif i==SOC_total-1:                 #for the last soc
-                SOC=self.df_basytec.iloc[index_list[i-1]:index_list[-1],:]
-            else:
-                SOC=self.df_basytec.iloc[index_list[i-1]:index_list[i],:]
-            SOC_list.append(SOC)
-        #Plot the SOC n°number SOC
-        title_plot= 'SOC n°'+str(SOC_number)+'  ' +self.title
-        fig, ax0 = plt.subplots()
-        ax1=ax0.twinx()
-        fig.subplots_adjust(right=0.65)
-        fig.suptitle(title_plot)
-        ax1.set_frame_on(True)
-        ax1.patch.set_visible(False)
-        if self.setup==1:
-            ax0.plot(SOC_list[SOC_number]['~Time[h]'],(SOC_list[SOC_number][self.channel.OCV])/1000,color='Blue')   #conversion from mV to V only for the setup=1 (work station)
+        #rows of the SOC from the SOC index of the file (see build_SOC_index), the same whether df_basytec is in memory or not
+        index=load_SOC_index(self.basytec_file,self.setup)
+        if self._df_basytec is None:        #released or never read (lean, out-of-core, loaded from the checkpoints): only the SOC is read
+            SOC=read_SOC(self.basytec_file,self.setup,SOC_number,index)
         else:
-            ax0.plot(SOC_list[SOC_number]['~Time[h]'],SOC_list[SOC_number][self.channel.OCV],color='Blue')
-        ax0.set_ylabel('OCV (V)', color='Blue')
-        ax0.tick_params(axis='y', colors='Blue')
-        ax0.set_xlabel('Time (h)')
-        
-        ax1.plot(SOC_list[SOC_number]['~Time[h]'],SOC_list[SOC_number][self.channel.thermo],color='firebrick')
-        ax1.set_ylabel('Temperature (°C)', color='firebrick')
-        ax1.tick_params(axis='y', colors='firebrick')
-        ax1.set_ylim(self.temp_ref-10,self.temp_ref+2)
-        plt.legend(loc='best',prop={'size':12})
-        plt.show()
+            SOC=self._df_basytec.iloc[slice(*index['SOC'][SOC_number]['rows'])]
+        plot_SOC(SOC,self.setup,self.channel,self.temp_ref,'SOC n°'+str(SOC_number)+'  ' +self.title)
     
 
         
@@ -1101,40 +2555,7 @@ class Experiment:
             method: int 
                 All the methods 1-4: Method=0 /Method n° 1 : method=1 / Method n°2: method=2 /Method n°3: method=3 /Method n°4: method=4 '''
                 
-        SOC=self.SOC_relax_list[SOC_number]
-        SOC=SOC.iloc[3:]
-        title_plot= 'SOC n°'+str(SOC_number)+'  ' +self.title
-        fig, ax0 = plt.subplots()
-        ax1=ax0.twinx()
-        fig.subplots_adjust(right=0.65)
-        fig.suptitle(title_plot)
-        ax1.set_frame_on(True)
-        ax1.patch.set_visible(False)
-        
-        ax0.plot(SOC['~Time[h]'],SOC['Agilent(V)'],color='Blue')  
-        if method==0:
-            ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°1 (V)'], ls='--',color='grey',label='Method n°1')
-            ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°2 (V)'], ls='--',color='green',label='Method n°2')
-            ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°3 (V)'], ls='--',color='darkorange',label='Method n°3')
-            ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°4 (V)'], ls='--',color='darkviolet',label='Method n°4')
-        if method==1:
-            ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°1 (V)'], ls='--',color='grey',label='Method n°1')
-        if method==2:
-            ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°2 (V)'], ls='--',color='green',label='Method n°2')
-        if method==3:
-            ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°3 (V)'], ls='--',color='darkorange',label='Method n°3')
-        if method==4:
-            ax0.plot(SOC['~Time[h]'],SOC['Volt estimation method n°4 (V)'], ls='--',color='darkviolet',label='Method n°4')
-        ax0.legend(loc='best',prop={'size':12})
-        ax0.set_ylabel('OCV (V)', color='Blue')
-        ax0.tick_params(axis='y', colors='Blue')
-        ax0.set_xlabel('Time (h)')
-            
-        ax1.plot(SOC['~Time[h]'],SOC[self.channel.thermo],color='firebrick')
-        ax1.set_ylabel('Temperature (°C)', color='firebrick')
-        ax1.tick_params(axis='y', colors='firebrick')
-        ax1.set_ylim(self.temp_ref-10,self.temp_ref+2)
-        plt.show()
+        plot_SOC_relax_fit(self.SOC_relax_list[SOC_number],self.channel,self.temp_ref,method,'SOC n°'+str(SOC_number)+'  ' +self.title)
         
         
     def enthalpy_plot(self,method):
@@ -1145,14 +2566,11 @@ class Experiment:
            method: int 
                 All the methods 1-4: Method=0 /Method n° 1 : method=1 / Method n°2: method=2 /Method n°3: method=3 /Method n°4: method=4 ''' 
             
-        df_CSV =self.df_entropy_data
+        df_CSV =self.df_entropy_data.copy()     #the SOC column is added to a copy, the results are not modified
         fig, ax = plt.subplots()
         fig.suptitle('Enthalpy_'+self.title)
         
-        if self.experiment_type==1:
-            df_CSV['SOC/Depth of charge'] = df_CSV['Charge/Discharge [mAh]']/ df_CSV['Charge/Discharge [mAh]'].max()
-        if self.experiment_type==2:
-            df_CSV['SOC/Depth of charge'] = 1-(df_CSV['Charge/Discharge [mAh]']/ df_CSV['Charge/Discharge [mAh]'].max())
+        df_CSV['SOC/Depth of charge'] = self.SOC_axis()
         
         if method==0:
             ax.plot(df_CSV['SOC/Depth of charge'],df_CSV['Enthalpy method n°1'], color='grey', marker='x', markerfacecolor ='grey',label='Method n°1')
@@ -1193,8 +2611,10 @@ class Experiment_group:
     experiment_list : list of Experiment
        The list of Experiments 
     experiment_type : int
-        The type of the experiment (Charge : 1 / Discharge :2 )'''
-        
+        The type of the experiment (Charge : 1 / Discharge :2 )
+    _grid_cache : dict
+        Entropy profiles already interpolated on a SOC grid (see SOC_grid_profiles)'''
+
     def __init__(self,experiment_type,experiment_list):
         '''Parameters
            ----------
@@ -1204,6 +2624,24 @@ class Experiment_group:
                 The type of the experiment (Charge : 1 / Discharge :2 )'''
         self.experiment_list=experiment_list
         self.experiment_type=experiment_type
+        self._grid_cache={}
+
+    @classmethod
+    def load(cls,experiment_type,definitions,queue_size=2,**options):
+        '''Build a group from the definitions of its experiments; the file of the next experiment is read while the current
+           one is fitted (see iter_experiments)
+
+           Parameters
+           ----------
+            experiment_type : int
+                The type of the experiment (Charge : 1 / Discharge :2 )
+            definitions : list of tuple
+                Positional parameters of each Experiment
+            queue_size : int
+                Maximum number of files read in advance
+            options :
+                Keyword parameters given to every Experiment'''
+        return cls(experiment_type,list(iter_experiments(definitions,queue_size,**options)))
 
     def temperature_plot(self):
         '''Display the plot showing the evolution of the temperaure given by the thermocouples of each experiment from the attribute list_experiment'''
@@ -1212,7 +2650,7 @@ class Experiment_group:
         #Plot temperature channel
         for i in range(len(self.experiment_list)):
             temperature_column= self.experiment_list[i].channel.thermo
-            self.experiment_list[i].df_basytec.plot(x='~Time[h]',y=[temperature_column],ax=ax,subplots =True,c=np.random.rand(3,))
+            self.experiment_list[i].raw_columns(['~Time[h]',temperature_column]).plot(x='~Time[h]',y=[temperature_column],ax=ax,subplots =True,c=np.random.rand(3,))
         #Plot temperature expected
         self.experiment_list[i].DataFrame_T_expected().plot(x='Time(h)',y='Temperature',ax=ax,subplots =True,c='black', label='T expected')
         plt.xlabel('Time (h)')
@@ -1234,14 +2672,11 @@ class Experiment_group:
         fig, ax = plt.subplots()
         fig.suptitle('Entropy profiles_Method n°'+str(method))
         for i in range(len(self.experiment_list)):
-            df_CSV=self.experiment_list[i].df_entropy_data
-            
-            if self.experiment_type==1:
-                df_CSV['SOC/Depth of charge'] = df_CSV['Charge/Discharge [mAh]']/ df_CSV['Charge/Discharge [mAh]'].max()
+            df_CSV=self.experiment_list[i].df_entropy_data.copy()
+            df_CSV['SOC/Depth of charge'] = self.experiment_list[i].SOC_axis()
+            if self.experiment_list[i].experiment_type==1:
                 a='Charge_'
-
-            if self.experiment_type==2:
-                df_CSV['SOC/Depth of charge'] = 1-(df_CSV['Charge/Discharge [mAh]']/ df_CSV['Charge/Discharge [mAh]'].max())
+            else:
                 a='Dicharge_'
             lab=a+str(self.experiment_list[i].time_step)+'min_'+str(self.experiment_list[i].temp_ref)+'°C'
             c=np.random.rand(3,)
@@ -1264,13 +2699,109 @@ class Experiment_group:
         ax.set_xlim(1,0)
         ax.legend(prop={'size':12})
         plt.show()
-        
-    
 
+    def conditions(self):
+        '''Return the test condition of each experiment, as a label (ex: Discharge_20min_28°C)'''
+        labels=[]
+        for experiment in self.experiment_list:
+            a='Charge_' if experiment.experiment_type==1 else 'Discharge_'
+            labels.append(a+str(experiment.time_step)+'min_'+str(experiment.temp_ref)+'°C')
+        return labels
 
-###Main check
+    def SOC_grid_profiles(self,grid=None):
+        '''Interpolate the entropy profiles of all the experiments on a common SOC grid
 
+           The profiles of all the experiments and methods are interpolated in one vectorized operation. The result is cached
+           and computed again only if the grid, the experiments or their results change: the results of an experiment change
+           when df_entropy_data is assigned (see Experiment.results_version). After an in-place modification of
+           df_entropy_data, call clear_cache.
 
+           Parameters
+           ---------------------------------------------------------------------
+            grid: array
+                Common SOC/depth of charge grid between 0 and 1, otherwise None (101 points)
+
+           Return
+           -------
+           grid: array
+                The common grid
+           profiles: dict
+                For each method number (1-4, 5: bestfit, 6: raw data), array (number of experiments x number of grid points)'''
+        if grid is None:
+            grid=np.linspace(0,1,101)
+        grid=np.asarray(grid,dtype=float)
+        key=(grid.tobytes(),tuple((id(experiment),experiment.results_version) for experiment in self.experiment_list))
+        if key not in self._grid_cache:
+            n_point=max(len(experiment.df_entropy_data) for experiment in self.experiment_list)
+            x=np.full((len(self.experiment_list),n_point),np.nan)
+            y=np.full((len(self.experiment_list),n_point,len(ENTROPY_COLUMNS)),np.nan)
+            for i,experiment in enumerate(self.experiment_list):
+                df=experiment.df_entropy_data
+                x[i,:len(df)]=experiment.SOC_axis().values
+                y[i,:len(df),:]=df[list(ENTROPY_COLUMNS.values())].values
+            y_grid=interpolate_rows(grid,x,y)
+            profiles={method:y_grid[:,:,k] for k,method in enumerate(ENTROPY_COLUMNS)}
+            self._grid_cache={key:(grid,profiles)}      #only the last grid is kept
+        return self._grid_cache[key]
+
+    def clear_cache(self):
+        '''Forget the interpolated profiles (see SOC_grid_profiles), ex: after an in-place modification of df_entropy_data'''
+        self._grid_cache={}
+
+    def group_statistics(self,method,grid=None,percentiles=(5,25,50,75,95),by_condition=True):
+        '''Get the mean, standard deviation and percentiles of the entropy profiles of a method across the experiments
+
+           Parameters
+           ---------------------------------------------------------------------
+            method: int
+                Method n° 1-4: method=1-4 / Bestfit: method=5 /Rawdata: method=6
+            grid: array
+                Common SOC grid, otherwise None (101 points between 0 and 1)
+            percentiles: tuple of float
+                Percentiles computed at each SOC of the grid
+            by_condition: bool
+                True: one set of statistics per test condition (direction, time step, reference temperature), False: all the experiments together
+
+           Return
+           -------
+           df_statistics: dataFrame
+                One row per condition and SOC of the grid: Condition, SOC, Count, Mean, Std and one column per percentile (Unit: J.mol-1.K-1)'''
+        grid,profiles=self.SOC_grid_profiles(grid)
+        values=profiles[method]
+        labels=np.array(self.conditions()) if by_condition else np.array(['All']*len(self.experiment_list))
+        frames=[]
+        for condition in dict.fromkeys(labels):
+            subset=values[labels==condition]
+            valid=~np.isnan(subset)
+            df=pd.DataFrame({'Condition':condition,'SOC':grid,'Count':valid.sum(axis=0)})
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore',category=RuntimeWarning)      #SOC of the grid without any data: NaN
+                df['Mean']=np.nanmean(subset,axis=0)
+                df['Std']=np.nanstd(subset,axis=0,ddof=1)
+                for q,row in zip(percentiles,np.nanpercentile(subset,percentiles,axis=0)):
+                    df['P'+str(q)]=row
+            frames.append(df)
+        return pd.concat(frames,ignore_index=True)
 
+    def statistics_plot(self,method,grid=None):
+        '''Display the mean entropy profile of each test condition with the standard deviation band
 
-            
\ No newline at end of file
+           Parameters
+           ---------------------------------------------------------------------
+            method: int
+                Method n° 1-4: method=1-4 / Bestfit: method=5 /Rawdata: method=6'''
+        df=self.group_statistics(method,grid,percentiles=())
+        fig, ax = plt.subplots()
+        fig.suptitle('Entropy profiles statistics_Method n°'+str(method))
+        for condition,df_condition in df.groupby('Condition',sort=False):
+            line,=ax.plot(df_condition['SOC'],df_condition['Mean'],label=condition)
+            ax.fill_between(df_condition['SOC'],df_condition['Mean']-df_condition['Std'],df_condition['Mean']+df_condition['Std'],color=line.get_color(),alpha=0.2)
+        ax.set_xlabel('SOC')
+        ax.set_ylabel('Entropy (J.mol-1.K-1)')
+        ax.legend(prop={'size':12})
+        plt.show()
+
+
+
+
+###Main check
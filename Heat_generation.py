@@ -0,0 +1,240 @@
+###IMPORT
+import numpy as np
+import pandas as pd
+
+from Class_method import ENTROPY_COLUMNS
+
+###CONSTANTS
+F=96485.3415     #Faraday's number in J.mol-1.V-1
+KELVIN=273.15    #°C to K
+OCV_COLUMN='OCV [V]   '       #column of the voltage reference in df_entropy_data
+
+###FUNCTIONS
+
+class Entropy_profile:
+    '''A class used to represent the entropy profile of a cell against the SOC, interpolated linearly between its points
+
+    Attributes
+    ----------
+    soc : array
+        SOC of the points of the profile, increasing, between 0 and 1
+    entropy : array
+        Entropy coefficient of each point (Unit: J.mol-1.K-1)
+    OCV : array
+        Open circuit voltage of each point (Unit: V), otherwise None (the irreversible heat is not computed)
+    '''
+
+    def __init__(self,soc,entropy,OCV=None):
+        '''Parameters
+           ----------
+            soc, entropy, OCV : array
+                Points of the profile in any order; the points with a NaN (ex: SOC rejected by the screening) are dropped'''
+        soc=np.asarray(soc,dtype=float)
+        entropy=np.asarray(entropy,dtype=float)
+        valid=~np.isnan(soc) & ~np.isnan(entropy)
+        if OCV is not None:
+            OCV=np.asarray(OCV,dtype=float)
+            valid&=~np.isnan(OCV)
+        if valid.sum()<2:
+            raise ValueError('An entropy profile needs at least 2 valid points')
+        order=np.argsort(soc[valid],kind='stable')
+        self.soc=soc[valid][order]
+        self.entropy=entropy[valid][order]
+        self.OCV=None if OCV is None else OCV[valid][order]
+
+    @classmethod
+    def from_experiment(cls,experiment,method=5):
+        '''Profile of an Experiment
+
+           Parameters
+           ----------
+           experiment : Experiment
+           method : int
+               Method n° 1-4: method=1-4 / Bestfit: method=5 /Rawdata: method=6'''
+        df=experiment.df_entropy_data
+        return cls(experiment.SOC_axis().values,df[ENTROPY_COLUMNS[method]].values,df[OCV_COLUMN].values)
+
+    @classmethod
+    def from_group(cls,experiment_group,method=5,grid=None):
+        '''Mean profile of the experiments of an Experiment_group (see Experiment_group.group_statistics), without OCV'''
+        df=experiment_group.group_statistics(method,grid,percentiles=(),by_condition=False)
+        return cls(df['SOC'].values,df['Mean'].values)
+
+    def entropy_at(self,soc):
+        '''Entropy coefficient at each SOC (Unit: J.mol-1.K-1), the values of the ends of the profile are kept outside of it'''
+        return np.interp(soc,self.soc,self.entropy)
+
+    def OCV_at(self,soc):
+        '''Open circuit voltage at each SOC (Unit: V), NaN if the profile has no OCV'''
+        if self.OCV is None:
+            return np.full(np.shape(soc),np.nan)
+        return np.interp(soc,self.soc,self.OCV)
+
+
+def _entropy(profile,current,soc,charge_profile):
+    '''Entropy coefficient of each sample, from the charge profile where the current is positive when it is given'''
+    entropy=profile.entropy_at(soc)
+    if charge_profile is not None:
+        entropy=np.where(current>0,charge_profile.entropy_at(soc),entropy)
+    return entropy
+
+
+def reversible_heat(profile,current,temperature,soc,n=1,charge_profile=None):
+    '''Reversible heat generation I*T*dS/(nF) of a load profile
+
+       Parameters
+       ----------
+       profile : Entropy_profile
+           Entropy profile of the cell (discharge profile when charge_profile is given)
+       current : array
+           Current (Unit: A), positive for a charge as in the Basytec files
+       temperature : array
+           Temperature of the cell (Unit: °C)
+       soc : array
+           SOC of the cell, between 0 and 1
+       n : int
+           Number of electrons exchanged by the reaction
+       charge_profile : Entropy_profile
+           Entropy profile used for the samples where the current is positive, otherwise None (profile used for all the samples)
+
+       Return
+       -------
+       heat : array
+           Reversible heat generated by the cell (Unit: W), positive when the cell heats up'''
+    current=np.asarray(current,dtype=float)
+    return current*(np.asarray(temperature,dtype=float)+KELVIN)*_entropy(profile,current,soc,charge_profile)/(n*F)
+
+
+def heat_generation(profile,current,temperature,soc,voltage=None,n=1,charge_profile=None):
+    '''Reversible, irreversible and total heat generation of a load profile (Bernardi equation)
+
+       The irreversible heat I*(V-OCV) is computed when the voltage is given and the profile has an OCV, otherwise it is NaN
+       and the total heat is the reversible heat.
+
+       Parameters
+       ----------
+       profile, current, temperature, soc, n, charge_profile :
+           See reversible_heat
+       voltage : array
+           Voltage of the cell (Unit: V), otherwise None
+
+       Return
+       -------
+       df: dataFrame
+           One row per sample: SOC, Entropy [J mol-1 K-1], Reversible heat (W), Irreversible heat (W), Total heat (W)'''
+    soc=np.asarray(soc,dtype=float)
+    current=np.asarray(current,dtype=float)
+    entropy=_entropy(profile,current,soc,charge_profile)
+    reversible=current*(np.asarray(temperature,dtype=float)+KELVIN)*entropy/(n*F)
+    if voltage is None:
+        irreversible=np.full(len(soc),np.nan)
+    else:
+        OCV=profile.OCV_at(soc)
+        if charge_profile is not None and charge_profile.OCV is not None:
+            OCV=np.where(current>0,charge_profile.OCV_at(soc),OCV)
+        irreversible=current*(np.asarray(voltage,dtype=float)-OCV)
+    total=np.where(np.isnan(irreversible),reversible,reversible+irreversible)
+    return pd.DataFrame({'SOC':soc,'Entropy [J mol-1 K-1]':entropy,'Reversible heat (W)':reversible,
+                         'Irreversible heat (W)':irreversible,'Total heat (W)':total})
+
+
+def heat_generation_stream(profile,chunks,columns=('Time (s)','Current (A)','Temperature (°C)'),soc_column=None,voltage_column=None,
+                           capacity=None,initial_soc=1.0,n=1,charge_profile=None):
+    '''Heat generation of a long load profile given by chunks of rows (ex: a drive cycle read with pd.read_csv(chunksize=...))
+
+       When the SOC is not a column, it is computed by coulomb counting (trapezoid rule), continued from one chunk to the next:
+       only one chunk is in memory at a time.
+
+       Parameters
+       ----------
+       profile, n, charge_profile :
+           See reversible_heat
+       chunks : iterable of dataFrame
+           Consecutive rows of the load profile
+       columns : tuple of string
+           Columns of the time (Unit: s), current (Unit: A, positive for a charge) and temperature (Unit: °C)
+       soc_column : string
+           Column of the SOC (between 0 and 1), otherwise None (coulomb counting)
+       voltage_column : string
+           Column of the voltage (Unit: V) for the irreversible heat, otherwise None
+       capacity : float
+           Capacity of the cell for the coulomb counting (Unit: Ah)
+       initial_soc : float
+           SOC at the first row for the coulomb counting
+
+       Yield
+       -------
+       df: dataFrame
+           Time (s) and the columns of heat_generation for the rows of each chunk'''
+    time_column,current_column,temperature_column=columns
+    if soc_column is None and capacity is None:
+        raise ValueError('The capacity is needed to compute the SOC by coulomb counting')
+    last=None        #time, current and SOC of the last row of the previous chunk
+    for chunk in chunks:
+        time=chunk[time_column].values.astype(float)
+        current=chunk[current_column].values.astype(float)
+        if soc_column is not None:
+            soc=chunk[soc_column].values.astype(float)
+        else:
+            if last is None:
+                last=(time[0],current[0],initial_soc)
+            dt=np.diff(time,prepend=last[0])
+            i_mean=0.5*(current+np.concatenate(([last[1]],current[:-1])))
+            soc=last[2]+np.cumsum(i_mean*dt)/(capacity*3600)
+            last=(time[-1],current[-1],soc[-1])
+        voltage=None if voltage_column is None else chunk[voltage_column].values
+        df=heat_generation(profile,current,chunk[temperature_column].values,soc,voltage,n,charge_profile)
+        df.insert(0,'Time (s)',time)
+        yield df
+
+
+def heat_generation_file(profile,path,output=None,chunksize=200000,columns=('Time (s)','Current (A)','Temperature (°C)'),soc_column=None,
+                         voltage_column=None,capacity=None,initial_soc=1.0,n=1,charge_profile=None,**read):
+    '''Heat generation of a load profile stored in a CSV file, processed by chunks of rows (see heat_generation_stream)
+
+       Parameters
+       ----------
+       profile, columns, soc_column, voltage_column, capacity, initial_soc, n, charge_profile :
+           See heat_generation_stream
+       path : string
+           Path of the CSV file of the load profile
+       output : string
+           Path of the CSV file where the heat generation of each row is written, otherwise None (only the totals are returned)
+       chunksize : int
+           Number of rows read at once
+       read :
+           Other parameters of pd.read_csv (ex: sep, header, encoding)
+
+       Return
+       -------
+       totals : dict
+           Duration (s), reversible, irreversible and total heat (Unit: J, trapezoid rule), maximum and minimum total heat (Unit: W)'''
+    usecols=[column for column in list(columns)+[soc_column,voltage_column] if column is not None]
+    reader=pd.read_csv(path,usecols=usecols,chunksize=chunksize,**read)
+    names=['Reversible heat (W)','Irreversible heat (W)','Total heat (W)']
+    energy=np.zeros(3)
+    last=None           #time and heat of the last row of the previous chunk
+    first_time=None
+    peak=(-np.inf,np.inf)
+    header=True
+    for df in heat_generation_stream(profile,reader,columns,soc_column,voltage_column,capacity,initial_soc,n,charge_profile):
+        time=df['Time (s)'].values
+        heat=df[names].values
+        if last is None:
+            first_time=time[0]
+            last=(time[0],heat[0])
+        #trapezoid rule, joined to the last row of the previous chunk
+        dt=np.diff(time,prepend=last[0])
+        previous=np.vstack((last[1][None,:],heat[:-1]))
+        energy+=np.nansum(0.5*(heat+previous)*dt[:,None],axis=0)
+        last=(time[-1],heat[-1])
+        peak=(max(peak[0],np.nanmax(heat[:,2])),min(peak[1],np.nanmin(heat[:,2])))
+        if output is not None:
+            df.to_csv(output,mode='w' if header else 'a',header=header,index=False)
+            header=False
+    if last is None:
+        raise ValueError('The load profile is empty')
+    if voltage_column is None or profile.OCV is None:
+        energy[1]=np.nan
+    return {'Duration (s)':last[0]-first_time,'Reversible heat (J)':energy[0],'Irreversible heat (J)':energy[1],
+            'Total heat (J)':energy[2],'Maximum heat (W)':peak[0],'Minimum heat (W)':peak[1]}
@@ -0,0 +1,281 @@
+###IMPORT
+import warnings
+
+import numpy as np
+import pandas as pd
+
+###CONSTANTS
+
+#Parameters of each equivalent circuit, (name, unit, kind) with kind 'R' for a resistance (fitted in log, reported in mOhm),
+#'positive' for a positive parameter (fitted in log) and 'exponent' for a CPE exponent between 0 and 1 (fitted with a logistic function)
+CIRCUITS={'R-RC':[('R0','mOhm','R'),('R1','mOhm','R'),('C1','F','positive')],
+          'R-RC-CPE':[('R0','mOhm','R'),('R1','mOhm','R'),('C1','F','positive'),('Q','F.s^(alpha-1)','positive'),('alpha','','exponent')],
+          'Randles':[('R0','mOhm','R'),('Rct','mOhm','R'),('Q','F.s^(alpha-1)','positive'),('alpha','','exponent'),('sigma','Ohm.s^-1/2','positive')]}
+
+###FUNCTIONS
+
+def read_impedance_file(battery):
+    '''Read the impedance file of a battery and keep the accurate data (the first rows where Re(Z)=0 or -Im(Z)=0 are taken off)
+
+       Return
+       -------
+       df: dataFrame
+           Columns freq/Hz, Re(Z)/Ohm, -Im(Z)/Ohm'''
+    df=battery.impedance_data(['freq/Hz','Re(Z)/Ohm','-Im(Z)/Ohm'])
+    return df[(df['Re(Z)/Ohm'] != 0.0) & (df['-Im(Z)/Ohm'] != -0.0)]
+
+
+class Spectra:
+    '''A class used to represent the impedance spectra of a set of cells stored in aligned arrays
+
+    Attributes
+    ----------
+    names : list of string
+        Name of each cell
+    freq : array (number of cells x number of points)
+        Frequencies (Unit: Hz), padded with NaN after the last point of a spectrum
+    Z : complex array (number of cells x number of points)
+        Impedance Re(Z) + j Im(Z) (Unit: Ohm), padded with NaN
+    mask : bool array (number of cells x number of points)
+        True where a measured point exists
+    '''
+
+    def __init__(self,names,frames):
+        '''Parameters
+           ----------
+            names : list of string
+                Name of each cell
+            frames : list of dataFrame
+                Impedance data of each cell (as returned by read_impedance_file), in the measured order'''
+        self.names=list(names)
+        n_points=max([len(df) for df in frames]+[0])
+        self.freq=np.full((len(frames),n_points),np.nan)
+        self.Z=np.full((len(frames),n_points),np.nan,dtype=complex)
+        for i,df in enumerate(frames):
+            self.freq[i,:len(df)]=df['freq/Hz'].values
+            self.Z[i,:len(df)]=df['Re(Z)/Ohm'].values-1j*df['-Im(Z)/Ohm'].values
+        self.mask=~np.isnan(self.freq)
+
+    def characteristic_resistances(self):
+        '''Get the characteristic resistances of every cell with the criteria of Battery.get_impedance, on the whole array at once
+
+           Return
+           -------
+           df: dataFrame
+               Columns Cell, R_hf, R_mf, R_t (Unit : mOhm)'''
+        re=self.Z.real
+        minus_im=-self.Z.imag
+        #R_hf: mean Re(Z) of the rows with -Im(Z)~0
+        hf=self.mask & (np.abs(minus_im)<0.001)
+        with np.errstate(invalid='ignore'):
+            R_hf=np.where(hf,re,0).sum(axis=1)/hf.sum(axis=1)*1000
+        #R_mf: Re(Z) of the minimum -Im(Z) among the rows with Freq~100mHz
+        mf=self.mask & (self.freq<0.30) & (self.freq>0.08)
+        idx_mf=np.argmin(np.where(mf,minus_im,np.inf),axis=1)
+        R_mf=np.where(mf.any(axis=1),re[np.arange(len(re)),idx_mf],np.nan)*1000
+        #R_t: Re(Z) of the last row
+        idx_last=self.mask.sum(axis=1)-1
+        R_t=np.where(idx_last>=0,re[np.arange(len(re)),np.maximum(idx_last,0)],np.nan)*1000
+        return pd.DataFrame({'Cell':self.names,'R_hf':R_hf,'R_mf':R_mf,'R_t':R_t})
+
+
+def load_spectra(battery_group):
+    '''Load the impedance spectra of every battery of a Battery_group into aligned arrays
+
+       Parameters
+       ----------
+       battery_group : Battery_group
+           Group of batteries; the batteries without impedance file are skipped. The files are read concurrently
+           (see Battery_group.max_workers)
+
+       Return
+       -------
+       spectra : Spectra'''
+    batteries=[battery for battery in battery_group.battery_list if battery.impedance_file!='']
+    frames=battery_group.map_batteries(read_impedance_file,batteries)
+    return Spectra([battery.name for battery in batteries],frames)
+
+
+def circuit_impedance(circuit,params,omega):
+    '''Impedance of an equivalent circuit for a batch of parameter sets
+
+       Parameters
+       ----------
+       circuit : string
+           'R-RC' : R0 + R1//C1
+           'R-RC-CPE' : R0 + R1//C1 + CPE(Q,alpha)
+           'Randles' : R0 + CPE(Q,alpha)//(Rct + Warburg(sigma))
+       params : array (number of cells x number of parameters)
+           Parameters in SI units, in the order of CIRCUITS[circuit]
+       omega : array (number of cells x number of points)
+           Angular frequencies (Unit: rad/s)
+
+       Return
+       -------
+       Z : complex array (number of cells x number of points)'''
+    p=[params[:,k:k+1] for k in range(params.shape[1])]
+    jw=1j*omega
+    if circuit=='R-RC':
+        R0,R1,C1=p
+        return R0+R1/(1+jw*R1*C1)
+    if circuit=='R-RC-CPE':
+        R0,R1,C1,Q,alpha=p
+        return R0+R1/(1+jw*R1*C1)+1/(Q*jw**alpha)
+    if circuit=='Randles':
+        R0,Rct,Q,alpha,sigma=p
+        Zw=sigma*(1-1j)/np.sqrt(omega)
+        return R0+1/(Q*jw**alpha+1/(Rct+Zw))
+    raise ValueError('Unknown circuit '+str(circuit)+', choose among '+', '.join(CIRCUITS))
+
+
+def _to_params(circuit,theta):
+    '''Convert the unconstrained fitted variables into circuit parameters (SI units)'''
+    theta=np.clip(theta,-50,50)
+    params=np.empty_like(theta)
+    for k,(name,unit,kind) in enumerate(CIRCUITS[circuit]):
+        if kind=='exponent':
+            params[:,k]=1/(1+np.exp(-theta[:,k]))
+        else:
+            params[:,k]=np.exp(theta[:,k])
+    return params
+
+
+def _initial_guess(circuit,spectra):
+    '''Initial parameters of every cell from the shape of its spectrum (vectorized over the cells, 0 for a cell without points)'''
+    re=np.where(spectra.mask,spectra.Z.real,np.nan)
+    minus_im=np.where(spectra.mask,-spectra.Z.imag,np.nan)
+    omega=2*np.pi*spectra.freq
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore',category=RuntimeWarning)      #cell without points: All-NaN slice
+        R0=np.maximum(np.nanmin(re,axis=1),1e-6)
+        median=np.nanmedian(re,axis=1)
+    #the semicircle is taken between the high frequency intercept and the minimum of -Im(Z) in the 0.01-10 Hz range
+    rows=np.arange(len(re))
+    valley=spectra.mask & (spectra.freq>=0.01) & (spectra.freq<=10) & (minus_im>=0)
+    idx_valley=np.argmin(np.where(valley,minus_im,np.inf),axis=1)
+    R1=np.where(valley.any(axis=1),re[rows,idx_valley]-R0,median-R0)
+    R1=np.maximum(R1,0.1*R0)
+    #the apex of the semicircle is the maximum of -Im(Z) at higher frequencies than the valley
+    peak=spectra.mask & (spectra.freq>spectra.freq[rows,idx_valley][:,None])
+    idx_peak=np.argmax(np.where(peak,minus_im,-np.inf),axis=1)
+    C1=1/(np.maximum(omega[rows,idx_peak],1e-6)*R1)
+    idx_low=spectra.mask.sum(axis=1)-1
+    w_low=omega[rows,idx_low]
+    im_low=np.maximum(minus_im[rows,idx_low],1e-6)
+    alpha=np.full(len(re),0.8)
+    Q=1/(im_low*w_low**alpha)
+    sigma=im_low*np.sqrt(w_low)
+    values={'R0':R0,'R1':R1,'Rct':R1,'C1':C1,'Q':Q,'alpha':alpha,'sigma':sigma}
+    theta=np.empty((len(re),len(CIRCUITS[circuit])))
+    for k,(name,unit,kind) in enumerate(CIRCUITS[circuit]):
+        if kind=='exponent':
+            theta[:,k]=np.log(values[name]/(1-values[name]))
+        else:
+            theta[:,k]=np.log(values[name])
+    theta[~spectra.mask.any(axis=1)]=0
+    return theta
+
+
+def fit_equivalent_circuit(spectra,circuit='R-RC-CPE',max_iter=200,tol=1e-10):
+    '''Fit an equivalent circuit to every spectrum at once with a batched Levenberg-Marquardt least-squares solve
+
+       The residual of each point is weighted by 1/|Z| (modulus weighting). All the cells are iterated together: the
+       model, the finite-difference jacobian and the normal equations are computed on the whole (cells x points) arrays.
+
+       Parameters
+       ----------
+       spectra : Spectra
+           Aligned impedance spectra (see load_spectra)
+       circuit : string
+           Equivalent circuit: 'R-RC', 'R-RC-CPE' or 'Randles' (see circuit_impedance)
+       max_iter : int
+           Maximum number of iterations
+       tol : float
+           A cell is converged when an accepted step decreases the cost by less than tol (relative), or when the gradient of the
+           cost is below tol or the cost below tol**2 (exact fit)
+
+       Return
+       -------
+       df_fit: dataFrame
+           One row per cell: the circuit parameters (resistances in mOhm), the relative RMS error, the convergence flag and the
+           status of the fit: OK (converged), STALLED (no step decreases the cost any more, even with the largest damping, while
+           the gradient is not negligible: the parameters are the last accepted ones, not a minimum), MAXITER (max_iter reached)
+           or NO_DATA (spectrum without points, NaN parameters)'''
+    if circuit not in CIRCUITS:
+        raise ValueError('Unknown circuit '+str(circuit)+', choose among '+', '.join(CIRCUITS))
+    mask=spectra.mask
+    omega=np.where(mask,2*np.pi*np.nan_to_num(spectra.freq,nan=1.0),1.0)
+    Z_data=np.where(mask,spectra.Z,1.0)
+    weight=np.where(mask,1/np.abs(Z_data),0.0)
+
+    def residual(theta):
+        #trial steps may overflow; their cost is not finite and they are rejected
+        with np.errstate(over='ignore',invalid='ignore',divide='ignore'):
+            Z_model=circuit_impedance(circuit,_to_params(circuit,theta),omega)
+            diff=(Z_model-Z_data)*weight
+        return np.concatenate((diff.real,diff.imag),axis=1)
+
+    theta=_initial_guess(circuit,spectra)
+    n_cell,n_param=theta.shape
+    lam=np.full(n_cell,1e-2)
+    r=residual(theta)
+    cost=np.sum(r**2,axis=1)
+    converged=np.zeros(n_cell,dtype=bool)
+    stalled=np.zeros(n_cell,dtype=bool)
+    empty=~mask.any(axis=1)
+    h=1e-6
+    for iteration in range(max_iter):
+        #jacobian by forward differences, one batched model evaluation per parameter
+        J=np.empty((n_cell,r.shape[1],n_param))
+        for k in range(n_param):
+            theta_h=theta.copy()
+            theta_h[:,k]+=h
+            J[:,:,k]=(residual(theta_h)-r)/h
+        A=np.einsum('nmi,nmj->nij',J,J)
+        g=np.einsum('nmi,nm->ni',J,r)
+        #minimum reached: negligible gradient or exact fit
+        converged|=~empty & ~stalled & ((np.max(np.abs(g),axis=1)<=tol) | (cost<=tol**2))
+        if (converged | stalled | empty).all():
+            break
+        diag=np.einsum('nii->ni',A)
+        A_damped=A+(lam[:,None]*np.maximum(diag,1e-12))[:,:,None]*np.eye(n_param)
+        delta=-np.linalg.solve(A_damped,g[:,:,None])[:,:,0]
+        done=converged | stalled | empty
+        delta[done]=0
+        theta_new=theta+delta
+        r_new=residual(theta_new)
+        cost_new=np.sum(r_new**2,axis=1)
+        better=np.isfinite(cost_new) & (cost_new<cost) & ~done
+        converged|=better & (((cost-cost_new)<=tol*cost) | (np.max(np.abs(delta),axis=1)<=tol))
+        theta[better]=theta_new[better]
+        r[better]=r_new[better]
+        cost[better]=cost_new[better]
+        lam=np.where(better,lam/3,lam*2)
+        stalled|=(lam>1e12) & ~converged & ~empty        #the damping cannot grow any more: the fit is stopped, not converged
+        if (converged | stalled | empty).all():
+            break
+
+    params=_to_params(circuit,theta)
+    params[empty]=np.nan
+    df_fit=pd.DataFrame({'Cell':spectra.names})
+    for k,(name,unit,kind) in enumerate(CIRCUITS[circuit]):
+        column=name if unit=='' else name+' ('+unit+')'
+        df_fit[column]=params[:,k]*1000 if kind=='R' else params[:,k]
+    df_fit['Relative RMS error']=np.where(empty,np.nan,np.sqrt(cost/np.maximum(2*mask.sum(axis=1),1)))
+    df_fit['Converged']=converged
+    df_fit['Fit status']=np.select([converged,stalled,empty],['OK','STALLED','NO_DATA'],'MAXITER')
+    return df_fit
+
+
+def impedance_table(battery_group,circuit='R-RC-CPE'):
+    '''Characteristic resistances and equivalent-circuit parameters of every cell of a Battery_group
+
+       Return
+       -------
+       df: dataFrame
+           One row per cell with the Hioki resistance, R_hf, R_mf, R_t and the fitted parameters of the circuit'''
+    spectra=load_spectra(battery_group)
+    hioki={battery.name:battery.Hioki_R for battery in battery_group.battery_list}
+    df=spectra.characteristic_resistances()
+    df.insert(1,'Hioki R',df['Cell'].map(hioki))
+    return df.merge(fit_equivalent_circuit(spectra,circuit),on='Cell')
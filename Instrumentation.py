@@ -0,0 +1,116 @@
+###IMPORT
+import logging
+import time
+import tracemalloc
+
+import pandas as pd
+
+###LOGGER
+#Logger of the entropy pipeline: the messages of each SOC are at the DEBUG level, the progress at the INFO level
+logger=logging.getLogger('Entropy_RPT')
+
+
+def set_log_level(level):
+    '''Display the messages of the entropy pipeline from the given level (ex: logging.DEBUG, logging.INFO, 'WARNING')'''
+    if not logger.handlers:
+        handler=logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+###CLASS AND METHODS
+
+class Instrumentation:
+    '''A class used to receive the events of the entropy pipeline. This base class records nothing and is used by default.
+
+    Methods
+    -------
+    start(stage,SOC)
+        A stage starts (SOC=None for the stages of the whole experiment)
+    stop(evaluations)
+        The last started stage ends, after evaluations evaluations of a fitting function
+    progress(done,total,message)
+        done units of work out of total are finished'''
+
+    def start(self,stage,SOC=None):
+        pass
+
+    def stop(self,evaluations=0):
+        pass
+
+    def progress(self,done,total,message=''):
+        pass
+
+
+class Recorder(Instrumentation):
+    '''A class used to record the wall time, the number of fit evaluations and the memory of each stage and SOC of the pipeline
+
+    Attributes
+    ----------
+    records : list of tuple
+        (stage, SOC, wall time (s), evaluations, memory allocated at the end (MB), peak memory (MB)) of each finished stage
+    progress_callback : callable
+        Function called as progress_callback(done,total,message) after each SOC, otherwise None (ex: update of a progress bar)
+    trace_memory : bool
+        True: the memory of each stage is traced with tracemalloc (slower), False: the memory columns are NaN'''
+
+    def __init__(self,progress_callback=None,trace_memory=False,log_level=None):
+        '''Parameters
+           ----------
+            progress_callback : callable
+                Function called as progress_callback(done,total,message) after each SOC, otherwise None
+            trace_memory : bool
+                True: the memory of each stage is traced with tracemalloc (slower)
+            log_level : int or string
+                Level of the messages of the pipeline (see set_log_level), otherwise None (level not changed)'''
+        self.records=[]
+        self.progress_callback=progress_callback
+        self.trace_memory=trace_memory
+        self._stack=[]
+        if log_level is not None:
+            set_log_level(log_level)
+
+    def start(self,stage,SOC=None):
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            #the peak is reset for the new stage; the peak reached so far is kept by the parent stage
+            if self._stack:
+                self._stack[-1]['peak']=max(self._stack[-1]['peak'],tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append({'stage':stage,'SOC':SOC,'start':time.perf_counter(),'peak':0})
+
+    def stop(self,evaluations=0):
+        frame=self._stack.pop()
+        seconds=time.perf_counter()-frame['start']
+        current=peak=float('nan')
+        if self.trace_memory:
+            current_bytes,peak_bytes=tracemalloc.get_traced_memory()
+            peak_bytes=max(peak_bytes,frame['peak'])
+            if self._stack:
+                self._stack[-1]['peak']=max(self._stack[-1]['peak'],peak_bytes)
+            current,peak=current_bytes/1e6,peak_bytes/1e6
+        self.records.append((frame['stage'],frame['SOC'],seconds,evaluations,current,peak))
+        logger.debug('%s%s: %.4f s, %d evaluations',frame['stage'],'' if frame['SOC'] is None else ' SOC'+str(frame['SOC']),seconds,evaluations)
+
+    def progress(self,done,total,message=''):
+        logger.info('%s %d/%d',message,done,total)
+        if self.progress_callback is not None:
+            self.progress_callback(done,total,message)
+
+    def __getstate__(self):
+        #the callback (ex: a lambda or a progress bar) is not sent to the worker processes (see Report.render_report)
+        state=self.__dict__.copy()
+        state['progress_callback']=None
+        return state
+
+    def to_dataframe(self):
+        '''Return the records as a dataFrame (columns Stage, SOC, Time (s), Evaluations, Memory (MB), Peak memory (MB))'''
+        return pd.DataFrame(self.records,columns=['Stage','SOC','Time (s)','Evaluations','Memory (MB)','Peak memory (MB)'])
+
+    def summary(self):
+        '''Return the total time and evaluations, and the maximum peak memory of each stage, sorted by decreasing total time'''
+        df=self.to_dataframe()
+        summary=df.groupby('Stage').agg(**{'Calls':('Time (s)','size'),'Total time (s)':('Time (s)','sum'),'Mean time (s)':('Time (s)','mean'),
+                                           'Evaluations':('Evaluations','sum'),'Peak memory (MB)':('Peak memory (MB)','max')})
+        return summary.sort_values('Total time (s)',ascending=False)
@@ -0,0 +1,298 @@
+###IMPORT
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from Class_method import read_basytec_file
+from Instrumentation import logger
+
+###CONSTANTS
+F=96485.3415     #Faraday's number in J.mol-1.V-1
+LOCK_IN_COLUMN='Lock-in Entropy [J mol-1 K-1]'      #column of the entropy in df_entropy_data
+
+###FUNCTIONS
+
+def relaxation_arrays(df_basytec,channel,setup,settle=0.0):
+    '''Split a Basytec file in SOCs (same segmentation as Experiment.entropy_coefficient) and gather the relaxation data of all
+       the SOCs in padded arrays
+
+       Parameters
+       ----------
+       df_basytec : dataFrame
+           Content of the Basytec file
+       channel : Channel
+       setup : int
+           Work station: 1 (voltage in mV) / BatLab :2 (voltage in V)
+       settle : float
+           Time removed at the start of each relaxation, where the overpotential of the pulse decays quickly (Unit: min)
+
+       Return
+       -------
+       time, voltage, temperature : array (number of SOC x maximum number of samples)
+           Relaxation data of each SOC (Unit: h, V, °C), padded with NaN
+       capacity : array
+           Capacity reference of each SOC: |Ah| on the last relaxation row (Unit: Ah)
+       start : array
+           Time of the first relaxation row of each SOC, before the settle time (Unit: h)'''
+    count=df_basytec['Count'].values
+    SOC_total=int(count[-1])
+    index_list=np.flatnonzero(count!=df_basytec['Cyc-Count'].values)
+    #the SOC i lies between the (i-1)th and the ith rows where Count and Cyc-Count differ, the last one ends on the last of them
+    bounds=np.concatenate(([0],index_list[:SOC_total]))
+    relax=df_basytec['I[A]'].values==0.0
+    all_time=df_basytec['~Time[h]'].values.astype(float)
+    all_voltage=df_basytec[channel.OCV].values.astype(float)/(1000 if setup==1 else 1)
+    all_temperature=df_basytec[channel.thermo].values.astype(float)
+    all_capacity=np.abs(df_basytec['Ah[Ah]'].values.astype(float))
+    rows=[]
+    start=np.full(SOC_total,np.nan)
+    for i in range(SOC_total):
+        SOC_rows=bounds[i]+np.flatnonzero(relax[bounds[i]:bounds[i+1]])
+        if len(SOC_rows)>0:
+            start[i]=all_time[SOC_rows[0]]
+            SOC_rows=SOC_rows[all_time[SOC_rows]>=all_time[SOC_rows[0]]+settle/60]
+        rows.append(SOC_rows)
+    n_max=max([len(SOC_rows) for SOC_rows in rows]+[1])
+    time,voltage,temperature=(np.full((SOC_total,n_max),np.nan) for k in range(3))
+    capacity=np.full(SOC_total,np.nan)
+    for i,SOC_rows in enumerate(rows):
+        time[i,:len(SOC_rows)]=all_time[SOC_rows]
+        voltage[i,:len(SOC_rows)]=all_voltage[SOC_rows]
+        temperature[i,:len(SOC_rows)]=all_temperature[SOC_rows]
+        if len(SOC_rows)>0:
+            capacity[i]=all_capacity[SOC_rows[-1]]
+    return time,voltage,temperature,capacity,start
+
+
+def modulation_frequencies(time,temperature,number_frequencies=1,minimum_periods=2):
+    '''Find the frequencies of the temperature modulation in the power spectrum of the thermocouple signal, summed over the SOCs
+
+       The signal of each SOC is detrended (straight line), padded with zeros to the longest SOC, and its FFT is computed in one
+       batch; the frequencies are the highest peaks of the summed spectrum, refined by parabolic interpolation.
+
+       Parameters
+       ----------
+       time, temperature : array (number of SOC x number of samples)
+           Relaxation data of each SOC (Unit: h, °C), padded with NaN, sampled at a constant period
+       number_frequencies : int
+           Number of sines of the modulation
+       minimum_periods : float
+           Minimum number of periods in the shortest relaxation: the slower components are not searched (drift)
+
+       Return
+       -------
+       frequencies : array
+           Frequencies of the modulation, by decreasing power (Unit: h-1)'''
+    valid=~np.isnan(time) & ~np.isnan(temperature)
+    n_valid=valid.sum(axis=1)
+    period=np.nanmedian(np.diff(time,axis=1))
+    n=time.shape[1]
+    #straight line of each SOC, least squares
+    t=np.where(valid,time-np.nanmean(time,axis=1,keepdims=True),0)
+    y=np.where(valid,temperature-np.nanmean(temperature,axis=1,keepdims=True),0)
+    slope=(t*y).sum(axis=1,keepdims=True)/np.maximum((t*t).sum(axis=1,keepdims=True),1e-30)
+    y=np.where(valid,y-slope*t,0)
+    n_fft=1<<int(np.ceil(np.log2(4*n)))       #zero padding: finer frequency grid
+    power=(np.abs(np.fft.rfft(y,n_fft,axis=1))**2).sum(axis=0)
+    frequency=np.fft.rfftfreq(n_fft,period)
+    shortest=n_valid[n_valid>0].min()*period
+    power[frequency<minimum_periods/shortest]=0
+    #local maxima, by decreasing power
+    peaks=np.flatnonzero((power[1:-1]>power[:-2]) & (power[1:-1]>=power[2:]))+1
+    peaks=peaks[np.argsort(power[peaks])[::-1][:number_frequencies]]
+    if len(peaks)<number_frequencies:
+        raise ValueError('No modulation found in the temperature of the relaxations')
+    #parabolic interpolation of the log power around each peak
+    left,middle,right=(np.log(power[peaks+k]+1e-300) for k in (-1,0,1))
+    offset=0.5*(left-right)/np.where(left-2*middle+right==0,-1e-30,left-2*middle+right)
+    return (peaks+np.clip(offset,-0.5,0.5))*(frequency[1]-frequency[0])
+
+
+def lock_in(time,voltage,temperature,frequencies,drift_order=5,start=None):
+    '''Demodulate the voltage against the temperature of every SOC at the frequencies of the modulation
+
+       For each SOC, the voltage and the temperature are fitted by least squares on the same basis: a polynomial drift of
+       drift_order in the logarithm of the time since the start of the relaxation (Legendre polynomials: the relaxation of the
+       pulse is close to linear in log time, and the slow changes of the chamber) and a cosine and a sine at each frequency. With the complex amplitudes V_k and T_k of the voltage and of the temperature at the
+       frequency k, dE/dT=sum(Re(V_k*conj(T_k)))/sum(|T_k|²): for an integer number of periods it is the ratio of the FFT bins,
+       and the least squares remove the leakage of the drift and of the incomplete periods. The normal equations of all the SOCs
+       are solved in one batch.
+
+       Parameters
+       ----------
+       time, voltage, temperature : array (number of SOC x number of samples)
+           Relaxation data of each SOC (Unit: h, V, °C), padded with NaN
+       frequencies : array
+           Frequencies of the modulation (Unit: h-1)
+       drift_order : int
+           Degree of the polynomial drift
+       start : array
+           Start of the relaxation of each SOC (Unit: h), otherwise None (first sample)
+
+       Return
+       -------
+       dEdT : array
+           In-phase ratio of the voltage and temperature modulations of each SOC (Unit: V.K-1)
+       error : array
+           Standard error of dEdT, from the residuals of the voltage (the noise of the thermocouple is not included) (Unit: V.K-1)
+       quadrature : array
+           Out-of-phase ratio (Unit: V.K-1): close to 0, otherwise the thermocouple lags behind the cell or the drift is not removed
+       amplitude : array
+           Amplitude of the temperature modulation, quadratic sum of the frequencies (Unit: K)
+       baseline : array (number of SOC x 2)
+           Drift of the voltage (Unit: V) and of the temperature (Unit: °C) at the end of each relaxation'''
+    frequencies=np.atleast_1d(np.asarray(frequencies,dtype=float))
+    valid=~np.isnan(time) & ~np.isnan(voltage) & ~np.isnan(temperature)
+    n_SOC=len(time)
+    n_drift=drift_order+1
+    p=n_drift+2*len(frequencies)
+    t_start=np.min(np.where(valid,time,np.inf),axis=1,keepdims=True)
+    if start is not None:
+        t_start=np.minimum(t_start,np.asarray(start,dtype=float)[:,None])
+    #log time scaled on [-1,1] for each SOC (conditioning of the polynomials), shifted by one sample from the start
+    t=np.where(valid,time-t_start,0)
+    shift=np.nanmedian(np.diff(time,axis=1))
+    log_time=np.log(t+shift)
+    log_min=np.min(np.where(valid,log_time,np.inf),axis=1,keepdims=True)
+    log_max=np.max(np.where(valid,log_time,-np.inf),axis=1,keepdims=True)
+    x=np.where(valid,2*(log_time-log_min)/np.where(log_max>log_min,log_max-log_min,1)-1,0)
+    phase=2*np.pi*t[:,:,None]*frequencies
+    X=np.concatenate((np.polynomial.legendre.legvander(x,drift_order),np.cos(phase),np.sin(phase)),axis=2)
+    X[~valid]=0
+    Y=np.stack((np.where(valid,voltage,0),np.where(valid,temperature,0)),axis=2)
+    n_valid=valid.sum(axis=1)
+    dEdT,error,quadrature,amplitude=(np.full(n_SOC,np.nan) for k in range(4))
+    baseline=np.full((n_SOC,2),np.nan)
+    fitted=n_valid>p+1
+    if not fitted.any():
+        return dEdT,error,quadrature,amplitude,baseline
+    X=X[fitted]
+    Y=Y[fitted]
+    G=np.einsum('snp,snq->spq',X,X)
+    coefficients=np.linalg.solve(G,np.einsum('snp,snk->spk',X,Y))
+    V=coefficients[:,n_drift:n_drift+len(frequencies),0]+1j*coefficients[:,n_drift+len(frequencies):,0]
+    T=coefficients[:,n_drift:n_drift+len(frequencies),1]+1j*coefficients[:,n_drift+len(frequencies):,1]
+    power=(np.abs(T)**2).sum(axis=1)
+    cross=(V*np.conj(T)).sum(axis=1)
+    dEdT[fitted]=cross.real/power
+    quadrature[fitted]=cross.imag/power
+    amplitude[fitted]=np.sqrt(power)
+    baseline[fitted]=coefficients[:,:n_drift,:].sum(axis=1)          #the Legendre polynomials are 1 at the end (x=1)
+    #standard error: gradient of dEdT against the coefficients of the voltage, covariance sigma²*inverse(G)
+    residual=Y[:,:,0]-np.einsum('snp,sp->sn',X,coefficients[:,:,0])
+    sigma2=(residual**2).sum(axis=1)/(n_valid[fitted]-p)
+    gradient=np.zeros((len(G),p))
+    gradient[:,n_drift:n_drift+len(frequencies)]=T.real/power[:,None]
+    gradient[:,n_drift+len(frequencies):]=T.imag/power[:,None]
+    error[fitted]=np.sqrt(sigma2*np.einsum('sp,sp->s',gradient,np.linalg.solve(G,gradient[:,:,None])[:,:,0]))
+    return dEdT,error,quadrature,amplitude,baseline
+
+
+class Lock_in_experiment:
+    '''
+    A class used to represent an entropy experiment with a continuous temperature modulation (sine or sum of sines) during the
+    relaxation of each SOC, instead of the temperature steps of Experiment
+
+    The entropy of each SOC is the in-phase ratio of the voltage and of the thermocouple temperature at the frequencies of the
+    modulation (see lock_in), after the removal of a polynomial drift: the relaxation does not need to be finished, and a few
+    periods give the precision of the steps in a shorter test.
+
+    Attributes
+    ----------
+    name : string
+       The name of the experiment (ex: Entropy )
+    experiment_type : int
+        The type of the experiment (Charge : 1 / Discharge :2 )
+    setup : int
+        The setup of the experiment ( Work station: 1 / BatLab :2)
+    battery : Battery
+        The battery of the experiment
+    channel : Channel
+        Channel of the experiment
+    temp_ref: float
+        Reference temperature, center of the modulation (Unit: °C)
+    basytec_file: string
+        path of the txt file from basytec software
+    frequencies : array
+        Frequencies of the modulation (Unit: h-1), given or found in the thermocouple signal (see modulation_frequencies)
+    drift_order : int
+        Degree of the polynomial drift in log time removed from each relaxation
+    settle : float
+        Time removed at the start of each relaxation (Unit: min)
+    title: str
+        Title of the experiment (ex: Entropy Discharge_LFP02 (lock-in_28C) )
+    df_entropy_data: dataFrame
+        One row per SOC: Charge/Discharge [mAh], OCV [V] at temp_ref, entropy, its standard error, quadrature (Unit: J.mol-1.K-1)
+        and amplitude of the temperature modulation (Unit: K)
+    '''
+
+    def __init__(self,name,experiment_type,setup,battery,channel,temp_ref,basytec_file,frequencies=None,number_frequencies=1,
+                 drift_order=5,settle=5.0,df_basytec=None):
+        '''Parameters
+           ----------
+            name, experiment_type, setup, battery, channel, temp_ref, basytec_file, drift_order, settle :
+                See the attributes
+            frequencies : list of float
+                Frequencies of the modulation programmed on the chamber (Unit: h-1), otherwise None (found in the thermocouple signal)
+            number_frequencies : int
+                Number of sines of the modulation, when the frequencies are not given
+            df_basytec : dataFrame
+                Content of basytec_file when it is already read, otherwise None (the file is read)'''
+        self.name=name
+        self.experiment_type=experiment_type
+        self.setup=setup
+        self.battery=battery
+        self.channel=channel
+        self.temp_ref=temp_ref
+        self.basytec_file=basytec_file
+        self.drift_order=drift_order
+        self.settle=settle
+        if df_basytec is None:
+            df_basytec=read_basytec_file(basytec_file,setup,channel,lean=True)
+        if self.experiment_type==1:
+            self.title=self.name+' Charge_'+self.battery.name+' (lock-in_'+str(self.temp_ref)+'C)'
+        else:
+            self.title=self.name+' Discharge_'+self.battery.name+' (lock-in_'+str(self.temp_ref)+'C)'
+        time,voltage,temperature,capacity,start=relaxation_arrays(df_basytec,channel,setup,settle)
+        if frequencies is None:
+            frequencies=modulation_frequencies(time,temperature,number_frequencies)
+            logger.info('%s: modulation at %s h-1',self.title,np.round(frequencies,4))
+        self.frequencies=np.atleast_1d(np.asarray(frequencies,dtype=float))
+        self.df_entropy_data=self.entropy_coefficient(time,voltage,temperature,capacity,start)
+
+    def entropy_coefficient(self,time,voltage,temperature,capacity,start):
+        '''Entropy of each SOC by lock-in demodulation, saved in a CSV file
+
+           Return
+           -------
+           df_entropy_data: dataFrame
+               See the attributes'''
+        dEdT,error,quadrature,amplitude,baseline=lock_in(time,voltage,temperature,self.frequencies,self.drift_order,start)
+        #voltage at the end of the relaxation, brought back to the reference temperature
+        OCV=baseline[:,0]-dEdT*(baseline[:,1]-self.temp_ref)
+        df_entropy_data=pd.DataFrame({'Charge/Discharge [mAh]':capacity,'OCV [V]   ':OCV,LOCK_IN_COLUMN:F*dEdT,'Error lock-in':F*error,
+                                      'Quadrature [J mol-1 K-1]':F*quadrature,'Temperature amplitude (K)':amplitude})
+        df_entropy_data.to_csv(self.title+'entropycoeff.csv',index=False)
+        return df_entropy_data
+
+    def SOC_axis(self):
+        '''Return the SOC (charge) or the depth of charge (discharge) of each SOC of the experiment, between 0 and 1'''
+        capacity=self.df_entropy_data['Charge/Discharge [mAh]']
+        if self.experiment_type==1:
+            return capacity/capacity.max()
+        return 1-(capacity/capacity.max())
+
+    def entropy_plot(self):
+        '''Plot the entropy profile with the standard error of each SOC'''
+        fig, ax = plt.subplots()
+        fig.suptitle(self.title)
+        ax.errorbar(self.SOC_axis(),self.df_entropy_data[LOCK_IN_COLUMN],yerr=self.df_entropy_data['Error lock-in'],color='teal',
+                    marker='x',capsize=2,label='Lock-in')
+        ax.set_xlabel('SOC')
+        if self.setup==2:
+            ax.set_xlim(1,0)
+        if self.setup==1:
+            ax.set_xlim(0,1)
+        ax.set_ylabel('Entropy (J.mol-1.K-1)')
+        ax.legend(prop={'size':12})
+        plt.show()
@@ -0,0 +1,169 @@
+###IMPORT
+import warnings
+
+import numpy as np
+from scipy.interpolate import PchipInterpolator
+
+###CONSTANTS
+HEADER_SIZE=3       #number of temperatures, number of SOC, method, at the start of a saved table
+
+###FUNCTIONS
+
+def _fill_rows(values,x):
+    '''Fill the NaN of each row of a 2-D array by linear interpolation on x (the values of the ends are kept outside)'''
+    filled=values.copy()
+    for row in filled:
+        valid=~np.isnan(row)
+        if valid.any() and not valid.all():
+            row[:]=np.interp(x,x[valid],row[valid])
+    return filled
+
+
+class Entropy_lookup_table:
+    '''A class used to represent the entropy coefficient of a cell gridded over the SOC and the temperature, for the charge
+    and the discharge, answering batched queries with vectorized interpolations
+
+    The table is built from the experiments of one or several Experiment_group: the profiles of the experiments with the same
+    direction and reference temperature are interpolated on the SOC grid and averaged. It can be saved in a single .npy file
+    which is memory-mapped when it is loaded (only the pages read by the queries are loaded from the disk).
+
+    Attributes
+    ----------
+    temperature : array
+        Reference temperatures of the grid, increasing (Unit: °C)
+    soc : array
+        SOC of the grid, increasing, between 0 and 1
+    values : array (2 x number of temperatures x number of SOC)
+        Entropy coefficient for the charge (index 0) and the discharge (index 1) (Unit: J.mol-1.K-1), NaN for a direction without data
+    derivatives : array (2 x number of temperatures x number of SOC)
+        Derivatives dS/dSOC of the monotone piecewise cubic (PCHIP) interpolation at each point of the grid
+    method : int
+        Method of the profiles (Method n° 1-4: method=1-4 / Bestfit: method=5 /Rawdata: method=6)
+    '''
+
+    def __init__(self,temperature,soc,values,derivatives=None,method=5):
+        self.temperature=temperature
+        self.soc=soc
+        self.values=values
+        if derivatives is None:
+            derivatives=np.full(values.shape,np.nan)
+            complete=np.isfinite(values).all(axis=-1)         #rows of a direction without data are NaN
+            if complete.any() and len(soc)>1:
+                derivatives[complete]=PchipInterpolator(soc,values[complete],axis=-1)(soc,1)
+        self.derivatives=derivatives
+        self.method=method
+
+    @classmethod
+    def build(cls,experiment_groups,method=5,grid=None):
+        '''Build the table from one or several Experiment_group
+
+           The points of the grid without data (SOC out of the range of the profiles, direction not measured at a temperature) are
+           filled by linear interpolation along the SOC, then along the temperature.
+
+           Parameters
+           ----------
+           experiment_groups : Experiment_group or list of Experiment_group
+           method : int
+               Method n° 1-4: method=1-4 / Bestfit: method=5 /Rawdata: method=6
+           grid : array
+               SOC grid between 0 and 1, otherwise None (101 points)'''
+        if not isinstance(experiment_groups,(list,tuple)):
+            experiment_groups=[experiment_groups]
+        if grid is None:
+            grid=np.linspace(0,1,101)
+        grid=np.asarray(grid,dtype=float)
+        profiles={}       #(direction index, temperature): list of profiles on the grid
+        for group in experiment_groups:
+            grid,group_profiles=group.SOC_grid_profiles(grid)
+            for experiment,profile in zip(group.experiment_list,group_profiles[method]):
+                profiles.setdefault((experiment.experiment_type-1,float(experiment.temp_ref)),[]).append(profile)
+        if not profiles:
+            raise ValueError('No experiment to build the lookup table')
+        temperature=np.array(sorted({key[1] for key in profiles}))
+        values=np.full((2,len(temperature),len(grid)),np.nan)
+        for (direction,temp_ref),rows in profiles.items():
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore',category=RuntimeWarning)      #SOC of the grid without any data: NaN
+                values[direction,np.searchsorted(temperature,temp_ref)]=np.nanmean(np.array(rows),axis=0)
+        for direction in range(2):
+            values[direction]=_fill_rows(values[direction],grid)                 #along the SOC
+            values[direction]=_fill_rows(values[direction].T,temperature).T     #along the temperature
+        return cls(temperature,grid,values,method=method)
+
+    def query(self,soc,temperature,direction=2,interpolation='linear'):
+        '''Entropy coefficient at any SOC and temperature, for arrays of queries
+
+           Parameters
+           ----------
+           soc : array
+               SOC between 0 and 1 (the values of the ends of the grid are kept outside of it)
+           temperature : array
+               Temperature (Unit: °C), broadcast with soc; the interpolation is linear between the reference temperatures and the
+               values of the ends are kept outside of them
+           direction : int
+               Charge : 1 / Discharge :2
+           interpolation : string
+               'linear': bilinear interpolation, 'pchip': monotone piecewise cubic along the SOC (no overshoot between the points
+               of the grid) and linear along the temperature
+
+           Return
+           -------
+           entropy : array
+               Entropy coefficient (Unit: J.mol-1.K-1)'''
+        if interpolation not in ('linear','pchip'):
+            raise ValueError("interpolation must be 'linear' or 'pchip'")
+        soc,temperature=np.broadcast_arrays(np.asarray(soc,dtype=float),np.asarray(temperature,dtype=float))
+        grid=self.soc
+        #position on the SOC grid
+        i=np.clip(np.searchsorted(grid,soc,side='right')-1,0,len(grid)-2)
+        h=grid[i+1]-grid[i]
+        t=(np.clip(soc,grid[0],grid[-1])-grid[i])/h
+        #position on the temperature grid
+        n_T=len(self.temperature)
+        if n_T==1:
+            j=np.zeros(soc.shape,dtype=int)
+            j1=j
+            w=np.zeros(soc.shape)
+        else:
+            j=np.clip(np.searchsorted(self.temperature,temperature,side='right')-1,0,n_T-2)
+            j1=j+1
+            w=np.clip((temperature-self.temperature[j])/(self.temperature[j1]-self.temperature[j]),0,1)
+        values=self.values[direction-1]
+        derivatives=self.derivatives[direction-1]
+
+        def along_soc(row):
+            y0=values[row,i]
+            y1=values[row,i+1]
+            if interpolation=='linear':
+                return y0+(y1-y0)*t
+            #cubic Hermite polynomial with the PCHIP derivatives
+            t2=t*t
+            t3=t2*t
+            return ((2*t3-3*t2+1)*y0+(t3-2*t2+t)*h*derivatives[row,i]+(-2*t3+3*t2)*y1+(t3-t2)*h*derivatives[row,i+1])
+
+        return (1-w)*along_soc(j)+w*along_soc(j1)
+
+    def save(self,path):
+        '''Save the table in a single .npy file (float64): header, temperatures, SOC grid, values, derivatives'''
+        header=np.array([len(self.temperature),len(self.soc),self.method],dtype=float)
+        np.save(path,np.concatenate((header,self.temperature,self.soc,np.ravel(self.values),np.ravel(self.derivatives))))
+
+    @classmethod
+    def load(cls,path,mmap=True):
+        '''Load a table saved by save
+
+           Parameters
+           ----------
+           path : string
+           mmap : bool
+               True: the file is memory-mapped and the arrays of the table are views of it, False: it is read in memory'''
+        data=np.load(path,mmap_mode='r' if mmap else None)
+        n_T,n_soc,method=(int(x) for x in data[:HEADER_SIZE])
+        size=2*n_T*n_soc
+        start=HEADER_SIZE
+        temperature=data[start:start+n_T]
+        soc=data[start+n_T:start+n_T+n_soc]
+        start+=n_T+n_soc
+        values=data[start:start+size].reshape(2,n_T,n_soc)
+        derivatives=data[start+size:start+2*size].reshape(2,n_T,n_soc)
+        return cls(temperature,soc,values,derivatives,method)
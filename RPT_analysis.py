@@ -0,0 +1,247 @@
+###IMPORT
+import numpy as np
+import pandas as pd
+
+###CONSTANTS
+
+#Reading parameters and columns (time, current, voltage) of each RPT file format, with the conversion
+#coefficients to hours, amperes and volts
+RPT_FORMATS={'mpt':{'read':{'header':104,'sep':'\t','encoding':'latin-1'},
+                    'columns':['time/s','I/mA','Ecell/V'],'conversion':[1/3600,1/1000,1]},      #BioLogic file
+             'csv':{'read':{'header':159},
+                    'columns':['Run Time (h)','Current (A)','Potential (V)'],'conversion':[1,1,1]},  #Novonix file
+             'txt':{'read':{'header':32,'encoding':'latin-1'},
+                    'columns':['~Time[h]','I[A]','U[V]'],'conversion':[1,1,1]}}                              #Basytec file
+
+###FUNCTIONS
+
+def RPT_format(RPT_file):
+    '''Return the format of a RPT file from its extension: 'mpt' (BioLogic), 'csv' (Novonix) or 'txt' (Basytec, any other extension)'''
+    extension=RPT_file[-3:]
+    return extension if extension in ('mpt','csv') else 'txt'
+
+
+def smooth(values,sigma):
+    '''Gaussian smoothing of a curve sampled on a regular grid; the NaN points at the ends of the curve are kept
+
+       Parameters
+       ----------
+       values : array
+       sigma : float
+           Standard deviation of the gaussian kernel (Unit: grid points), 0 for no smoothing'''
+    if sigma<=0:
+        return values
+    half=int(np.ceil(4*sigma))
+    kernel=np.exp(-0.5*(np.arange(-half,half+1)/sigma)**2)
+    valid=~np.isnan(values)
+    #normalised convolution: the points near the ends of the valid range are averaged over the valid points only
+    numerator=np.convolve(np.where(valid,values,0),kernel,mode='same')
+    denominator=np.convolve(valid.astype(float),kernel,mode='same')
+    with np.errstate(invalid='ignore',divide='ignore'):
+        return np.where(valid,numerator/denominator,np.nan)
+
+
+class RPT_result:
+    '''
+    A class used to represent the analysis of a RPT file
+
+    Attributes
+    ----------
+    steps : dataFrame
+        One row per step (charge, discharge or rest): cycle number, start and end time (h), mean current (A), start and end voltage (V),
+        capacity (Ah) and energy (Wh)
+    cycles : dataFrame
+        One row per cycle: charge and discharge capacity (Ah) and energy (Wh), coulombic and energy efficiency
+    ica : dataFrame
+        Incremental capacity dQ/dV (Unit: Ah/V) of each charge and discharge step (columns), on the common voltage grid (index)
+    dva : dataFrame
+        Differential voltage dV/dQ (Unit: V/Ah) of each charge and discharge step (columns), on the common capacity grid (index)
+    '''
+
+    def __init__(self,steps,ica,dva):
+        self.steps=steps
+        self.ica=ica
+        self.dva=dva
+        charge=steps[steps['Type']=='charge'].groupby('Cycle')[['Capacity (Ah)','Energy (Wh)']].sum()
+        discharge=steps[steps['Type']=='discharge'].groupby('Cycle')[['Capacity (Ah)','Energy (Wh)']].sum()
+        cycles=charge.add_prefix('Charge ').join(discharge.add_prefix('Discharge '),how='outer')
+        cycles['Coulombic efficiency']=cycles['Discharge Capacity (Ah)']/cycles['Charge Capacity (Ah)']
+        cycles['Energy efficiency']=cycles['Discharge Energy (Wh)']/cycles['Charge Energy (Wh)']
+        self.cycles=cycles
+
+    def ica_plot(self,steps=None):
+        '''Display the incremental capacity curves dQ/dV of the chosen steps (all the steps if None)'''
+        import matplotlib.pyplot as plt
+        fig,ax=plt.subplots()
+        for column in (self.ica.columns if steps is None else steps):
+            ax.plot(self.ica.index,self.ica[column],label='Step '+str(column))
+        ax.set_xlabel('Voltage (V)')
+        ax.set_ylabel('dQ/dV (Ah/V)')
+        ax.legend(prop={'size':12})
+        plt.show()
+
+    def dva_plot(self,steps=None):
+        '''Display the differential voltage curves dV/dQ of the chosen steps (all the steps if None)'''
+        import matplotlib.pyplot as plt
+        fig,ax=plt.subplots()
+        for column in (self.dva.columns if steps is None else steps):
+            ax.plot(self.dva.index,self.dva[column],label='Step '+str(column))
+        ax.set_xlabel('Capacity (Ah)')
+        ax.set_ylabel('dV/dQ (V/Ah)')
+        ax.legend(prop={'size':12})
+        plt.show()
+
+
+class _Step_accumulator:
+    '''Samples of the step in progress, kept only until the step ends (at most one step in memory)'''
+
+    def __init__(self):
+        self.time=[]
+        self.voltage=[]
+        self.charge=[]
+
+    def add(self,time,voltage,charge):
+        self.time.append(time)
+        self.voltage.append(voltage)
+        self.charge.append(charge)
+
+    def arrays(self):
+        return np.concatenate(self.time),np.concatenate(self.voltage),np.concatenate(self.charge)
+
+
+def _curves(voltage,charge,step_type,voltage_grid,capacity_grid,sigma):
+    '''Smoothed dQ/dV on the voltage grid and dV/dQ on the capacity grid of one charge or discharge step'''
+    #dQ/dV: the voltage is made monotonic (increasing for a charge, decreasing for a discharge) to be used as abscissa
+    if step_type=='charge':
+        v_monotonic,q=np.maximum.accumulate(voltage),charge
+    else:
+        v_monotonic,q=np.minimum.accumulate(voltage)[::-1],charge[::-1]
+    v_unique,idx=np.unique(v_monotonic,return_index=True)
+    q_on_v=np.interp(voltage_grid,v_unique,q[idx],left=np.nan,right=np.nan)
+    ica=np.abs(np.gradient(smooth(q_on_v,sigma),voltage_grid))
+    #dV/dQ against the capacity exchanged since the beginning of the step
+    q_from_start=np.maximum.accumulate(np.abs(charge-charge[0]))
+    q_unique,idx=np.unique(q_from_start,return_index=True)
+    v_on_q=np.interp(capacity_grid,q_unique,voltage[idx],left=np.nan,right=np.nan)
+    dva=np.abs(np.gradient(smooth(v_on_q,sigma),capacity_grid))
+    return ica,dva
+
+
+def analyse_RPT(battery,voltage_grid=None,capacity_grid=None,current_threshold=1e-3,min_curve_capacity=None,sigma=3,chunksize=200000):
+    '''Segment the RPT file of a battery in steps and cycles and compute the capacities, energies and dQ/dV, dV/dQ curves
+
+       The file is read in one streaming pass by chunks of rows: the step boundaries of a chunk are found with vectorized
+       comparisons of the current sign, the capacity and energy of the steps are summed with numpy reductions, and only
+       the samples of the step in progress are kept in memory.
+
+       Parameters
+       ----------
+       battery : Battery
+           Battery whose RPT file (BioLogic .mpt, Novonix .csv or Basytec) is analysed
+       voltage_grid : array
+           Common voltage grid of the dQ/dV curves (Unit: V), otherwise None (2.0 V to 4.5 V, 5 mV step)
+       capacity_grid : array
+           Common capacity grid of the dV/dQ curves (Unit: Ah), otherwise None (0 to 1.2 x nominal capacity, 500 points)
+       current_threshold : float
+           Current under which the battery is considered at rest (Unit: A)
+       min_curve_capacity : float
+           Minimum capacity of a step to compute its curves (Unit: Ah), otherwise None (5% of the nominal capacity)
+       sigma : float
+           Standard deviation of the gaussian smoothing of the curves (Unit: grid points)
+       chunksize : int
+           Number of rows read at once
+
+       Return
+       -------
+       result : RPT_result'''
+
+    file_format=RPT_FORMATS[RPT_format(battery.RPT_file)]
+    nominal=battery.nominal_capacity/1000      #mAh to Ah
+    if voltage_grid is None:
+        voltage_grid=np.arange(2.0,4.5+1e-9,0.005)
+    if capacity_grid is None:
+        capacity_grid=np.linspace(0,1.2*nominal,500)
+    if min_curve_capacity is None:
+        min_curve_capacity=0.05*nominal
+    names=['charge','rest','discharge']     #index: 1-sign of the current (state 1 charge, 0 rest, -1 discharge)
+
+    steps=[]
+    ica={}
+    dva={}
+    state=None          #type of the step in progress (-1 discharge, 0 rest, 1 charge)
+    step=None           #summary of the step in progress
+    samples=_Step_accumulator()
+    last=None           #last row of the previous chunk (time, current, voltage)
+    q_total=0.0         #charge exchanged since the beginning of the file
+    cycle=0
+    discharged=False    #True when a discharge happened in the current cycle
+
+    def close_step():
+        nonlocal cycle,discharged
+        step_type=names[1-step['state']]
+        if step_type=='charge' and discharged:      #a new cycle starts with the first charge after a discharge
+            cycle+=1
+            discharged=False
+        if step_type=='discharge':
+            discharged=True
+        number=len(steps)
+        mean_current=step['current']/step['duration'] if step['duration']>0 else 0.0
+        steps.append((number,cycle,step_type,step['start'],step['end'],mean_current,
+                      step['v_start'],step['v_end'],step['capacity'],step['energy']))
+        if step_type!='rest' and step['capacity']>=min_curve_capacity:
+            time,voltage,charge=samples.arrays()
+            ica[number],dva[number]=_curves(voltage,charge,step_type,voltage_grid,capacity_grid,sigma)
+
+    reader=pd.read_csv(battery.RPT_file,usecols=file_format['columns'],chunksize=chunksize,**file_format['read'])
+    for chunk in reader:
+        time,current,voltage=[chunk[column].values.astype(float)*k for column,k in zip(file_format['columns'],file_format['conversion'])]
+        chunk_state=np.where(current>current_threshold,1,np.where(current<-current_threshold,-1,0))
+        #charge and energy increments (trapezoid rule) between each row and the previous one, joined to the last row of the previous chunk
+        if last is None:
+            last=(time[0],current[0],voltage[0])
+        dt=np.diff(time,prepend=last[0])
+        i_mean=0.5*(current+np.concatenate(([last[1]],current[:-1])))
+        v_mean=0.5*(voltage+np.concatenate(([last[2]],voltage[:-1])))
+        dq=i_mean*dt
+        de=np.abs(i_mean*v_mean)*dt
+        charge=q_total+np.cumsum(dq)     #charge exchanged since the beginning of the file (Unit: Ah), used for the curves
+        q_total=charge[-1]
+        #vectorized boundaries: first row of each run of identical state inside the chunk
+        starts=np.concatenate(([0],np.flatnonzero(np.diff(chunk_state))+1))
+        ends=np.concatenate((starts[1:],[len(time)]))
+        #the increment before the first row of a new run belongs to the previous step
+        dq_run=np.add.reduceat(dq,starts)-dq[starts]
+        de_run=np.add.reduceat(de,starts)-de[starts]
+        dt_run=np.add.reduceat(dt,starts)-dt[starts]
+        for run,(start,end) in enumerate(zip(starts,ends)):
+            if step is not None and chunk_state[start]==state:        #the step continues from the previous chunk
+                dq_run[run]+=dq[start]
+                de_run[run]+=de[start]
+                dt_run[run]+=dt[start]
+            else:
+                if step is not None:        #the increment before the first row of the run closes the previous step
+                    step['current']+=dq[start]
+                    step['duration']+=dt[start]
+                    step['capacity']+=abs(dq[start])
+                    step['energy']+=de[start]
+                    close_step()
+                state=chunk_state[start]
+                samples=_Step_accumulator()
+                step={'state':state,'start':time[start],'v_start':voltage[start],'current':0.0,'duration':0.0,'capacity':0.0,'energy':0.0}
+            step['end']=time[end-1]
+            step['v_end']=voltage[end-1]
+            step['current']+=dq_run[run]
+            step['duration']+=dt_run[run]
+            step['capacity']+=abs(dq_run[run])
+            step['energy']+=de_run[run]
+            if state!=0:
+                samples.add(time[start:end],voltage[start:end],charge[start:end])
+        last=(time[-1],current[-1],voltage[-1])
+    if step is not None:
+        close_step()
+
+    df_steps=pd.DataFrame(steps,columns=['Step','Cycle','Type','Start (h)','End (h)','Mean current (A)','Start voltage (V)',
+                                         'End voltage (V)','Capacity (Ah)','Energy (Wh)']).set_index('Step')
+    df_ica=pd.DataFrame(ica,index=pd.Index(voltage_grid,name='Voltage (V)'))
+    df_dva=pd.DataFrame(dva,index=pd.Index(capacity_grid,name='Capacity (Ah)'))
+    return RPT_result(df_steps,df_ica,df_dva)
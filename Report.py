@@ -0,0 +1,193 @@
+###IMPORT
+import os
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+import pandas as pd
+
+from Class_method import Battery, Battery_group, Experiment, Experiment_group
+
+###FUNCTIONS
+
+def _ignore_warnings():
+    '''Ignore the warnings of plt.show() with the Agg backend and of the legends without labels'''
+    warnings.filterwarnings('ignore', message='.*non-interactive.*')
+    warnings.filterwarnings('ignore', message='.*No artists with labels.*')
+
+
+def _init_worker():
+    '''Switch the worker process to the non-interactive Agg backend so plt.show() does not open any window'''
+    matplotlib.use('Agg', force=True)
+    _ignore_warnings()
+
+
+def _file_name(text):
+    '''Return a file name without the characters forbidden by Windows or Linux'''
+    return re.sub(r'[\\/:*?"<>|°²]+', '_', text).strip()
+
+
+def experiment_figures(experiment, matlab_file=None):
+    '''List the standard figures of an experiment
+
+       Parameters
+       ----------
+       experiment : Experiment
+           The experiment to display
+       matlab_file : string
+           Path of the matlab file containing all the entropy data, otherwise None (no MATLAB comparison plots)
+
+       Return
+       -------
+       figures : list of tuple
+           List of (method name, arguments, file name without extension)'''
+
+    figures=[('OCV_temperature_plot',(),'OCV_temperature')]
+    for method in [0,5,6]:
+        figures.append(('entropy_plot',(method,),'Entropy_method'+str(method)))
+    figures.append(('enthalpy_plot',(0,),'Enthalpy_method0'))
+    for i in range(len(experiment.SOC_relax_list)):
+        figures.append(('SOC_plot',(i,),'SOC'+str(i)))
+        figures.append(('SOC_relax_fit_plot',(i,0),'SOC'+str(i)+'_relax_fit'))
+    if matlab_file is not None:
+        figures.append(('bestfit_entropy_matlab_plot',(matlab_file,),'MATLAB_bestfit'))
+        figures.append(('method_entropy_matlab_plot',(matlab_file,),'MATLAB_method'))
+        figures.append(('rawdata_entropy_matlab_plot',(matlab_file,),'MATLAB_rawdata'))
+    return figures
+
+
+def experiment_group_figures(experiment_group):
+    '''List the standard figures of a group of experiments (the figures of each experiment are not included)'''
+    figures=[('temperature_plot',(),'Temperature_profiles')]
+    for method in [1,2,3,4]:
+        figures.append(('entropy_plot',(method,),'Entropy_profiles_method'+str(method)))
+    return figures
+
+
+def battery_group_figures(battery_group):
+    '''List the standard figures of a group of batteries (the RPT figure of each battery is not included)'''
+    figures=[('Discharge_cap_plot',(),'Discharge_capacity'),
+             ('Discharge_cap_weight_plot',(),'Discharge_capacity_weight'),
+             ('Discharge_cap_weight_linear_regression',(),'Discharge_capacity_weight_regression')]
+    if all(battery.impedance_file!='' for battery in battery_group.battery_list):
+        figures.append(('Nyquist_impedance_plot',(),'Nyquist'))
+        figures.append(('comparaison_impedance_plot',(),'Resistance_comparison'))
+    return figures
+
+
+def _render(obj,figures,output_dir,formats,dpi):
+    '''Render a list of figures of one object in the current (worker) process and save them in output_dir
+
+       Return
+       -------
+       rows : list of tuple
+           (file name, saved files, error message) for each figure'''
+    import matplotlib.pyplot as plt
+    rows=[]
+    opened=set(plt.get_fignums())       #figures of the caller (render_report with n_jobs=0), neither saved nor closed
+    for method_name,args,file_name in figures:
+        saved=[]
+        error=''
+        try:
+            getattr(obj,method_name)(*args)
+            fig_numbers=[number for number in plt.get_fignums() if number not in opened]
+            for j,number in enumerate(fig_numbers):
+                suffix='' if len(fig_numbers)==1 else '_'+str(j+1)
+                for fmt in formats:
+                    path=os.path.join(output_dir,_file_name(file_name)+suffix+'.'+fmt)
+                    plt.figure(number).savefig(path,dpi=dpi,bbox_inches='tight')
+                    saved.append(path)
+        except Exception as exc:           #a missing file or a bad SOC must not stop the whole report
+            error=type(exc).__name__+': '+str(exc)
+        finally:
+            for number in plt.get_fignums():
+                if number not in opened:
+                    plt.close(number)
+        rows.append((file_name,saved,error))
+    return rows
+
+
+def _tasks(obj,output_dir,matlab_file):
+    '''Return the list of (object, figures, output directory) to render for an Experiment, Experiment_group, Battery or Battery_group'''
+    if isinstance(obj,Experiment):
+        return [(obj,experiment_figures(obj,matlab_file),output_dir)]
+    if isinstance(obj,Battery):
+        return [(obj,[('RPT_plot',(),'RPT_'+obj.name)],output_dir)]
+    if isinstance(obj,Experiment_group):
+        tasks=[(obj,experiment_group_figures(obj),output_dir)]
+        folders=set()
+        for experiment in {id(experiment):experiment for experiment in obj.experiment_list}.values():     #a member listed twice is rendered once
+            folder=_file_name(experiment.title)
+            number=1
+            while folder in folders:          #different experiments with the same title
+                number+=1
+                folder=_file_name(experiment.title)+'_'+str(number)
+            folders.add(folder)
+            tasks+=_tasks(experiment,os.path.join(output_dir,folder),None)
+        return tasks
+    if isinstance(obj,Battery_group):
+        tasks=[(obj,battery_group_figures(obj),output_dir)]
+        for battery in obj.battery_list:
+            if battery.RPT_file!='':
+                tasks+=_tasks(battery,output_dir,None)
+        return tasks
+    raise TypeError('Cannot build a report for an object of type '+type(obj).__name__)
+
+
+def render_report(obj,output_dir,formats=('png',),n_jobs=None,matlab_file=None,dpi=150,chunk_size=20):
+    '''Render all the standard figures of an experiment, a battery or a group to image files, without displaying them
+
+       The figures are drawn with the non-interactive Agg backend in a pool of worker processes. Each worker receives
+       the object once per chunk of figures, so reports with hundreds of SOC plots are built in parallel.
+
+       Parameters
+       ----------
+       obj : Experiment, Experiment_group, Battery or Battery_group
+           Object to report. For a group, the figures of each member are saved in a sub-folder
+       output_dir : string
+           Folder where the figures are saved (created if needed)
+       formats : tuple of string
+           Image formats (ex: ('png','svg'))
+       n_jobs : int
+           Number of worker processes, otherwise None (number of CPUs), 0 to render in the current process (ex: from a worker
+           process of Watcher): the Agg backend and the warning filters are used only during the call, the backend and the
+           figures of the caller are kept
+       matlab_file : string
+           Path of the matlab file for the MATLAB comparison plots of an experiment, otherwise None
+       dpi : int
+           Resolution of the raster images
+       chunk_size : int
+           Number of figures rendered by a worker for one transfer of the object
+
+       Return
+       -------
+       df_report : dataFrame
+           One row per figure with the saved files and the error message (empty string if the figure was saved)'''
+
+    jobs=[]
+    for task_obj,figures,task_dir in _tasks(obj,output_dir,matlab_file):
+        os.makedirs(task_dir,exist_ok=True)
+        for start in range(0,len(figures),chunk_size):
+            jobs.append((task_obj,figures[start:start+chunk_size],task_dir))
+
+    rows=[]
+    if n_jobs==0:
+        import matplotlib.pyplot as plt
+        backend=matplotlib.get_backend()
+        plt.switch_backend('Agg')
+        try:
+            with warnings.catch_warnings():
+                _ignore_warnings()
+                for task_obj,figures,task_dir in jobs:
+                    for file_name,saved,error in _render(task_obj,figures,task_dir,formats,dpi):
+                        rows.append((os.path.join(task_dir,file_name),saved,error))
+        finally:
+            plt.switch_backend(backend)
+        return pd.DataFrame(rows,columns=['Figure','Files','Error'])
+    with ProcessPoolExecutor(max_workers=n_jobs,initializer=_init_worker) as executor:
+        futures=[executor.submit(_render,task_obj,figures,task_dir,formats,dpi) for task_obj,figures,task_dir in jobs]
+        for (task_obj,figures,task_dir),future in zip(jobs,futures):
+            for file_name,saved,error in future.result():
+                rows.append((os.path.join(task_dir,file_name),saved,error))
+    return pd.DataFrame(rows,columns=['Figure','Files','Error'])
@@ -0,0 +1,286 @@
+###IMPORT
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from Class_method import Experiment, ENTROPY_COLUMNS
+from Impedance import read_impedance_file
+from Instrumentation import logger
+
+###CONSTANTS
+DEFAULT_PORT=8765       #port of the analysis server on localhost
+
+###FUNCTIONS
+
+def _json_values(values):
+    '''List of the values of an array, with None instead of NaN (JSON has no NaN)'''
+    return [None if value is None or (isinstance(value,float) and np.isnan(value)) else value for value in np.asarray(values).tolist()]
+
+
+class LRU_cache:
+    '''A thread-safe cache of the least recently used items, built on demand
+
+    The item of a key is built once even when several threads ask for it at the same time: the other threads wait for it.
+
+    Attributes
+    ----------
+    max_size : int
+        Maximum number of items, the least recently used item is evicted beyond it
+    hits, misses, evictions : int
+        Number of items found in the cache, built, and evicted
+    '''
+
+    def __init__(self,max_size):
+        self.max_size=max_size
+        self.hits=0
+        self.misses=0
+        self.evictions=0
+        self._items=OrderedDict()
+        self._lock=threading.Lock()
+        self._building={}        #key: lock of the thread building the item
+
+    def get(self,key,build):
+        '''Return the item of key, built with build() if it is not in the cache'''
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits+=1
+                return self._items[key]
+            building=self._building.setdefault(key,threading.Lock())
+        with building:
+            with self._lock:
+                if key in self._items:          #built by another thread in the meantime
+                    self._items.move_to_end(key)
+                    self.hits+=1
+                    return self._items[key]
+            item=build()
+            with self._lock:
+                self.misses+=1
+                self._items[key]=item
+                self._building.pop(key,None)
+                while len(self._items)>self.max_size:
+                    evicted,_=self._items.popitem(last=False)
+                    self.evictions+=1
+                    logger.debug('cache: %s evicted',evicted)
+        return item
+
+    def keys(self):
+        with self._lock:
+            return list(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def statistics(self):
+        '''Size, maximum size, hits, misses and evictions of the cache'''
+        with self._lock:
+            return {'size':len(self._items),'max_size':self.max_size,'hits':self.hits,'misses':self.misses,'evictions':self.evictions}
+
+
+class Analysis_service:
+    '''A class used to answer the queries of the analysis server, with the experiments kept warm in memory
+
+    The experiments are registered by name with the parameters of Experiment and built on the first query which needs them
+    (Experiment.shared: the same file and parameters are analysed once). The built experiments (parsed data, indexes of the
+    temperature levels and fitted results) are kept in a LRU cache of max_experiments, and the answers in a LRU cache of
+    max_results: a repeated query is answered without any computation.
+
+    The queries (see query) are the same with or without the HTTP server (see serve), ex: query('entropy',{'experiment':'X','method':3}).
+
+    Attributes
+    ----------
+    definitions : dict
+        Name: positional parameters of Experiment (name,experiment_type,setup,battery,channel,time_step,number_temperature_level,
+        temp_ref,Tsteps,basytec_file)
+    batteries : dict
+        Name: Battery, for the impedance queries
+    options : dict
+        Keyword parameters given to every Experiment (ex: checkpoint_dir, lean=True)
+    experiments : LRU_cache
+        Built experiments, by name
+    results : LRU_cache
+        Answers of the queries, by query and parameters
+    '''
+
+    def __init__(self,definitions=None,batteries=None,max_experiments=8,max_results=256,**options):
+        self.definitions=dict(definitions or {})
+        self.batteries=dict(batteries or {})
+        self.options=options
+        self.experiments=LRU_cache(max_experiments)
+        self.results=LRU_cache(max_results)
+        self.queries={'experiments':self.experiment_names,'entropy':self.entropy,'table':self.table,'residuals':self.residuals,
+                      'nyquist':self.nyquist,'status':self.status}
+
+    def register(self,name,*definition):
+        '''Register an experiment under name with the positional parameters of Experiment (built on the first query)'''
+        self.definitions[name]=definition
+
+    def experiment(self,name):
+        '''Return the experiment registered under name, built if it is not in the cache'''
+        if name not in self.definitions:
+            raise KeyError('Unknown experiment: '+str(name))
+        return self.experiments.get(name,lambda: Experiment.shared(*self.definitions[name],**self.options))
+
+    def warm(self,names=None):
+        '''Build the experiments of names (otherwise all the registered ones) before the first queries'''
+        for name in (self.definitions if names is None else names):
+            self.experiment(name)
+
+    def query(self,name,parameters):
+        '''Answer a query
+
+           Parameters
+           ----------
+           name : string
+               'experiments', 'entropy', 'table', 'residuals', 'nyquist' or 'status'
+           parameters : dict
+               Parameters of the query (see the method of the same name)
+
+           Return
+           -------
+           answer : dict
+               JSON-serializable answer'''
+        if name not in self.queries:
+            raise KeyError('Unknown query: '+str(name))
+        if name in ('experiments','status'):           #state of the service, never cached
+            return self.queries[name](**parameters)
+        key=(name,tuple(sorted((key,str(value)) for key,value in parameters.items())))
+        return self.results.get(key,lambda: self.queries[name](**parameters))
+
+    def experiment_names(self):
+        '''Registered experiments, and the ones which are built'''
+        return {'experiments':sorted(self.definitions),'loaded':self.experiments.keys()}
+
+    def entropy(self,experiment,method=5):
+        '''Entropy profile of an experiment
+
+           Parameters
+           ----------
+           experiment : string
+               Name of the experiment
+           method : int
+               Method n° 1-4: method=1-4 / Bestfit: method=5 /Rawdata: method=6'''
+        method=int(method)
+        if method not in ENTROPY_COLUMNS:
+            raise ValueError('method must be one of '+str(sorted(ENTROPY_COLUMNS)))
+        item=self.experiment(experiment)
+        return {'experiment':experiment,'title':item.title,'method':method,'soc':_json_values(item.SOC_axis().values),
+                'entropy':_json_values(item.df_entropy_data[ENTROPY_COLUMNS[method]].values)}
+
+    def table(self,experiment):
+        '''All the columns of df_entropy_data of an experiment'''
+        df=self.experiment(experiment).df_entropy_data
+        return {'experiment':experiment,'columns':{column:_json_values(df[column].values) for column in df.columns}}
+
+    def residuals(self,experiment,soc,method=None):
+        '''Relaxation data of a SOC with the estimated voltage and the residuals of a fitting method
+
+           Parameters
+           ----------
+           experiment : string
+               Name of the experiment
+           soc : int
+               Number of the SOC
+           method : int
+               Fitting method 1-4, otherwise None (bestfit method of the SOC)'''
+        item=self.experiment(experiment)
+        soc=int(soc)
+        if not 0<=soc<len(item.SOC_relax_list):
+            raise ValueError('soc must be between 0 and '+str(len(item.SOC_relax_list)-1))
+        if method is None:
+            method=item.df_entropy_data['Bestfit method'].values[soc]
+            if np.isnan(method):
+                raise ValueError('SOC '+str(soc)+' has no bestfit method (rejected or failed), give the method')
+        method=int(method)
+        if method not in (1,2,3,4):
+            raise ValueError('method must be 1, 2, 3 or 4')
+        SOC_df=item.SOC_relax_list[soc]
+        residual=SOC_df['Delta_E method n°'+str(method)+' (V)'].values
+        return {'experiment':experiment,'soc':soc,'method':method,'time':_json_values(SOC_df['~Time[h]'].values),
+                'voltage':_json_values(SOC_df['Agilent(V)'].values),
+                'estimation':_json_values(SOC_df['Volt estimation method n°'+str(method)+' (V)'].values),
+                'residual':_json_values(residual),'rms':float(np.sqrt(np.nanmean(residual**2))) if len(residual)>0 else None}
+
+    def nyquist(self,battery):
+        '''Impedance spectrum of a battery (see Impedance.read_impedance_file)'''
+        if battery not in self.batteries:
+            raise KeyError('Unknown battery: '+str(battery))
+        df=read_impedance_file(self.batteries[battery])
+        return {'battery':battery,'frequency':_json_values(df['freq/Hz'].values),'re':_json_values(df['Re(Z)/Ohm'].values),
+                '-im':_json_values(df['-Im(Z)/Ohm'].values)}
+
+    def status(self):
+        '''Statistics of the caches'''
+        return {'experiments':self.experiments.statistics(),'results':self.results.statistics()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    '''GET /<query>?<parameters>: JSON answer of Analysis_service.query, 404 for an unknown name, 400 for a wrong parameter'''
+
+    def do_GET(self):
+        url=urlparse(self.path)
+        parameters={key:values[-1] for key,values in parse_qs(url.query).items()}
+        try:
+            status,answer=200,self.server.service.query(url.path.strip('/') or 'experiments',parameters)
+        except KeyError as error:
+            status,answer=404,{'error':str(error.args[0]) if error.args else 'Not found'}
+        except (ValueError,TypeError) as error:
+            status,answer=400,{'error':str(error)}
+        except Exception as error:
+            logger.exception('query %s failed',self.path)
+            status,answer=500,{'error':repr(error)}
+        body=json.dumps(answer).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type','application/json')
+        self.send_header('Content-Length',str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self,format,*args):
+        logger.debug('server: '+format,*args)
+
+
+def _make_server(service,host,port):
+    '''HTTP/JSON server of an Analysis_service, one thread per request'''
+    server=ThreadingHTTPServer((host,port),_Handler)
+    server.daemon_threads=True
+    server.service=service
+    logger.info('analysis server on http://%s:%d',*server.server_address[:2])
+    return server
+
+
+def start_server(service,host='127.0.0.1',port=DEFAULT_PORT):
+    '''Start the HTTP/JSON server of an Analysis_service in a background thread
+
+       Parameters
+       ----------
+       service : Analysis_service
+       host : string
+           Address of the server, localhost by default (not reachable from the network)
+       port : int
+           Port of the server, 0 for a free port (see server.server_address)
+
+       Return
+       -------
+       server : ThreadingHTTPServer
+           Running server, stopped with server.shutdown()'''
+    server=_make_server(service,host,port)
+    threading.Thread(target=server.serve_forever,name='Analysis server',daemon=True).start()
+    return server
+
+
+def serve(service,host='127.0.0.1',port=DEFAULT_PORT):
+    '''Run the HTTP/JSON server of an Analysis_service until it is interrupted (Ctrl+C), ex:
+       serve(Analysis_service({'LFP02 discharge':('Entropy',2,2,LFP02,CH01,20,3,28,[28,28,25,22,28],'file.txt')}))'''
+    server=_make_server(service,host,port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,160 @@
+###IMPORT
+import numpy as np
+import pandas as pd
+
+from Class_method import Channel
+
+###CONSTANTS
+F=96485.3415     #Faraday's number in J.mol-1.V-1
+
+###FUNCTIONS
+
+def default_entropy_profile(soc):
+    '''Entropy profile used when none is given, shaped like a LFP cell (Unit: J.mol-1.K-1)'''
+    return -25+40*soc-12*np.exp(-((soc-0.15)/0.06)**2)+8*np.sin(3*np.pi*soc)
+
+
+def default_OCV(soc):
+    '''Open circuit voltage curve used by the generator, with the plateau of a LFP cell (Unit: V)'''
+    return 3.0+0.25*soc+0.02*np.tanh((soc-0.5)/0.08)-0.3*np.exp(-soc/0.03)+0.15*np.exp(-(1-soc)/0.03)
+
+
+def synthetic_channels(n_channels,setup=2):
+    '''Return the Channel objects matching the columns written by generate_basytec_file'''
+    channels=[]
+    for k in range(n_channels):
+        if setup==1:
+            channels.append(Channel('CH'+str(k).zfill(2),'MEM'+str(k+1).zfill(2)+'[C]','OCV'+str(k+1).zfill(2)+'[mV]'))
+        else:
+            channels.append(Channel('CH'+str(k).zfill(2),'MEM'+str(k+1).zfill(2)+'[C]','OCV'+str(k)+'[V]'))
+    return channels
+
+
+def generate_basytec_file(path,n_SOC=20,experiment_type=2,setup=2,Tsteps=[28,28,25,22,28],time_step=20,sampling_period=10,
+                          noise=2e-5,temperature_noise=0.01,n_channels=1,entropy=None,capacity=1.5,current=1.5,thermal_tau=120,seed=0,modulation=None):
+    '''Write a realistic Basytec entropy file with known entropy values
+
+       Each SOC is a current pulse followed by a relaxation during which the temperature follows the steps Tsteps (first order
+       thermal lag). The voltage is the OCV of the SOC, plus a relaxation overpotential decaying after the pulse, plus the
+       reversible term dE/dT*(T-Tsteps[0]) with dE/dT=entropy/F. The columns and the segmentation markers (Count, Cyc-Count,
+       State) are those read by Experiment. With a modulation, the temperature set point of the relaxation is a sum of sines around
+       Tsteps[0] instead of the steps (files of Lock_in.Lock_in_experiment).
+
+       Parameters
+       ----------
+       path : string
+           Path of the file written
+       n_SOC : int
+           Number of states of charge
+       experiment_type : int
+           Charge : 1 / Discharge :2
+       setup : int
+           Work station: 1 (voltage in mV, 12 header lines) / BatLab :2 (voltage in V, 32 header lines)
+       Tsteps : list
+           Temperature of the steps of each SOC (Unit: °C)
+       time_step : float
+           Duration of a temperature step (Unit: min)
+       sampling_period : float
+           Time between two rows (Unit: s)
+       noise : float
+           Standard deviation of the voltage noise (Unit: V)
+       temperature_noise : float
+           Standard deviation of the thermocouple noise (Unit: °C)
+       n_channels : int
+           Number of cells (OCV and temperature columns) logged in the file
+       entropy : callable, array or None
+           Entropy in function of the SOC (callable), or array (number of SOC) or (number of channels x number of SOC) (Unit: J.mol-1.K-1),
+           otherwise None (default_entropy_profile)
+       capacity : float
+           Capacity of the cells (Unit: Ah)
+       current : float
+           Current of the pulses (Unit: A)
+       thermal_tau : float
+           Time constant of the thermal lag (Unit: s)
+       seed : int
+           Seed of the random noise
+       modulation : list of tuple
+           (amplitude in °C, period in min) of each sine of the temperature set point during the relaxation, which keeps the
+           duration of the steps (time_step*len(Tsteps)), otherwise None (temperature steps)
+
+       Return
+       -------
+       df_truth : dataFrame
+           One row per channel and SOC: Channel, SOC, Charge/Discharge [mAh] (as computed by Experiment), Entropy [J mol-1 K-1]'''
+
+    rng=np.random.default_rng(seed)
+    dt=sampling_period/3600                                   #Unit: h
+    n_pulse=max(int(round(capacity/n_SOC/current/dt)),2)      #rows of a pulse
+    n_step=int(round(time_step*60/sampling_period))           #rows of a temperature step
+    n_relax=n_step*len(Tsteps)
+    n_segment=n_pulse+n_relax
+    sign=1 if experiment_type==1 else -1
+
+    #SOC reached after each pulse, for every channel
+    soc_pulse=np.arange(1,n_SOC+1)/(n_SOC+1)
+    soc=soc_pulse if experiment_type==1 else 1-soc_pulse
+    if entropy is None:
+        entropy=default_entropy_profile(soc)
+    elif callable(entropy):
+        entropy=entropy(soc)
+    entropy=np.broadcast_to(np.asarray(entropy,dtype=float),(n_channels,n_SOC))
+    dEdT=entropy/F
+
+    ##Rows of one segment (pulse + relaxation), the same for all SOCs
+    row=np.arange(n_segment)
+    in_pulse=row<n_pulse
+    relax_row=row-n_pulse
+    step_index=np.where(in_pulse,0,relax_row//n_step)
+    state=np.where(((row==0) | (~in_pulse & (relax_row%n_step==0))),0,1)
+    #temperature set point and first order response, step after step
+    t_in_step=np.where(in_pulse,row,relax_row%n_step)*sampling_period
+    temperature=np.full(n_segment,float(Tsteps[0]))
+    T_start=float(Tsteps[0])
+    for k,T_set in enumerate(Tsteps):
+        in_step=~in_pulse & (step_index==k)
+        temperature[in_step]=T_set+(T_start-T_set)*np.exp(-t_in_step[in_step]/thermal_tau)
+        T_start=temperature[in_step][-1]
+    if modulation is not None:
+        #set point: sum of sines from the end of the pulse, first order response sample after sample
+        t=np.maximum(relax_row,0)*sampling_period
+        T_set=float(Tsteps[0])+sum(amplitude*np.sin(2*np.pi*t/(period*60)) for amplitude,period in modulation)
+        T_set[in_pulse]=Tsteps[0]
+        decay=np.exp(-sampling_period/thermal_tau)
+        for k in range(1,n_segment):
+            temperature[k]=T_set[k]+(temperature[k-1]-T_set[k])*decay
+    t_relax=np.where(in_pulse,0,relax_row+1)*dt              #time since the end of the pulse
+
+    ##All the segments: n_SOC relaxations + the last pulse
+    n_rows=n_SOC*n_segment+n_pulse
+    segment=np.minimum(np.arange(n_rows)//n_segment,n_SOC)
+    r=np.arange(n_rows)-segment*n_segment
+    time=np.arange(n_rows)*dt
+    I=np.where(r<n_pulse,sign*current,0.0)
+    ah=sign*np.cumsum(np.abs(I))*dt
+    count=segment
+    cyc_count=segment.copy()
+    cyc_count[(r==0) & (segment>0)]-=1                        #new SOC: Count and Cyc-Count differ on the first row
+
+    df=pd.DataFrame({'~Time[h]':time,'Count':count,'Cyc-Count':cyc_count,'I[A]':I,'State':state[r],'Ah[Ah]':ah})
+    truth=[]
+    seg_soc=np.minimum(segment,n_SOC-1)
+    soc_now=soc[seg_soc]
+    for k,channel in enumerate(synthetic_channels(n_channels,setup)):
+        T=temperature[r]+rng.normal(0,temperature_noise,n_rows)
+        overpotential=0.015*np.exp(-t_relax[r]/0.1)+0.005/(1+t_relax[r]/0.5)
+        V=default_OCV(soc_now)+sign*overpotential+dEdT[k,seg_soc]*(temperature[r]-Tsteps[0])+rng.normal(0,noise,n_rows)
+        V=np.where(r<n_pulse,V+sign*0.03,V)                   #ohmic drop during the pulses
+        df[channel.thermo]=T
+        df[channel.OCV]=V*1000 if setup==1 else V
+        #capacity reference of Experiment: |Ah| on the last relaxation row of the SOC
+        last_row=np.arange(n_SOC)*n_segment+n_segment-1
+        truth.append(pd.DataFrame({'Channel':channel.name,'SOC':np.arange(n_SOC),'Charge/Discharge [mAh]':np.abs(ah[last_row]),
+                                   'Entropy [J mol-1 K-1]':entropy[k]}))
+
+    header_lines=12 if setup==1 else 32
+    with open(path,'w',encoding='latin-1',newline='\n') as file:
+        file.write('~Resultfile from synthetic Basytec generator\n')
+        for i in range(header_lines-1):
+            file.write('~\n')
+        df.to_csv(file,index=False,float_format='%.8g')
+    return pd.concat(truth,ignore_index=True)
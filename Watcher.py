@@ -0,0 +1,525 @@
+###IMPORT
+import fnmatch
+import heapq
+import itertools
+import json
+import os
+import queue
+import re
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from time import monotonic
+
+import pandas as pd
+
+from Class_method import Battery, Battery_group, Experiment, file_digest
+from Impedance import impedance_table
+from Instrumentation import logger
+from Report import render_report
+from RPT_analysis import analyse_RPT
+
+###CONSTANTS
+PATTERNS=('*.txt','*.mpt','*.csv')       #files watched: Basytec, BioLogic, Novonix
+STATE_FILE='watch_state.json'            #state of the files and jobs in the output folder, to restart the daemon
+DEFAULT_TSTEPS=(0,0,-3,-6,0)             #temperature steps relative to the reference temperature, when they are not given
+STAGES={'entropy':('analysis','report'),'rpt':('analysis','report'),'impedance':('analysis',)}     #stages of each kind of job
+
+###FUNCTIONS
+
+class Metadata_error(ValueError):
+    '''The metadata of a file cannot be inferred from its name and content nor found in the catalog'''
+
+
+def file_format(path):
+    '''Format of a data file: 'basytec' (.txt starting with a ~ header), 'biologic' (.mpt), 'novonix' (.csv), otherwise None'''
+    extension=os.path.splitext(path)[1].lower()
+    if extension=='.mpt':
+        return 'biologic'
+    if extension=='.csv':
+        return 'novonix'
+    if extension=='.txt':
+        with open(path,encoding='latin-1') as file:
+            if file.readline().startswith('~'):
+                return 'basytec'
+    return None
+
+
+def basytec_header(path):
+    '''Setup (Work station: 1, 12 header lines / BatLab: 2, 32 header lines) and columns of a Basytec file'''
+    with open(path,encoding='latin-1') as file:
+        header_lines=sum(1 for line in itertools.takewhile(lambda line: line.startswith('~'),itertools.islice(file,40)))
+    setup=2 if header_lines>32 else 1
+    return setup,list(pd.read_csv(path,header=32 if setup==2 else 12,encoding='latin-1',nrows=0).columns)
+
+
+def _number(pattern,text):
+    '''First number matched by the group of pattern in text (case insensitive, int when it has no decimals), otherwise None'''
+    match=re.search(pattern,text,re.IGNORECASE)
+    if match is None:
+        return None
+    number=float(match.group(1))
+    return int(number) if number.is_integer() else number
+
+
+def infer_metadata(path,channels=(),batteries=(),catalog=None):
+    '''Infer the jobs of a data file and their metadata from its name, its header and a catalog
+
+       The values of the catalog entries whose pattern matches the file name are used first. Otherwise, for a Basytec entropy
+       file, the direction ('charge'/'discharge'), the time of the steps ('15min') and the reference temperature ('38C') are read
+       in the file name, and the steps are DEFAULT_TSTEPS around the reference temperature; the channels are the ones named in the
+       file name ('CH07') or, otherwise, all the channels whose columns are in the file. The battery is the one whose name is in
+       the file name. A BioLogic file is an impedance spectrum when it has impedance columns, otherwise a RPT, like a Novonix file.
+
+       Parameters
+       ----------
+       path : string
+           Path of the data file
+       channels : list of Channel
+           Channels which can be logged in the Basytec files
+       batteries : list of Battery
+           Batteries which can be tested
+       catalog : dict
+           File name pattern (ex: 'Entropy_*_CH07.txt'): dict of metadata, with the keys kind ('entropy', 'rpt', 'impedance'),
+           name, experiment_type, time_step, temp_ref, Tsteps, battery (Battery or name), batteries (dict channel name: Battery
+           or name, for the files of several channels), channel (Channel or name) and the options of Experiment (options)
+
+       Return
+       -------
+       jobs : list of dict
+           One job per experiment or battery: kind, path, label and the parameters of the job (definition of the Experiment and
+           its options, or battery)'''
+    name=os.path.basename(path)
+    stem=os.path.splitext(name)[0]
+    metadata={}
+    for pattern,values in (catalog or {}).items():
+        if fnmatch.fnmatch(name,pattern):
+            metadata.update(values)
+    batteries={battery.name:battery for battery in batteries}
+
+    def battery_of(value):
+        if value is None:        #battery named in the file name, the longest name first (LFP10 before LFP1)
+            for battery_name in sorted(batteries,key=len,reverse=True):
+                if battery_name.lower() in name.lower():
+                    return batteries[battery_name]
+            return None
+        return value if isinstance(value,Battery) else batteries.get(value)
+
+    fmt=file_format(path)
+    if fmt is None:
+        raise Metadata_error(name+': unknown file format')
+    if fmt=='basytec':
+        kind=metadata.get('kind','entropy')
+    elif fmt=='biologic':
+        with open(path,encoding='latin-1') as file:
+            columns=next(itertools.islice(file,104,None),'')
+        kind=metadata.get('kind','impedance' if 'Re(Z)/Ohm' in columns else 'rpt')
+    else:
+        kind=metadata.get('kind','rpt')
+    if kind!='entropy':
+        battery=battery_of(metadata.get('battery'))
+        if battery is None:
+            raise Metadata_error(name+': battery not found')
+        return [{'kind':kind,'path':path,'label':stem,'battery':battery}]
+
+    setup,columns=basytec_header(path)
+    if 'experiment_type' in metadata:
+        experiment_type=metadata['experiment_type']
+    elif 'discharge' in name.lower():
+        experiment_type=2
+    elif 'charge' in name.lower():
+        experiment_type=1
+    else:
+        experiment_type=None
+    time_step=metadata.get('time_step',_number(r'(\d+(?:\.\d+)?)\s*min',name))
+    temp_ref=metadata.get('temp_ref',_number(r'(\d+(?:\.\d+)?)\s*(?:C|deg)(?![a-z])',name))
+    Tsteps=metadata.get('Tsteps',None if temp_ref is None else [temp_ref+step for step in DEFAULT_TSTEPS])
+    missing=[key for key,value in (('experiment_type',experiment_type),('time_step',time_step),('temp_ref',temp_ref)) if value is None]
+    if missing:
+        raise Metadata_error(name+': '+', '.join(missing)+' not found')
+    if 'channel' in metadata:
+        channel=metadata['channel']
+        file_channels=[channel] if not isinstance(channel,str) else [item for item in channels if item.name==channel]
+    else:
+        file_channels=[channel for channel in channels if channel.thermo in columns and channel.OCV in columns]
+        named=re.search(r'CH\d+',name,re.IGNORECASE)
+        if named is not None:
+            file_channels=[channel for channel in file_channels if channel.name.upper()==named.group(0).upper()]
+    if not file_channels:
+        raise Metadata_error(name+': no channel with its columns in the file')
+    jobs=[]
+    for channel in file_channels:
+        battery=battery_of(metadata.get('batteries',{}).get(channel.name,metadata.get('battery')))
+        if battery is None:
+            raise Metadata_error(name+': battery of '+channel.name+' not found')
+        definition=(metadata.get('name','Entropy'),experiment_type,setup,battery,channel,time_step,len(Tsteps)-2,temp_ref,list(Tsteps),path)
+        jobs.append({'kind':'entropy','path':path,'label':stem if len(file_channels)==1 else stem+'_'+channel.name,
+                     'definition':definition,'options':metadata.get('options',{})})
+    return jobs
+
+
+def run_stage(job,stage,output_dir,checkpoint_dir,options):
+    '''Run one stage of a job in the current (worker) process, in output_dir
+
+       The 'analysis' stage of an entropy job builds the Experiment with checkpoints: a job interrupted or retried is resumed from
+       the SOCs already fitted, and its 'report' stage loads the results without reading the file again.
+
+       Return
+       -------
+       summary : dict
+           Short summary of the stage (title, number of SOC or of steps, number of figures)'''
+    os.makedirs(output_dir,exist_ok=True)
+    os.chdir(output_dir)           #Experiment exports its CSV files in the working directory
+    kind=job['kind']
+    if kind=='entropy':
+        experiment=Experiment(*job['definition'],checkpoint_dir=checkpoint_dir,**dict(options,**job['options']))
+        if stage=='analysis':
+            return {'title':experiment.title,'SOC':len(experiment.df_entropy_data)}
+        df_report=render_report(experiment,os.path.join(output_dir,'figures'),n_jobs=0)
+        return {'figures':len(df_report),'figure errors':int((df_report['Error']!='').sum())}
+    battery=job['battery']
+    if kind=='rpt':
+        battery=Battery(battery.name,battery.nominal_capacity,battery.mass,battery.Hioki_R,job['path'],battery.impedance_file)
+        if stage=='analysis':
+            result=analyse_RPT(battery)
+            result.steps.to_csv(battery.name+'_RPT_steps.csv',index=False)
+            result.cycles.to_csv(battery.name+'_RPT_cycles.csv',index=False)
+            result.ica.to_csv(battery.name+'_ICA.csv')
+            result.dva.to_csv(battery.name+'_DVA.csv')
+            return {'steps':len(result.steps),'cycles':len(result.cycles)}
+        df_report=render_report(battery,os.path.join(output_dir,'figures'),n_jobs=0)
+        return {'figures':len(df_report),'figure errors':int((df_report['Error']!='').sum())}
+    battery=Battery(battery.name,battery.nominal_capacity,battery.mass,battery.Hioki_R,battery.RPT_file,job['path'])
+    df=impedance_table(Battery_group([battery],max_workers=1))
+    df.to_csv(battery.name+'_impedance.csv',index=False)
+    return {'cells':len(df)}
+
+
+class Watch_folder:
+    '''
+    A class used to represent a daemon which watches folders of data files and analyses the new files without manual steps
+
+    Each poll lists the files of the folders matching the patterns. A new or changed file is taken when its size and modification
+    time have not changed for settle seconds (the test is finished), then it is identified by the digest of its content (a
+    file already analysed under another name or touched again is not analysed twice). Its jobs are inferred (see infer_metadata)
+    and put in a bounded queue: when the queue is full, the poll waits (back-pressure), so the files are not read faster than
+    they are analysed. Worker threads run the stages of the jobs (analysis, report) in a pool of worker processes; a stage which
+    fails is retried after retry_delay, doubled at each attempt, up to max_retries times. The state of the files and jobs is
+    saved in output_dir (STATE_FILE) to restart the daemon where it stopped.
+
+    Attributes
+    ----------
+    folders : list of string
+        Watched folders (with their sub-folders)
+    output_dir : string
+        Folder of the results: one sub-folder per job (label and digest of the file), the checkpoints and the state
+    channels, batteries, catalog :
+        See infer_metadata
+    patterns : tuple of string
+        File name patterns watched
+    poll_interval : float
+        Time between two polls (Unit: s)
+    settle : float
+        Time without change of a file before it is analysed (Unit: s)
+    max_workers : int
+        Number of worker processes (jobs run at the same time)
+    max_retries : int
+        Number of retries of a failed stage
+    retry_delay : float
+        Delay before the first retry (Unit: s)
+    report : bool
+        True: the figures of each job are saved after its analysis (see Report.render_report)
+    options : dict
+        Keyword parameters given to every Experiment (ex: lean=True, decimation=300)
+    files : dict
+        Path: state of each file (size, modification time, digest, status, error, jobs)
+    jobs : dict
+        Label: state of each job (path, kind, stage, status, attempts, error, output folder, summary)
+    '''
+
+    def __init__(self,folders,output_dir,channels=(),batteries=(),catalog=None,patterns=PATTERNS,poll_interval=10,settle=60,
+                 max_workers=2,queue_size=4,max_retries=3,retry_delay=60,report=True,**options):
+        '''Parameters
+           ----------
+            queue_size : int
+                Maximum number of jobs waiting for a worker
+            Other parameters : see the attributes'''
+        self.folders=[folders] if isinstance(folders,str) else list(folders)
+        self.output_dir=output_dir
+        self.channels=list(channels)
+        self.batteries=list(batteries)
+        self.catalog=catalog
+        self.patterns=patterns
+        self.poll_interval=poll_interval
+        self.settle=settle
+        self.max_workers=max_workers
+        self.max_retries=max_retries
+        self.retry_delay=retry_delay
+        self.report=report
+        self.options=options
+        self.checkpoint_dir=os.path.join(output_dir,'checkpoints')
+        os.makedirs(self.checkpoint_dir,exist_ok=True)
+        self.files={}
+        self.jobs={}
+        self._lock=threading.RLock()
+        self._queue=queue.Queue(maxsize=queue_size)
+        self._retries=[]                      #heap of (time of the retry, counter, job)
+        self._counter=itertools.count()
+        self._changing={}                     #path: (size, modification time, first time seen with them)
+        self._running=0
+        self._stop=threading.Event()
+        self._threads=[]
+        self._executor=None
+        self.load_state()
+
+    ##State
+    def load_state(self):
+        '''Load the state saved by a previous run: the finished files are not analysed again, the unfinished ones are taken
+           again at the next poll (the entropy jobs are resumed from their checkpoints)'''
+        path=os.path.join(self.output_dir,STATE_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path,encoding='utf-8') as file:
+            state=json.load(file)
+        self.files=state['files']
+        self.jobs=state['jobs']
+        for record in self.files.values():
+            if record['status'] in ('queued','running'):
+                record['status']='changed'
+        for record in self.jobs.values():
+            if record['status'] in ('queued','running','retry'):
+                record['status']='interrupted'
+
+    def save_state(self):
+        '''Save the state of the files and jobs atomically (temporary file renamed)'''
+        path=os.path.join(self.output_dir,STATE_FILE)
+        temporary=path+'.'+uuid.uuid4().hex+'.tmp'
+        with self._lock:
+            with open(temporary,'w',encoding='utf-8') as file:
+                json.dump({'files':self.files,'jobs':self.jobs},file,indent=1)
+            os.replace(temporary,path)
+
+    def status(self):
+        '''State of the jobs
+
+           Return
+           -------
+           df: dataFrame
+               One row per job: label, file, kind, stage, status, attempts, error, output folder'''
+        with self._lock:
+            rows=[(label,record['path'],record['kind'],record['stage'],record['status'],record['attempts'],record['error'],record['output'])
+                  for label,record in self.jobs.items()]
+        return pd.DataFrame(rows,columns=['Job','File','Kind','Stage','Status','Attempts','Error','Output'])
+
+    ##Discovery
+    def candidates(self):
+        '''Paths of the files of the watched folders matching the patterns (the output folder is skipped)'''
+        output_dir=os.path.abspath(self.output_dir)
+        for folder in self.folders:
+            for root,dirs,files in os.walk(folder):
+                dirs[:]=[item for item in dirs if os.path.abspath(os.path.join(root,item))!=output_dir]
+                for name in sorted(files):
+                    if any(fnmatch.fnmatch(name,pattern) for pattern in self.patterns):
+                        yield os.path.abspath(os.path.join(root,name))
+
+    def poll(self):
+        '''List the watched files once and queue the jobs of the new and changed files which are stable
+
+           Return
+           -------
+           number : int
+               Number of files whose jobs were queued'''
+        number=0
+        with self._lock:           #content already analysed or in progress
+            known_digests={record['digest'] for record in self.files.values() if record['status'] in ('queued','done')}
+        for path in self.candidates():
+            if self._stop.is_set():
+                break
+            try:
+                stat=os.stat(path)
+            except OSError:                #removed since the listing
+                continue
+            fingerprint=(stat.st_size,stat.st_mtime_ns)
+            record=self.files.get(path)
+            if record is not None and (record['size'],record['mtime'])==fingerprint and record['status']!='changed':
+                continue
+            #stable: same size and modification time for settle seconds
+            changing=self._changing.get(path)
+            if changing is None or changing[:2]!=fingerprint:
+                self._changing[path]=fingerprint+(monotonic(),)
+                if self.settle>0:
+                    continue
+            elif monotonic()-changing[2]<self.settle:
+                continue
+            del self._changing[path]
+            digest=file_digest(path)
+            record={'size':stat.st_size,'mtime':stat.st_mtime_ns,'digest':digest,'status':'queued','error':'','jobs':[]}
+            if digest in known_digests:
+                record['status']='duplicate'
+                with self._lock:
+                    self.files[path]=record
+                logger.info('%s: already analysed',path)
+                continue
+            try:
+                jobs=infer_metadata(path,self.channels,self.batteries,self.catalog)
+            except Metadata_error as error:
+                record['status']='no metadata'
+                record['error']=str(error)
+                with self._lock:
+                    self.files[path]=record
+                logger.warning('%s',error)
+                continue
+            with self._lock:
+                self.files[path]=record
+                known_digests.add(digest)
+                for job in jobs:
+                    job['label']=job['label']+'_'+digest[:8]
+                    job['stage']=0
+                    record['jobs'].append(job['label'])
+                    self.jobs[job['label']]={'path':path,'kind':job['kind'],'stage':STAGES[job['kind']][0],'status':'queued','attempts':0,
+                                             'error':'','output':os.path.join(os.path.abspath(self.output_dir),job['label']),'summary':{}}
+            self.save_state()
+            for job in jobs:
+                self._put(job)
+            logger.info('%s: %d job(s) queued',path,len(jobs))
+            number+=1
+        return number
+
+    def _put(self,job):
+        '''Put a job in the queue, waiting while it is full (back-pressure), unless the daemon stops'''
+        while not self._stop.is_set():
+            try:
+                self._queue.put(job,timeout=0.2)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _release_retries(self):
+        '''Queue the jobs whose retry time has come'''
+        while True:
+            with self._lock:
+                if not self._retries or self._retries[0][0]>monotonic():
+                    return
+                job=heapq.heappop(self._retries)[2]
+            self._put(job)
+
+    ##Execution
+    def _submit(self,job,stage):
+        '''Run a stage of a job in the pool of worker processes (the pool is created again if a worker died)'''
+        with self._lock:
+            if self._executor is None:
+                self._executor=ProcessPoolExecutor(max_workers=self.max_workers)
+            executor=self._executor
+        try:
+            return executor.submit(run_stage,job,stage,self.jobs[job['label']]['output'],os.path.abspath(self.checkpoint_dir),
+                                   self.options).result()
+        except BrokenProcessPool:
+            with self._lock:
+                if self._executor is executor:
+                    self._executor=None
+            executor.shutdown(wait=False)
+            raise
+
+    def _work(self):
+        '''Loop of a worker thread: run the stages of the queued jobs one after the other'''
+        while not self._stop.is_set():
+            try:
+                job=self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            label=job['label']
+            record=self.jobs[label]
+            stages=STAGES[job['kind']] if self.report else STAGES[job['kind']][:1]
+            with self._lock:
+                self._running+=1
+                record['status']='running'
+            try:
+                while job['stage']<len(stages):
+                    with self._lock:
+                        record['stage']=stages[job['stage']]
+                    summary=self._submit(job,stages[job['stage']])
+                    with self._lock:
+                        record['summary'].update(summary)
+                        record['attempts']=0
+                        record['error']=''
+                    job['stage']+=1
+                with self._lock:
+                    record['status']='done'
+                logger.info('%s: done',label)
+            except Exception as error:
+                with self._lock:
+                    record['attempts']+=1
+                    record['error']=type(error).__name__+': '+str(error)
+                    if record['attempts']<=self.max_retries:
+                        record['status']='retry'
+                        delay=self.retry_delay*2**(record['attempts']-1)
+                        heapq.heappush(self._retries,(monotonic()+delay,next(self._counter),job))
+                        logger.warning('%s: %s, retry in %g s',label,record['error'],delay)
+                    else:
+                        record['status']='failed'
+                        logger.error('%s: %s, failed after %d attempts',label,record['error'],record['attempts'])
+            finally:
+                with self._lock:
+                    self._running-=1
+                    self._update_file(record['path'])
+                self.save_state()
+                self._queue.task_done()
+
+    def _update_file(self,path):
+        '''Status of a file from the status of its jobs: done when all are done, failed when one failed'''
+        record=self.files[path]
+        statuses=[self.jobs[label]['status'] for label in record['jobs']]
+        if all(status=='done' for status in statuses):
+            record['status']='done'
+        elif any(status=='failed' for status in statuses):
+            record['status']='failed'
+            record['error']='; '.join(label+': '+self.jobs[label]['error'] for label in record['jobs'] if self.jobs[label]['status']=='failed')
+
+    def _scan(self):
+        '''Loop of the scanner thread: poll the folders and release the retries, every poll_interval'''
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                self._release_retries()
+            except Exception:                    #a network drive which disappears must not stop the daemon
+                logger.exception('poll failed')
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        '''Start the scanner thread and the worker threads in the background'''
+        self._stop.clear()
+        self._threads=[threading.Thread(target=self._scan,name='Watch scanner',daemon=True)]
+        self._threads+=[threading.Thread(target=self._work,name='Watch worker '+str(k),daemon=True) for k in range(self.max_workers)]
+        for thread in self._threads:
+            thread.start()
+        logger.info('watching %s',', '.join(self.folders))
+
+    def idle(self):
+        '''True when no file is settling and no job is queued, running or waiting for a retry'''
+        with self._lock:
+            return not self._changing and self._queue.empty() and self._running==0 and not self._retries
+
+    def stop(self):
+        '''Stop the threads and the worker processes, after the stages in progress; the queued jobs are taken again at the
+           next start'''
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        with self._lock:
+            executor,self._executor=self._executor,None
+        if executor is not None:
+            executor.shutdown(wait=True,cancel_futures=True)
+        self.save_state()
+
+    def run_forever(self):
+        '''Watch the folders until the daemon is interrupted (Ctrl+C)'''
+        self.start()
+        try:
+            while True:
+                self._stop.wait(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
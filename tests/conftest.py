@@ -0,0 +1,8 @@
+###IMPORT
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')            #the figures of the tests are never shown
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))      #flat modules of the repository
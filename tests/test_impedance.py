@@ -0,0 +1,55 @@
+###IMPORT
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Impedance
+
+###CONSTANTS
+FREQUENCIES=np.logspace(4,-2,60)      #Unit: Hz
+
+###FUNCTIONS
+
+def spectra_of(circuit,params,noise=0.0,seed=0):
+    '''Spectra of the circuit for each parameter set (SI units), with a relative noise, and a last cell without points'''
+    rng=np.random.default_rng(seed)
+    frames=[]
+    for p in params:
+        Z=Impedance.circuit_impedance(circuit,np.array([p]),2*np.pi*FREQUENCIES[None,:])[0]
+        Z=Z*(1+noise*rng.normal(size=Z.shape))
+        frames.append(pd.DataFrame({'freq/Hz':FREQUENCIES,'Re(Z)/Ohm':Z.real,'-Im(Z)/Ohm':-Z.imag}))
+    frames.append(pd.DataFrame({'freq/Hz':[],'Re(Z)/Ohm':[],'-Im(Z)/Ohm':[]}))
+    return Impedance.Spectra(['C'+str(k) for k in range(len(frames))],frames)
+
+
+def fitted_params(df_fit,circuit,n_cell):
+    '''Fitted parameters in SI units (the resistances are reported in mOhm)'''
+    params=df_fit.iloc[:n_cell,1:1+len(Impedance.CIRCUITS[circuit])].values.copy()
+    for k,(name,unit,kind) in enumerate(Impedance.CIRCUITS[circuit]):
+        if kind=='R':
+            params[:,k]/=1000
+    return params
+
+
+@pytest.mark.parametrize('circuit,params',[('R-RC',[[0.020,0.015,3.0],[0.025,0.010,1.5]]),
+                                           ('R-RC-CPE',[[0.020,0.015,3.0,800,0.8],[0.025,0.010,1.5,500,0.7]])])
+def test_exact_spectra(circuit,params):
+    spectra=spectra_of(circuit,params)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error',category=RuntimeWarning)       #no All-NaN slice for the cell without points
+        df_fit=Impedance.fit_equivalent_circuit(spectra,circuit)
+    assert np.allclose(fitted_params(df_fit,circuit,len(params)),params,rtol=1e-6)
+    assert df_fit['Fit status'].tolist()==['OK']*len(params)+['NO_DATA']
+    assert df_fit['Converged'].tolist()==[True]*len(params)+[False]
+    assert df_fit['Relative RMS error'].values[:-1].max()<1e-8
+    assert df_fit.iloc[-1,1:1+len(params[0])].isna().all()
+
+
+def test_noisy_spectra():
+    params=[[0.020,0.015,3.0,800,0.8],[0.025,0.010,1.5,500,0.7],[0.018,0.020,2.0,1200,0.85]]
+    df_fit=Impedance.fit_equivalent_circuit(spectra_of('R-RC-CPE',params,noise=0.002),'R-RC-CPE')
+    assert (df_fit['Fit status'].values[:-1]=='OK').all()
+    assert np.allclose(fitted_params(df_fit,'R-RC-CPE',len(params)),params,rtol=0.05)
+    assert (df_fit['Relative RMS error'].values[:-1]<0.002).all()       #the noise is left in the residuals
@@ -0,0 +1,18 @@
+###IMPORT
+import numpy as np
+
+from Class_method import Battery
+import Lock_in
+import Synthetic_data
+
+###FUNCTIONS
+
+def test_lock_in_recovers_entropy(tmp_path,monkeypatch):
+    monkeypatch.chdir(tmp_path)        #the entropy table is exported as a CSV file in the working directory
+    path=str(tmp_path/'Entropy_discharge_lockin_28C_B1.txt')
+    truth=Synthetic_data.generate_basytec_file(path,n_SOC=8,Tsteps=[28,28],time_step=40,modulation=[(3,20)])
+    experiment=Lock_in.Lock_in_experiment('Entropy',2,2,Battery('B1',1500,40,28,'',''),Synthetic_data.synthetic_channels(1)[0],28,path)
+    assert np.allclose(experiment.frequencies,[3.0],rtol=0.02)         #period of 20 min found in the thermocouple signal
+    error=experiment.df_entropy_data[Lock_in.LOCK_IN_COLUMN].values-truth['Entropy [J mol-1 K-1]'].values
+    assert np.sqrt(np.mean(error**2))<0.3          #Unit: J.mol-1.K-1
+    assert np.abs(error).max()<1.0
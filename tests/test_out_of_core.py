@@ -0,0 +1,26 @@
+###IMPORT
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from Class_method import Battery, Experiment, Spilled_SOC_list
+import Synthetic_data
+
+###FUNCTIONS
+
+def test_out_of_core_equals_in_memory(tmp_path,monkeypatch):
+    monkeypatch.chdir(tmp_path)        #the experiments export their CSV files in the working directory
+    path=str(tmp_path/'Entropy_discharge_20min_28C_B1.txt')
+    Synthetic_data.generate_basytec_file(path,n_SOC=6)
+    definition=('Entropy',2,2,Battery('B1',1500,40,28,'',''),Synthetic_data.synthetic_channels(1)[0],20,3,28,[28,28,25,22,28],path)
+    in_memory=Experiment(*definition)
+    out_of_core=Experiment(*definition,out_of_core=True,chunksize=1000)       #several chunks per SOC
+    pd.testing.assert_frame_equal(out_of_core.df_entropy_data,in_memory.df_entropy_data)
+    assert isinstance(out_of_core.SOC_relax_list,Spilled_SOC_list)
+    for SOC_out,SOC_in in zip(out_of_core.SOC_relax_list,in_memory.SOC_relax_list):
+        pd.testing.assert_frame_equal(SOC_out,SOC_in)
+    #the methods using the raw data read the file by chunks and do not keep it
+    assert out_of_core.max_capacity()==in_memory.max_capacity()
+    pd.testing.assert_frame_equal(out_of_core.DataFrame_T_expected(),in_memory.DataFrame_T_expected())
+    out_of_core.OCV_temperature_plot()
+    plt.close('all')
+    assert out_of_core._df_basytec is None
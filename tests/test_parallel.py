@@ -0,0 +1,19 @@
+###IMPORT
+import pandas as pd
+
+from Class_method import Battery, Experiment
+import Synthetic_data
+
+###FUNCTIONS
+
+def test_parallel_equals_serial(tmp_path,monkeypatch):
+    monkeypatch.chdir(tmp_path)        #the experiments export their CSV files in the working directory
+    path=str(tmp_path/'Entropy_discharge_20min_28C_B1.txt')
+    Synthetic_data.generate_basytec_file(path,n_SOC=5)
+    definition=('Entropy',2,2,Battery('B1',1500,40,28,'',''),Synthetic_data.synthetic_channels(1)[0],20,3,28,[28,28,25,22,28],path)
+    serial=Experiment(*definition)
+    parallel=Experiment(*definition,max_workers=2)
+    pd.testing.assert_frame_equal(parallel.df_entropy_data,serial.df_entropy_data)
+    assert parallel.level_index_list[1].tolist()==serial.level_index_list[1].tolist()
+    for SOC_parallel,SOC_serial in zip(parallel.SOC_relax_list,serial.SOC_relax_list):
+        pd.testing.assert_frame_equal(SOC_parallel,SOC_serial)
@@ -0,0 +1,37 @@
+###IMPORT
+import os
+import warnings
+
+import matplotlib
+import matplotlib.pyplot as plt
+
+from Class_method import Battery, Experiment, Experiment_group
+import Report
+import Synthetic_data
+
+###FUNCTIONS
+
+def test_render_in_process(tmp_path,monkeypatch):
+    monkeypatch.chdir(tmp_path)        #the experiments export their CSV files in the working directory
+    path=str(tmp_path/'Entropy_discharge_20min_28C_B1.txt')
+    Synthetic_data.generate_basytec_file(path,n_SOC=2)
+    experiment=Experiment('Entropy',2,2,Battery('B1',1500,40,28,'',''),Synthetic_data.synthetic_channels(1)[0],20,3,28,
+                          [28,28,25,22,28],path)
+    group=Experiment_group(2,[experiment,experiment])          #the same experiment listed twice
+    plt.switch_backend('pdf')
+    figure=plt.figure()                   #figure of the caller
+    filters=list(warnings.filters)
+    try:
+        df_report=Report.render_report(group,str(tmp_path/'report'),n_jobs=0)
+        #the backend, the warning filters and the figures of the caller are kept
+        assert matplotlib.get_backend()=='pdf'
+        assert warnings.filters==filters
+        assert plt.fignum_exists(figure.number)
+    finally:
+        plt.close('all')
+        plt.switch_backend('Agg')
+    folders=[item for item in os.listdir(tmp_path/'report') if os.path.isdir(tmp_path/'report'/item)]
+    assert folders==[Report._file_name(experiment.title)]          #rendered once
+    df_experiment=df_report[df_report['Figure'].str.startswith(str(tmp_path/'report'/folders[0]))]
+    assert len(df_experiment)==len(Report.experiment_figures(experiment))
+    assert (df_experiment['Error']=='').all()
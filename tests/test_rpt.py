@@ -0,0 +1,57 @@
+###IMPORT
+import numpy as np
+import pandas as pd
+import pytest
+
+from Class_method import Battery
+from RPT_analysis import analyse_RPT
+
+###CONSTANTS
+DT=10/3600              #time between two rows (Unit: h)
+
+###FUNCTIONS
+
+@pytest.fixture(scope='module')
+def RPT_file(tmp_path_factory):
+    '''Novonix file of 2 cycles: charge 1.5 A for 1 h, rest, discharge 1.5 A for 0.98 h, rest'''
+    rows=[]
+    time=0.0
+    charge=0.0
+    for cycle in range(2):
+        for current,duration in [(1.5,1.0),(0.0,0.5),(-1.5,0.98),(0.0,0.5)]:
+            for k in range(int(round(duration/DT))):
+                charge+=current*DT
+                rows.append((time,current,3.0+0.2*charge+0.02*np.sign(current),charge))
+                time+=DT
+    path=str(tmp_path_factory.mktemp('rpt')/'RPT_B1.csv')
+    with open(path,'w') as file:
+        file.write('h\n'*159)
+        pd.DataFrame(rows,columns=['Run Time (h)','Current (A)','Potential (V)','Capacity (Ah)']).to_csv(file,index=False)
+    return path
+
+
+def test_segmentation(RPT_file):
+    battery=Battery('B1',1500,40,28,RPT_file,'')
+    result=analyse_RPT(battery)
+    steps=result.steps
+    assert steps['Type'].tolist()==['charge','rest','discharge','rest']*2
+    assert steps['Cycle'].tolist()==[0]*4+[1]*4
+    #every increment belongs to one step: the capacities add up to the integral of |I| (trapezoid rule)
+    df=pd.read_csv(RPT_file,header=159)
+    current=df['Current (A)'].values
+    increments=np.abs(0.5*(current[1:]+current[:-1]))*np.diff(df['Run Time (h)'].values)
+    assert steps['Capacity (Ah)'].sum()==pytest.approx(increments.sum())
+    charge=steps[steps['Type']=='charge']['Capacity (Ah)'].values
+    discharge=steps[steps['Type']=='discharge']['Capacity (Ah)'].values
+    assert charge==pytest.approx(1.5,abs=1.5*DT)
+    assert discharge==pytest.approx(1.47,abs=1.5*DT)
+    assert result.cycles['Coulombic efficiency'].values==pytest.approx(discharge/charge)
+
+
+def test_chunk_boundaries(RPT_file):
+    battery=Battery('B1',1500,40,28,RPT_file,'')
+    whole=analyse_RPT(battery)
+    chunked=analyse_RPT(battery,chunksize=97)       #chunk boundaries inside the steps
+    pd.testing.assert_frame_equal(chunked.steps,whole.steps)
+    pd.testing.assert_frame_equal(chunked.cycles,whole.cycles)
+    pd.testing.assert_frame_equal(chunked.ica,whole.ica)
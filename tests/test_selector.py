@@ -0,0 +1,35 @@
+###IMPORT
+import numpy as np
+import pandas as pd
+
+from Class_method import Battery, Experiment, Method_selector
+import Synthetic_data
+
+###FUNCTIONS
+
+def test_selector_same_bestfit(tmp_path,monkeypatch):
+    monkeypatch.chdir(tmp_path)        #the experiments export their CSV files in the working directory
+    path=str(tmp_path/'Entropy_discharge_20min_28C_B1.txt')
+    Synthetic_data.generate_basytec_file(path,n_SOC=6)
+    definition=('Entropy',2,2,Battery('B1',1500,40,28,'',''),Synthetic_data.synthetic_channels(1)[0],20,3,28,[28,28,25,22,28],path)
+    exhaustive=Experiment(*definition).df_entropy_data
+    selected=Experiment(*definition,selector=Method_selector()).df_entropy_data
+    pd.testing.assert_series_equal(selected['Bestfit method'],exhaustive['Bestfit method'])
+    pd.testing.assert_series_equal(selected['Bestfit Entropy [J mol-1 K-1]'],exhaustive['Bestfit Entropy [J mol-1 K-1]'])
+    #at least one nonlinear fit was skipped, never the best one
+    pruned=selected[['Status method n°'+str(method) for method in (1,2,3,4)]].values=='PRUNED'
+    assert pruned.any()
+    assert not pruned[:,[0,2]].any()                 #the polynomial methods are always fitted
+    assert not pruned[np.arange(len(selected)),exhaustive['Bestfit method'].values.astype(int)-1].any()
+
+
+def test_selector_skip():
+    selector=Method_selector(window=2,threshold=1.2,recheck=2)
+    assert not selector.skip(2,[1.0,2.0])             #no history: fitted
+    for SOC in range(2):                              #method n°2 10 times worse than the polynomial fits
+        selector.update([1.0,10.0,2.0,1.0],['OK']*4)
+    assert selector.skip(2,[1.0,2.0])
+    assert not selector.skip(4,[1.0,2.0])             #method n°4 as good as the polynomial fits
+    assert selector.skip(2,[1.0,2.0])
+    assert not selector.skip(2,[1.0,2.0])             #fitted again after recheck pruned SOCs
+    assert not selector.skip(2,[np.nan,2.0])          #failed polynomial fit: no estimate
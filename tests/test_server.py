@@ -0,0 +1,71 @@
+###IMPORT
+import threading
+import time
+
+import pytest
+
+from Class_method import Battery
+import Server
+import Synthetic_data
+
+###FUNCTIONS
+
+@pytest.fixture(scope='module')
+def service(tmp_path_factory):
+    '''Analysis_service of three experiments (one per channel) of a synthetic Basytec file, one built experiment at a time'''
+    folder=tmp_path_factory.mktemp('server')
+    path=str(folder/'Entropy_discharge_20min_28C_B1.txt')
+    Synthetic_data.generate_basytec_file(path,n_SOC=4,n_channels=3)
+    battery=Battery('B1',1500,40,28,'','')
+    channels=Synthetic_data.synthetic_channels(3)
+    definitions={'X'+str(k):('Entropy',2,2,battery,channels[k],20,3,28,[28,28,25,22,28],path) for k in range(3)}
+    return Server.Analysis_service(definitions,max_experiments=1),folder
+
+
+def test_LRU_eviction():
+    cache=Server.LRU_cache(2)
+    for key in 'abc':
+        assert cache.get(key,lambda: key.upper())==key.upper()
+    assert cache.keys()==['b','c']                    #a: least recently used
+    assert cache.get('b',lambda: 'other')=='B'        #hit, b becomes the most recent
+    cache.get('d',lambda: 'D')
+    assert cache.keys()==['b','d']
+    assert cache.statistics()=={'size':2,'max_size':2,'hits':1,'misses':4,'evictions':2}
+
+
+def test_LRU_single_flight():
+    cache=Server.LRU_cache(4)
+    calls=[]
+
+    def build():
+        calls.append(threading.get_ident())
+        time.sleep(0.2)                 #the other threads ask for the key while it is built
+        return object()
+
+    items=[None]*8
+    def get(k):
+        items[k]=cache.get('key',build)
+    threads=[threading.Thread(target=get,args=(k,)) for k in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls)==1
+    assert all(item is items[0] for item in items)
+    assert cache.statistics()['misses']==1 and cache.statistics()['hits']==7
+
+
+def test_service_caches(service,monkeypatch):
+    service,folder=service
+    monkeypatch.chdir(folder)          #the experiments export their CSV files in the working directory
+    first=service.query('entropy',{'experiment':'X0','method':5})
+    assert len(first['entropy'])==4
+    assert service.query('entropy',{'experiment':'X0','method':'5'}) is first        #same query, answered from the cache
+    assert service.results.statistics()['hits']==1
+    service.query('entropy',{'experiment':'X1','method':5})
+    assert service.experiments.keys()==['X1']        #max_experiments=1: X0 evicted
+    assert service.query('experiments',{})=={'experiments':['X0','X1','X2'],'loaded':['X1']}
+    with pytest.raises(ValueError):
+        service.query('entropy',{'experiment':'X0','method':9})
+    with pytest.raises(KeyError):
+        service.query('entropy',{'experiment':'nope'})
@@ -0,0 +1,38 @@
+###IMPORT
+import shutil
+import threading
+
+from Class_method import Battery, Experiment
+import Synthetic_data
+
+###FUNCTIONS
+
+def test_shared_experiment(tmp_path,monkeypatch):
+    monkeypatch.chdir(tmp_path)        #the experiments export their CSV files in the working directory
+    path=str(tmp_path/'Entropy_discharge_20min_28C_B1.txt')
+    Synthetic_data.generate_basytec_file(path,n_SOC=3)
+    copy=str(tmp_path/'copy.txt')
+    shutil.copy(path,copy)
+    battery=Battery('B1',1500,40,28,'','')
+    channel=Synthetic_data.synthetic_channels(1)[0]
+    definitions=[('Entropy',2,2,battery,channel,20,3,28,[28,28,25,22,28],file) for file in (path,copy,path,copy)]
+    built=[]
+    original_init=Experiment.__init__
+
+    def counted_init(self,*definition,**options):
+        built.append(definition[-1])
+        original_init(self,*definition,**options)
+    monkeypatch.setattr(Experiment,'__init__',counted_init)
+    experiments=[None]*len(definitions)
+
+    def build(k):
+        experiments[k]=Experiment.shared(*definitions[k],decimation=50)
+    threads=[threading.Thread(target=build,args=(k,)) for k in range(len(definitions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(experiment is experiments[0] for experiment in experiments)     #same content: one object
+    assert len(built)==1                                                       #read and fitted once
+    assert Experiment.shared(*definitions[1],decimation=50) is experiments[0]
+    assert Experiment.shared(*definitions[0],decimation=60) is not experiments[0]      #other parameters
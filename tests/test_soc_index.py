@@ -0,0 +1,33 @@
+###IMPORT
+import matplotlib.pyplot as plt
+import numpy as np
+
+from Class_method import Battery, Experiment, indexed_SOC_plot, read_SOC
+import Synthetic_data
+
+###FUNCTIONS
+
+def plotted_rows(plot,*args):
+    '''Time and OCV plotted by a SOC plot'''
+    plot(*args)
+    line=plt.gcf().axes[0].lines[0]
+    data=np.array(line.get_xdata()),np.array(line.get_ydata())
+    plt.close('all')
+    return data
+
+
+def test_SOC_plot_segmentation(tmp_path,monkeypatch):
+    monkeypatch.chdir(tmp_path)        #the experiments export their CSV files in the working directory
+    path=str(tmp_path/'Entropy_discharge_20min_28C_B1.txt')
+    Synthetic_data.generate_basytec_file(path,n_SOC=3)
+    channel=Synthetic_data.synthetic_channels(1)[0]
+    definition=('Entropy',2,2,Battery('B1',1500,40,28,'',''),channel,20,3,28,[28,28,25,22,28],path)
+    in_memory=Experiment(*definition)
+    released=Experiment(*definition,lean=True)
+    assert released._df_basytec is None
+    for SOC_number in range(3):
+        expected=read_SOC(path,2,SOC_number)
+        for data in (plotted_rows(in_memory.SOC_plot,SOC_number),plotted_rows(released.SOC_plot,SOC_number),
+                     plotted_rows(indexed_SOC_plot,path,2,channel,SOC_number,28)):
+            assert np.array_equal(data[0],expected['~Time[h]'].values)
+            assert np.array_equal(data[1],expected[channel.OCV].values)
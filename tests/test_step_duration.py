@@ -0,0 +1,28 @@
+###IMPORT
+import pandas as pd
+import pytest
+
+from Class_method import Battery, Experiment, Fit_budget
+import Synthetic_data
+
+###FUNCTIONS
+
+def test_step_duration_analysis(tmp_path,monkeypatch):
+    monkeypatch.chdir(tmp_path)        #the experiments export their CSV files in the working directory
+    path=str(tmp_path/'Entropy_discharge_20min_28C_B1.txt')
+    Synthetic_data.generate_basytec_file(path,n_SOC=3)
+    definition=('Entropy',2,2,Battery('B1',1500,40,28,'',''),Synthetic_data.synthetic_channels(1)[0],20,3,28,[28,28,25,22,28],path)
+    answers=[]
+    for max_workers in (None,2):
+        experiment=Experiment(*definition,max_workers=max_workers,budget=Fit_budget(experiment_evaluations=10**9))
+        spent=experiment.budget.evaluations
+        df_summary,df_profiles,shortest=experiment.step_duration_analysis([15,10,10])
+        assert experiment.budget.evaluations==spent              #the budget of the experiment is not changed
+        assert df_summary['Step duration (min)'].tolist()==[20,15,10]       #full steps first, no duplicate
+        assert df_summary['Max deviation [J mol-1 K-1]'].iloc[0]==0
+        answers.append(df_profiles)
+        with pytest.raises(ValueError):
+            experiment.step_duration_analysis([25,10])
+        with pytest.raises(ValueError):
+            experiment.step_duration_analysis([0])
+    pd.testing.assert_frame_equal(answers[1],answers[0])          #fits in worker processes: same profiles
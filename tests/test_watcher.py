@@ -0,0 +1,98 @@
+###IMPORT
+import json
+import os
+import shutil
+import time
+
+import pytest
+
+from Class_method import Battery
+import Synthetic_data
+import Watcher
+
+###CONSTANTS
+FILE_NAME='Entropy_discharge_20min_28C_B1.txt'
+
+###FUNCTIONS
+
+@pytest.fixture
+def folders(tmp_path):
+    '''Watched folder with a small synthetic entropy file, and the output folder'''
+    watched=tmp_path/'in'
+    watched.mkdir()
+    Synthetic_data.generate_basytec_file(str(watched/FILE_NAME),n_SOC=3)
+    return str(watched),str(tmp_path/'out')
+
+
+def make_watcher(folders,**options):
+    options=dict(dict(channels=Synthetic_data.synthetic_channels(1),batteries=[Battery('B1',1500,40,28,'','')],poll_interval=0.05,
+                      settle=0,max_workers=1,report=False),**options)
+    return Watcher.Watch_folder(*folders,**options)
+
+
+def wait_idle(watcher,timeout=120):
+    time.sleep(0.2)
+    end=time.monotonic()+timeout
+    while not watcher.idle():
+        assert time.monotonic()<end,'the watcher is not idle after '+str(timeout)+' s'
+        time.sleep(0.05)
+
+
+def test_duplicate_digest_skipped(folders):
+    shutil.copy(os.path.join(folders[0],FILE_NAME),os.path.join(folders[0],'copy_'+FILE_NAME))
+    watcher=make_watcher(folders)
+    assert watcher.poll()==1               #the workers are not started: the jobs stay in the queue
+    statuses=sorted(record['status'] for record in watcher.files.values())
+    assert statuses==['duplicate','queued']
+    assert len(watcher.jobs)==1
+    assert watcher.poll()==0               #files already known
+
+
+def test_retry_with_backoff(folders):
+    retry_delay=0.2
+    watcher=make_watcher(folders,max_retries=2,retry_delay=retry_delay,catalog={'Entropy_*':{'options':{'decimation':'bad'}}})
+    start=time.monotonic()
+    watcher.start()
+    try:
+        wait_idle(watcher)
+    finally:
+        watcher.stop()
+    record=next(iter(watcher.jobs.values()))
+    assert record['status']=='failed'
+    assert record['attempts']==3           #first attempt and max_retries retries
+    assert time.monotonic()-start>=retry_delay*(1+2)      #delays doubled at each retry
+    (file_record,)=watcher.files.values()
+    assert file_record['status']=='failed' and record['error'] in file_record['error']
+
+
+def test_load_state_resume(folders):
+    watcher=make_watcher(folders)
+    watcher.start()
+    try:
+        wait_idle(watcher)
+    finally:
+        watcher.stop()
+    (label,record),=watcher.jobs.items()
+    assert record['status']=='done' and record['summary']['SOC']==3
+    #a new daemon does not analyse the finished file again
+    watcher=make_watcher(folders)
+    assert watcher.jobs[label]['status']=='done'
+    assert watcher.poll()==0
+    #a file interrupted while it was analysed is taken again, its job resumed from the checkpoints
+    path=os.path.join(folders[1],Watcher.STATE_FILE)
+    with open(path,encoding='utf-8') as file:
+        state=json.load(file)
+    for item in state['files'].values():
+        item['status']='running'
+    state['jobs'][label]['status']='running'
+    with open(path,'w',encoding='utf-8') as file:
+        json.dump(state,file)
+    watcher=make_watcher(folders)
+    assert watcher.jobs[label]['status']=='interrupted'
+    assert [item['status'] for item in watcher.files.values()]==['changed']
+    watcher.start()
+    try:
+        wait_idle(watcher)
+    finally:
+        watcher.stop()
+    assert watcher.jobs[label]['status']=='done' and watcher.jobs[label]['summary']['SOC']==3